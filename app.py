@@ -1,16 +1,53 @@
-from flask import Flask, request, jsonify, send_from_directory, send_file
+from flask import (
+    Blueprint,
+    Flask,
+    current_app,
+    has_app_context,
+    request,
+    jsonify,
+    send_from_directory,
+    send_file,
+)
 from flask_sqlalchemy import SQLAlchemy
-from datetime import datetime, timezone, timedelta
+from datetime import date, datetime, time, timezone, timedelta
 
 import os
 import json
 import logging
 import functools
-from werkzeug.serving import run_simple
-from sqlalchemy import extract
+import threading
+import base64
+from sqlalchemy import event, extract, func, select, text, type_coerce
+from sqlalchemy.ext.hybrid import hybrid_property
+from sqlalchemy.orm import Session
+from werkzeug.local import LocalProxy
 from subprocess import run, CalledProcessError
+from types import SimpleNamespace
 import glob
-from apscheduler.schedulers.background import BackgroundScheduler
+
+from services import (
+    analytics,
+    bank_sync,
+    events,
+    metrics,
+    migrations,
+    sql_profiler,
+)
+from services.categories import (
+    DEFAULT_COLOR,
+    DEFAULT_ICON,
+    CategoryLookup,
+    default_rows,
+    new_category,
+)
+from services.compression import init_compression
+from services.database import ReadRoutingSession, init_database, writes_on_get
+from services.events import init_events
+from services.expense_cache import day_ordinal, init_expense_cache
+from services.jobs import init_jobs
+from services.search import init_search
+from services.instrumentation import init_instrumentation, timed
+from services.static_assets import init_static_assets, serve_page
 
 # Configure logging
 logging.basicConfig(
@@ -18,30 +55,91 @@ logging.basicConfig(
 )
 logger = logging.getLogger(__name__)
 
-# Create Flask app with explicit instance path
 current_dir = os.path.dirname(os.path.abspath(__file__))
 instance_path = os.path.join(current_dir, "instance")
-app = Flask(__name__, static_folder="static", instance_path=instance_path)
+# Written at build/deploy time (scripts/deployment/write_version.sh)
+VERSION_FILE = os.path.join(current_dir, "VERSION")
+
+
+def config_from_env():
+    """Settings read from the environment; create_app(config) overrides them."""
+    config = {
+        # Relative SQLite paths resolve against the instance folder.
+        # DATABASE_URL overrides it (benchmarks and tooling point at other files).
+        "SQLALCHEMY_DATABASE_URI": os.environ.get(
+            "DATABASE_URL", "sqlite:///expenses.db"
+        ),
+        "SQLALCHEMY_TRACK_MODIFICATIONS": False,
+        # Development settings
+        "SEND_FILE_MAX_AGE_DEFAULT": 0,
+        "TEMPLATES_AUTO_RELOAD": True,
+        # Requests slower than this are logged with their timing breakdown
+        "SLOW_REQUEST_MS": float(os.environ.get("SLOW_REQUEST_MS", 500)),
+        # auto: use orjson when installed; "stdlib" forces Flask's json encoder
+        "JSON_BACKEND": os.environ.get("JSON_BACKEND", "auto"),
+        # API payloads at least this large are gzip/brotli-compressed when accepted
+        "COMPRESS_MIN_BYTES": int(os.environ.get("COMPRESS_MIN_BYTES", 1024)),
+        # Background job worker threads (0: jobs only run via run_pending())
+        "JOB_WORKERS": int(os.environ.get("JOB_WORKERS", 2)),
+        # Run the recurring and bank sync schedules in this process ("0": off)
+        "SCHEDULER": os.environ.get("SCHEDULER", "1") != "0",
+        # In-memory columnar copy of the expense table for aggregates ("0": off)
+        "EXPENSE_CACHE": os.environ.get("EXPENSE_CACHE", "1") != "0",
+        # Apply pending schema migrations at startup instead of at deploy time
+        "MIGRATE_ON_START": os.environ.get("MIGRATE_ON_START") == "1",
+        # Refuse to start on a database behind MIGRATIONS (migrate.py turns it off)
+        "SCHEMA_CHECK": True,
+        # Write-ahead logging, so reads never wait for a writer ("0": off)
+        "SQLITE_WAL": os.environ.get("SQLITE_WAL", "1") != "0",
+        # Read-only connections for GET requests (0: read on the main engine)
+        "READ_POOL_SIZE": int(os.environ.get("READ_POOL_SIZE", 5)),
+        # Threads running views in the ASGI serving mode (SERVER_MODE=asgi)
+        "ASGI_THREADS": int(os.environ.get("ASGI_THREADS", 8)),
+    }
+    # Statements slower than this are logged with their query plan (off if unset)
+    if os.environ.get("SLOW_QUERY_MS"):
+        config["SLOW_QUERY_MS"] = float(os.environ["SLOW_QUERY_MS"])
+    return config
+
+
+db = SQLAlchemy(session_options={"class_": ReadRoutingSession})
+# Every route; create_app() registers it on the app it builds
+bp = Blueprint("app", __name__)
+
+
+def _extension(name):
+    """The current app's instance of a service set up in create_app()."""
+    return LocalProxy(lambda: current_app.extensions[name])
+
+
+event_broker = _extension("event_broker")
+
 
-# Ensure instance folder exists
-os.makedirs(app.instance_path, exist_ok=True)
-db_path = os.path.join(app.instance_path, "expenses.db")
-logger.info(f"Configuring database at: {db_path}")
+# ---------------------------------------------------------------------------
+# Models
+# ---------------------------------------------------------------------------
 
-# Use relative path for SQLite as it will be relative to instance_path
-app.config["SQLALCHEMY_DATABASE_URI"] = "sqlite:///expenses.db"
-app.config["SQLALCHEMY_TRACK_MODIFICATIONS"] = False
 
-# Development settings
-app.config["SEND_FILE_MAX_AGE_DEFAULT"] = 0
-app.config["TEMPLATES_AUTO_RELOAD"] = True
+class Category(db.Model):
+    __tablename__ = "category"
 
-db = SQLAlchemy(app)
+    id = db.Column(db.Integer, primary_key=True)
+    key = db.Column(db.String(50), nullable=False, unique=True)
+    label = db.Column(db.String(100), nullable=False)
+    color = db.Column(db.String(20), nullable=False)
+    icon = db.Column(db.String(50), nullable=False)
+    position = db.Column(db.Integer, nullable=False, default=0)
 
 
-# ---------------------------------------------------------------------------
-# Models
-# ---------------------------------------------------------------------------
+category_lookup = _extension("category_lookup")
+
+
+@event.listens_for(Category.__table__, "after_create")
+def _seed_categories(target, connection, **kw):
+    connection.execute(target.insert(), default_rows())
+    # Migrations may run on a bare engine, outside any app
+    if has_app_context():
+        category_lookup.clear()
 
 
 class Expense(db.Model):
@@ -49,7 +147,7 @@ class Expense(db.Model):
 
     id = db.Column(db.Integer, primary_key=True)
     amount = db.Column(db.Float, nullable=False)
-    category = db.Column(db.String(50), nullable=False)
+    category_id = db.Column(db.Integer, db.ForeignKey("category.id"), nullable=False)
     description = db.Column(db.String(200), nullable=False)
     date = db.Column(db.DateTime, default=lambda: datetime.now(timezone.utc))
     # Bank sync fields (added via migration script on existing DBs)
@@ -57,6 +155,30 @@ class Expense(db.Model):
     external_id = db.Column(db.String(100), nullable=True, unique=True)
     merchant = db.Column(db.String(200), nullable=True)
 
+    # Shapes served: month/date-range listings ordered by date, and the same
+    # narrowed by category or by source (/api/expenses/query, unclassified).
+    __table_args__ = (
+        db.Index("ix_expense_date", "date"),
+        db.Index("ix_expense_category_date", "category_id", "date"),
+        db.Index("ix_expense_source_date", "source", "date"),
+    )
+
+    # The category key ("super"); category_id is what is stored
+    @hybrid_property
+    def category(self):
+        return category_lookup.key(self.category_id)
+
+    @category.setter
+    def category(self, key):
+        self.category_id = category_lookup.id_for(key)
+
+    @category.expression
+    def category(cls):
+        return (
+            select(Category.key).where(Category.id == cls.category_id).scalar_subquery()
+        )
+
+    @timed("serialize")
     def to_dict(self):
         return {
             "id": self.id,
@@ -98,6 +220,67 @@ def parse_expense_date(value):
     raise ValueError("Invalid date value; expected string")
 
 
+# Full-text index over expense.description / expense.merchant. It is an
+# external-content FTS5 table, so the text lives only in `expense` and the
+# triggers below keep the index in step with every insert, update and delete.
+EXPENSE_FTS_DDL = [
+    """
+    CREATE VIRTUAL TABLE IF NOT EXISTS expense_fts USING fts5(
+        description, merchant,
+        content='expense', content_rowid='id',
+        tokenize='unicode61 remove_diacritics 2', prefix='2 3'
+    )
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS expense_fts_ai AFTER INSERT ON expense BEGIN
+        INSERT INTO expense_fts(rowid, description, merchant)
+        VALUES (new.id, new.description, new.merchant);
+    END
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS expense_fts_ad AFTER DELETE ON expense BEGIN
+        INSERT INTO expense_fts(expense_fts, rowid, description, merchant)
+        VALUES ('delete', old.id, old.description, old.merchant);
+    END
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS expense_fts_au
+    AFTER UPDATE OF description, merchant ON expense BEGIN
+        INSERT INTO expense_fts(expense_fts, rowid, description, merchant)
+        VALUES ('delete', old.id, old.description, old.merchant);
+        INSERT INTO expense_fts(rowid, description, merchant)
+        VALUES (new.id, new.description, new.merchant);
+    END
+    """,
+]
+
+
+def ensure_expense_fts(connection):
+    """Create the expense FTS index and triggers if missing.
+
+    Returns True when the index was created (and populated from `expense`).
+    """
+    exists = connection.execute(
+        text("SELECT 1 FROM sqlite_master WHERE name = 'expense_fts'")
+    ).first()
+    for statement in EXPENSE_FTS_DDL:
+        connection.execute(text(statement))
+    if exists:
+        return False
+    connection.execute(text("INSERT INTO expense_fts(expense_fts) VALUES ('rebuild')"))
+    return True
+
+
+@event.listens_for(Expense.__table__, "after_create")
+def _create_expense_fts(target, connection, **kw):
+    ensure_expense_fts(connection)
+
+
+@event.listens_for(Expense.__table__, "before_drop")
+def _drop_expense_fts(target, connection, **kw):
+    connection.execute(text("DROP TABLE IF EXISTS expense_fts"))
+
+
 class MerchantMapping(db.Model):
     __tablename__ = "merchant_mapping"
 
@@ -106,6 +289,7 @@ class MerchantMapping(db.Model):
     category = db.Column(db.String(50), nullable=False)
     description = db.Column(db.String(200), nullable=False)  # human label
 
+    @timed("serialize")
     def to_dict(self):
         return {
             "id": self.id,
@@ -122,6 +306,7 @@ class AppToken(db.Model):
     value = db.Column(db.Text, nullable=False)  # JSON blob
     updated_at = db.Column(db.DateTime, default=lambda: datetime.now(timezone.utc))
 
+    @timed("serialize")
     def to_dict(self):
         return {
             "key": self.key,
@@ -140,6 +325,7 @@ class SyncLog(db.Model):
     unclassified = db.Column(db.Integer, default=0)
     error_message = db.Column(db.Text, nullable=True)
 
+    @timed("serialize")
     def to_dict(self):
         return {
             "id": self.id,
@@ -174,8 +360,12 @@ class RecurringExpense(db.Model):
 
     # Tracking
     last_applied_date = db.Column(db.DateTime, nullable=True)
+    # Earliest date the item can fire on; lets the scheduler skip rows that
+    # are not due instead of evaluating is_due_today on every definition.
+    next_due_date = db.Column(db.DateTime, nullable=True, index=True)
     created_at = db.Column(db.DateTime, default=lambda: datetime.now(timezone.utc))
 
+    @timed("serialize")
     def to_dict(self):
         return {
             "id": self.id,
@@ -190,67 +380,452 @@ class RecurringExpense(db.Model):
             "last_applied_date": (
                 self.last_applied_date.isoformat() if self.last_applied_date else None
             ),
+            "next_due_date": (
+                self.next_due_date.isoformat() if self.next_due_date else None
+            ),
             "created_at": self.created_at.isoformat() if self.created_at else None,
         }
 
 
-# Initialize database
-try:
-    with app.app_context():
-        db.create_all()
-        logger.info("Database initialized successfully")
-except Exception as e:
-    logger.error(f"Error initializing database: {e}")
+class QueuedJob(db.Model):
+    """Background job; see services/jobs.py."""
+
+    __tablename__ = "job_queue"
+
+    id = db.Column(db.String(32), primary_key=True)
+    kind = db.Column(db.String(50), nullable=False)
+    dedupe_key = db.Column(db.String(100), nullable=True)
+    priority = db.Column(db.Integer, nullable=False, default=0)
+    status = db.Column(db.String(20), nullable=False)  # queued|running|succeeded|failed
+    payload = db.Column(db.Text, nullable=True)  # JSON
+    progress = db.Column(db.Text, nullable=True)  # JSON
+    result = db.Column(db.Text, nullable=True)  # JSON
+    error = db.Column(db.Text, nullable=True)
+    attempts = db.Column(db.Integer, nullable=False, default=0)
+    max_attempts = db.Column(db.Integer, nullable=False, default=3)
+    run_at = db.Column(db.DateTime, nullable=False)
+    locked_until = db.Column(db.DateTime, nullable=True)
+    created_at = db.Column(db.DateTime, nullable=False)
+    started_at = db.Column(db.DateTime, nullable=True)
+    finished_at = db.Column(db.DateTime, nullable=True)
+
+    __table_args__ = (
+        # Claim order: ready jobs by priority, then age
+        db.Index("ix_job_queue_ready", "status", "priority", "run_at"),
+        # At most one active job per dedupe key
+        db.Index(
+            "ix_job_queue_dedupe",
+            "dedupe_key",
+            unique=True,
+            sqlite_where=text("status IN ('queued', 'running')"),
+        ),
+    )
+
+
+job_queue = _extension("job_queue")
+
+
+# Change log for delta sync. SQLite triggers record every insert, update and
+# delete on the synced tables, whether it comes from the ORM or raw SQL. Only
+# the latest change per row is kept (INSERT OR REPLACE on the unique row key
+# takes a fresh seq), so a client catching up downloads each changed row once;
+# deletes stay behind as tombstones. AUTOINCREMENT keeps seq from ever being
+# reused, even after the highest row is replaced.
+class ChangeLog(db.Model):
+    __tablename__ = "change_log"
+
+    seq = db.Column(db.Integer, primary_key=True)
+    table_name = db.Column(db.String(50), nullable=False)
+    row_id = db.Column(db.Integer, nullable=False)
+    op = db.Column(db.String(10), nullable=False)  # upsert | delete
+
+    __table_args__ = (
+        db.Index("ix_change_log_row", "table_name", "row_id", unique=True),
+        {"sqlite_autoincrement": True},
+    )
+
+
+CHANGE_LOG_TABLES = ("expense", "recurring_expense", "merchant_mapping")
+
+
+def _change_log_ddl(table):
+    record = """
+        INSERT OR REPLACE INTO change_log(table_name, row_id, op)
+        VALUES ('{table}', {row}.id, '{op}');
+    """
+    return [
+        f"""
+        CREATE TRIGGER IF NOT EXISTS {table}_changes_ai AFTER INSERT ON {table} BEGIN
+            {record.format(table=table, row="new", op="upsert")}
+        END
+        """,
+        f"""
+        CREATE TRIGGER IF NOT EXISTS {table}_changes_au AFTER UPDATE ON {table} BEGIN
+            {record.format(table=table, row="new", op="upsert")}
+        END
+        """,
+        f"""
+        CREATE TRIGGER IF NOT EXISTS {table}_changes_ad AFTER DELETE ON {table} BEGIN
+            {record.format(table=table, row="old", op="delete")}
+        END
+        """,
+    ]
+
+
+def ensure_change_log(connection):
+    """Create the change log triggers if missing.
+
+    Rows that existed before the triggers are logged as upserts, so a client
+    syncing from 0 still sees them. Returns True when the triggers were created.
+    """
+    created = False
+    for table in CHANGE_LOG_TABLES:
+        exists = connection.execute(
+            text("SELECT 1 FROM sqlite_master WHERE name = :name"),
+            {"name": f"{table}_changes_ai"},
+        ).first()
+        for statement in _change_log_ddl(table):
+            connection.execute(text(statement))
+        if not exists:
+            connection.execute(
+                text(
+                    "INSERT OR IGNORE INTO change_log(table_name, row_id, op) "
+                    f"SELECT '{table}', id, 'upsert' FROM {table} ORDER BY id"
+                )
+            )
+            created = True
+    return created
+
+
+# Fires on every create_all(), including against an existing database
+@event.listens_for(db.metadata, "after_create")
+def _create_change_log_triggers(target, connection, **kw):
+    ensure_change_log(connection)
+
+
+def migrate_expense_category_ids(connection):
+    """Move an older database from expense.category (the key as text) to
+    expense.category_id.
+
+    Keys missing from the category table are added first. SQLite cannot
+    change a column in place, so the table is rebuilt under the current
+    schema with the same ids; its indexes, triggers and the search index are
+    recreated. The first INSERT opens the transaction the DDL then runs in,
+    so the whole move commits or rolls back together. Returns True when the
+    table was migrated.
+    """
+    columns = migrations.column_names(connection, "expense")
+    if "category" not in columns or "category_id" in columns:
+        return False
+
+    connection.execute(
+        text(
+            "INSERT OR IGNORE INTO category (key, label, color, icon, position) "
+            "SELECT DISTINCT category, category, :color, :icon, "
+            "(SELECT count(*) FROM category) FROM expense"
+        ),
+        {"color": DEFAULT_COLOR, "icon": DEFAULT_ICON},
+    )
+    # Index and trigger names are schema-wide: free them for the new table
+    for kind, name in connection.exec_driver_sql(
+        "SELECT type, name FROM sqlite_master WHERE tbl_name = 'expense' "
+        "AND type IN ('index', 'trigger') AND sql IS NOT NULL"
+    ).all():
+        connection.exec_driver_sql(f"DROP {kind.upper()} {name}")
+    connection.exec_driver_sql("ALTER TABLE expense RENAME TO expense_old")
+    Expense.__table__.create(connection)
+
+    copied = [c.name for c in Expense.__table__.columns if c.name in columns]
+    connection.exec_driver_sql(
+        f"INSERT INTO expense ({', '.join(copied)}, category_id) "
+        f"SELECT {', '.join(copied)}, "
+        "(SELECT id FROM category WHERE key = expense_old.category) FROM expense_old"
+    )
+    connection.exec_driver_sql("DROP TABLE expense_old")
+    connection.exec_driver_sql(
+        "INSERT INTO expense_fts(expense_fts) VALUES ('rebuild')"
+    )
+    ensure_change_log(connection)
+    return True
+
+
+expense_cache = _extension("expense_cache")
+ranked_searches = _extension("ranked_searches")
+
+
+def last_change_seq(table):
+    """Newest change_log seq for `table`. The triggers advance it on every
+    committed write, from the ORM, raw SQL, scripts or another process, so
+    derived caches key on it to drop as soon as the data changes."""
+    return db.session.execute(
+        select(func.max(ChangeLog.seq)).where(ChangeLog.table_name == table)
+    ).scalar()
+
+
+def _stored_iso(value):
+    """ISO date as SQLite stores it, which drops any timezone."""
+    return value.replace(tzinfo=None).isoformat()
+
+
+# Expense changes are collected per flush and only published to /api/events
+# once the transaction commits; a rollback discards them. Payloads match what
+# the API returns for the row once it is read back.
+@event.listens_for(Session, "after_flush")
+def _collect_expense_events(session, flush_context):
+    pending = session.info.setdefault("expense_events", [])
+    for kind, objects in (
+        (events.EXPENSE_CREATED, session.new),
+        (events.EXPENSE_UPDATED, session.dirty),
+    ):
+        for obj in objects:
+            if isinstance(obj, Expense) and session.is_modified(obj):
+                data = {**obj.to_dict(), "date": _stored_iso(obj.date)}
+                pending.append((kind, data))
+    for obj in session.deleted:
+        if isinstance(obj, Expense):
+            data = {"id": obj.id, "date": _stored_iso(obj.date)}
+            pending.append((events.EXPENSE_DELETED, data))
+
+
+@event.listens_for(Session, "after_commit")
+def _publish_expense_events(session):
+    for event_type, data in session.info.pop("expense_events", ()):
+        event_broker.publish(event_type, data)
+
+
+@event.listens_for(Session, "after_rollback")
+def _discard_expense_events(session):
+    session.info.pop("expense_events", None)
+
+
+# Categories created on first use are inserted in the caller's transaction;
+# if it rolls back, the lookup must forget the ids it mapped them to.
+@event.listens_for(Session, "after_commit")
+def _keep_new_categories(session):
+    session.info.pop("new_categories", None)
+
+
+@event.listens_for(Session, "after_rollback")
+def _forget_new_categories(session):
+    if session.info.pop("new_categories", None):
+        category_lookup.clear()
+
+
+# ---------------------------------------------------------------------------
+# Read path
+# ---------------------------------------------------------------------------
+# List endpoints only read, so they skip the ORM: explicit Core selects,
+# dicts built straight from row tuples. DateTime columns are fetched as the
+# stored SQLite text and reformatted to ISO by slicing, which avoids parsing
+# a datetime per value only to call isoformat() on it.
+
+
+def sqlite_iso(value):
+    """'YYYY-MM-DD HH:MM:SS[.ffffff]' as stored by SQLite -> datetime.isoformat().
+
+    Matches isoformat() exactly: zero microseconds are dropped.
+    """
+    if value is None:
+        return None
+    time_part = value[11:]
+    if not time_part:
+        return f"{value[:10]}T00:00:00"
+    hms, _, fraction = time_part.partition(".")
+    if fraction.strip("0"):
+        return f"{value[:10]}T{hms}.{fraction[:6].ljust(6, '0')}"
+    return f"{value[:10]}T{hms}"
+
+
+def _raw(column):
+    """Select a DateTime column as its stored text (no result processing)."""
+    return type_coerce(column, db.String).label(column.key)
+
+
+EXPENSE_READ_COLUMNS = [
+    Expense.__table__.c.id,
+    Expense.__table__.c.amount,
+    Expense.category.label("category"),
+    Expense.__table__.c.description,
+    _raw(Expense.__table__.c.date),
+    Expense.__table__.c.source,
+    Expense.__table__.c.external_id,
+    Expense.__table__.c.merchant,
+]
+EXPENSE_ISO_KEYS = ("date",)
+
+RECURRING_READ_COLUMNS = [
+    RecurringExpense.__table__.c.id,
+    RecurringExpense.__table__.c.amount,
+    RecurringExpense.__table__.c.category,
+    RecurringExpense.__table__.c.description,
+    RecurringExpense.__table__.c.frequency,
+    RecurringExpense.__table__.c.day_of_month,
+    _raw(RecurringExpense.__table__.c.start_date),
+    _raw(RecurringExpense.__table__.c.end_date),
+    RecurringExpense.__table__.c.is_active,
+    _raw(RecurringExpense.__table__.c.last_applied_date),
+    _raw(RecurringExpense.__table__.c.next_due_date),
+    _raw(RecurringExpense.__table__.c.created_at),
+]
+RECURRING_ISO_KEYS = (
+    "start_date",
+    "end_date",
+    "last_applied_date",
+    "next_due_date",
+    "created_at",
+)
+
+MERCHANT_READ_COLUMNS = list(MerchantMapping.__table__.c)
+
+
+@timed("serialize")
+def read_dicts(statement, iso_keys=()):
+    """Execute a Core select and return one dict per row, keyed by column
+    name in the same shape as the models' to_dict(). `iso_keys` name the
+    columns selected with _raw() that need reformatting."""
+    result = db.session.execute(statement)
+    keys = list(result.keys())
+    if not iso_keys:
+        return [dict(zip(keys, row)) for row in result]
+    iso_indexes = [keys.index(key) for key in iso_keys]
+    dicts = []
+    for row in result:
+        values = list(row)
+        for i in iso_indexes:
+            values[i] = sqlite_iso(values[i])
+        dicts.append(dict(zip(keys, values)))
+    return dicts
+
+
+# ---------------------------------------------------------------------------
+# Schema migrations
+# ---------------------------------------------------------------------------
+# Applied in order by scripts/database/migrate.py; see services/migrations.py.
+# Append new steps with the next version and never renumber applied ones.
+
+
+def _create_tables(connection):
+    # Missing tables only: a new database gets the whole current schema here
+    # (and the steps below find nothing to do), an older one its new tables
+    db.metadata.create_all(connection)
+
+
+def _add_bank_sync_fields(connection):
+    expense = Expense.__table__
+    migrations.add_column(connection, expense, expense.c.source)
+    migrations.add_column(connection, expense, expense.c.merchant)
+    # ADD COLUMN cannot carry UNIQUE; a unique index enforces it instead
+    if migrations.add_column(connection, expense, expense.c.external_id):
+        connection.exec_driver_sql(
+            "CREATE UNIQUE INDEX IF NOT EXISTS ix_expense_external_id "
+            "ON expense(external_id)"
+        )
+
+
+def _add_recurring_next_due_date(connection):
+    # Left NULL: the midnight recurring job fills it in on its first run
+    recurring = RecurringExpense.__table__
+    migrations.add_column(connection, recurring, recurring.c.next_due_date)
+
+
+def _index_step(table, name):
+    def build(connection):
+        (index,) = [i for i in table.indexes if i.name == name]
+        migrations.create_index(connection, index)
+
+    return build
+
+
+MIGRATIONS = [
+    migrations.Migration(1, "create tables", _create_tables),
+    migrations.Migration(2, "expense bank sync fields", _add_bank_sync_fields),
+    migrations.Migration(
+        3, "recurring_expense.next_due_date", _add_recurring_next_due_date
+    ),
+    migrations.Migration(
+        4,
+        "index recurring_expense.next_due_date",
+        _index_step(RecurringExpense.__table__, "ix_recurring_expense_next_due_date"),
+    ),
+    migrations.Migration(5, "expense category ids", migrate_expense_category_ids),
+    migrations.Migration(
+        6, "index expense.date", _index_step(Expense.__table__, "ix_expense_date")
+    ),
+    migrations.Migration(
+        7,
+        "index expense.category_id, date",
+        _index_step(Expense.__table__, "ix_expense_category_date"),
+    ),
+    migrations.Migration(
+        8,
+        "index expense.source, date",
+        _index_step(Expense.__table__, "ix_expense_source_date"),
+    ),
+    migrations.Migration(9, "expense full-text search", ensure_expense_fts),
+    migrations.Migration(10, "change log triggers", ensure_change_log),
+]
+
+
+def migrate_database():
+    """Apply pending migrations to the current app's database. Returns the
+    versions applied."""
+    return migrations.upgrade(db.engine, MIGRATIONS)
 
 
 # Recurring expense application logic
+def local_today():
+    """Today's local midnight, naive: the day the scheduler applies recurring
+    expenses for. Everything deciding what is due uses it."""
+    return datetime.now().replace(hour=0, minute=0, second=0, microsecond=0)
+
+
+def applied_on(recurring, day):
+    """The expense `recurring` already created on `day` (local midnight), if
+    any. A date range, so it uses the date index and matches SQLite's naive
+    datetime strings."""
+    return Expense.query.filter(
+        Expense.amount == recurring.amount,
+        Expense.category_id == category_lookup.find(recurring.category),
+        Expense.description == recurring.description,
+        Expense.date >= day,
+        Expense.date < day + timedelta(days=1),
+    ).first()
+
+
 def apply_due_recurring_expenses():
     """Apply recurring expenses that are due today."""
-    with app.app_context():
+    with metrics.track_job("apply_recurring") as job:
         try:
-            today = datetime.now().replace(hour=0, minute=0, second=0, microsecond=0)
+            today = local_today()
             logger.info(f"Checking for due recurring expenses on {today.date()}")
 
-            # Query active recurring expenses
-            recurring_expenses = (
-                RecurringExpense.query.filter(
-                    RecurringExpense.is_active.is_(True),
-                    RecurringExpense.start_date <= today,
-                )
-                .filter(
-                    (RecurringExpense.end_date.is_(None))
-                    | (RecurringExpense.end_date >= today)
-                )
-                .all()
-            )
+            recurring_expenses = due_recurring_query(today).all()
 
             applied_count = 0
+            next_day = today + timedelta(days=1)
             for recurring in recurring_expenses:
-                if is_due_today(recurring, today):
-                    # Date-range dedup: reliable with SQLite naive datetime strings
-                    next_day = today + timedelta(days=1)
-                    existing = Expense.query.filter(
-                        Expense.amount == recurring.amount,
-                        Expense.category == recurring.category,
-                        Expense.description == recurring.description,
-                        Expense.date >= today,
-                        Expense.date < next_day,
-                    ).first()
-
-                    if not existing:
-                        # Create new expense
-                        expense = Expense(
-                            amount=recurring.amount,
-                            category=recurring.category,
-                            description=recurring.description,
-                            date=today,
-                        )
-                        db.session.add(expense)
-                        recurring.last_applied_date = today
-                        applied_count += 1
-                        logger.info(f"Applied recurring: {recurring.description}")
-                    else:
-                        logger.info(f"Skipping duplicate: {recurring.description}")
+                if not is_due_today(recurring, today):
+                    # Missed or never-computed due date: roll it forward so the
+                    # row drops out of tomorrow's scan.
+                    recurring.next_due_date = compute_next_due_date(recurring, today)
+                    continue
+
+                if not applied_on(recurring, today):
+                    # Create new expense
+                    expense = Expense(
+                        amount=recurring.amount,
+                        category=recurring.category,
+                        description=recurring.description,
+                        date=today,
+                        source="recurring",
+                    )
+                    db.session.add(expense)
+                    recurring.last_applied_date = today
+                    applied_count += 1
+                    logger.info(f"Applied recurring: {recurring.description}")
+                else:
+                    logger.info(f"Skipping duplicate: {recurring.description}")
+                recurring.next_due_date = compute_next_due_date(recurring, next_day)
 
             db.session.commit()
             logger.info(f"Applied {applied_count} recurring expenses")
@@ -259,6 +834,7 @@ def apply_due_recurring_expenses():
         except Exception as e:
             logger.error(f"Error applying recurring expenses: {e}")
             db.session.rollback()
+            job.outcome = "error"
             return 0
 
 
@@ -301,6 +877,132 @@ def is_due_today(recurring, today):
     return False
 
 
+def _days_in_month(year, month):
+    if month == 12:
+        return 31
+    return (datetime(year, month + 1, 1) - timedelta(days=1)).day
+
+
+def _midnight(value):
+    return value.replace(hour=0, minute=0, second=0, microsecond=0, tzinfo=None)
+
+
+def compute_next_due_date(recurring, today):
+    """Return the first date on or after `today` when `recurring` fires.
+
+    Mirrors is_due_today() so the stored value never skips an occurrence the
+    day-by-day check would have applied. Returns None when the item has no
+    further occurrences (no due day configured or past its end date).
+    """
+    if not recurring.day_of_month:
+        return None
+
+    candidate = _midnight(today)
+    if recurring.start_date is not None:
+        candidate = max(candidate, _midnight(recurring.start_date))
+    last_applied = (
+        _midnight(recurring.last_applied_date) if recurring.last_applied_date else None
+    )
+    day = recurring.day_of_month
+    due = None
+
+    if recurring.frequency == "monthly":
+        year, month = candidate.year, candidate.month
+        # Months without the configured day never fire, so look a few ahead
+        for _ in range(24):
+            if day <= _days_in_month(year, month):
+                option = datetime(year, month, day)
+                applied_this_month = last_applied is not None and (
+                    last_applied.year,
+                    last_applied.month,
+                ) == (year, month)
+                if option >= candidate and not applied_this_month:
+                    due = option
+                    break
+            year, month = (year + 1, 1) if month == 12 else (year, month + 1)
+
+    elif recurring.frequency == "weekly":
+        if 1 <= day <= 7:
+            due = candidate + timedelta(days=(day - candidate.isoweekday()) % 7)
+            while last_applied is not None and (due - last_applied).days < 7:
+                due += timedelta(days=7)
+
+    elif recurring.frequency == "yearly":
+        month = recurring.start_date.month
+        # Feb 29 can be up to eight years away
+        for year in range(candidate.year, candidate.year + 9):
+            if day > _days_in_month(year, month):
+                continue
+            option = datetime(year, month, day)
+            if option >= candidate and (
+                last_applied is None or last_applied.year != year
+            ):
+                due = option
+                break
+
+    if due is not None and recurring.end_date is not None:
+        if due > _midnight(recurring.end_date):
+            return None
+    return due
+
+
+def due_recurring_query(today):
+    """Active recurring expenses whose next_due_date has been reached.
+
+    Rows without a next_due_date (created before the column existed or
+    inserted directly) are included so the scheduler can backfill them.
+    """
+    return RecurringExpense.query.filter(
+        RecurringExpense.is_active.is_(True),
+        RecurringExpense.start_date <= today,
+        (RecurringExpense.next_due_date.is_(None))
+        | (RecurringExpense.next_due_date <= today),
+    ).filter(
+        (RecurringExpense.end_date.is_(None)) | (RecurringExpense.end_date >= today)
+    )
+
+
+def forecast_recurring(recurring_expenses, today, months):
+    """Project recurring expenses over the next `months` calendar months.
+
+    Starts at the current month (occurrences before `today` or already applied
+    are not counted) and walks each item's occurrences via
+    compute_next_due_date, so end dates and short months are honoured the
+    same way the scheduler honours them.
+    """
+    today = _midnight(today)
+    buckets = []
+    year, month = today.year, today.month
+    for _ in range(months):
+        buckets.append({"year": year, "month": month, "total": 0.0, "categories": {}})
+        year, month = (year + 1, 1) if month == 12 else (year, month + 1)
+    horizon_end = datetime(year, month, 1)
+    index = {(b["year"], b["month"]): b for b in buckets}
+
+    category_totals = {}
+    for recurring in recurring_expenses:
+        due = compute_next_due_date(recurring, today)
+        while due is not None and due < horizon_end:
+            bucket = index[(due.year, due.month)]
+            bucket["total"] += recurring.amount
+            cats = bucket["categories"]
+            cats[recurring.category] = cats.get(recurring.category, 0.0) + (
+                recurring.amount
+            )
+            category_totals[recurring.category] = (
+                category_totals.get(recurring.category, 0.0) + recurring.amount
+            )
+            due = compute_next_due_date(recurring, due + timedelta(days=1))
+
+    for bucket in buckets:
+        bucket["label"] = f"{bucket['month']:02d}/{str(bucket['year'])[-2:]}"
+    return {
+        "months": buckets,
+        "categories": category_totals,
+        "total": sum(b["total"] for b in buckets),
+    }
+
+
 # ---------------------------------------------------------------------------
 # Auth helpers
 # ---------------------------------------------------------------------------
@@ -327,23 +1029,72 @@ def require_internal_key(f):
 # ---------------------------------------------------------------------------
 
 
-def _run_bank_sync():
-    """Wrapper so APScheduler can call bank_sync without import-time circular deps."""
-    try:
-        from services.bank_sync import sync_transactions
+# APScheduler only decides when; the work itself goes through the durable job
+# queue, so a run that was due survives a restart and a scheduled run joins a
+# manual one already queued (same dedupe key).
 
-        sync_transactions()
-    except Exception as e:
-        logger.error(f"Scheduler bank_sync error: {e}", exc_info=True)
 
+def _bank_sync_job(job):
+    # This module's models, whatever it runs as (`__main__` under python app.py)
+    models = SimpleNamespace(
+        AppToken=AppToken,
+        SyncLog=SyncLog,
+        Expense=Expense,
+        MerchantMapping=MerchantMapping,
+    )
+    result = bank_sync.sync_transactions(db, models, progress=job.update)
+    if result["status"] == "error":
+        # Raising lets the queue retry with backoff
+        raise RuntimeError(result["error"])
+    return result
 
-scheduler = BackgroundScheduler()
-scheduler.add_job(
-    apply_due_recurring_expenses, "cron", hour=0, minute=0, id="apply_recurring"
-)
-scheduler.add_job(_run_bank_sync, "interval", hours=6, id="bank_sync")
-scheduler.start()
-logger.info("Scheduler started (recurring @ midnight, bank_sync every 6h)")
+
+def _apply_recurring_job(job):
+    return {"applied": apply_due_recurring_expenses()}
+
+
+def _backup_job(job):
+    with metrics.track_job("backup"):
+        try:
+            result = run(
+                ["python3", "scripts/database/export_csv.py"],
+                cwd=current_dir,
+                capture_output=True,
+                text=True,
+                check=True,
+            )
+        except CalledProcessError as e:
+            raise RuntimeError(e.stderr.strip() or str(e)) from e
+    return {"message": result.stdout.strip()}
+
+
+def _enqueue_job(kind):
+    """Queue `kind` unless it is already queued or running (one at a time)."""
+    return job_queue.enqueue(kind, dedupe_key=kind)
+
+
+def start_scheduler(app):
+    """Run the recurring (midnight) and bank sync (6-hourly) schedules."""
+    from apscheduler.schedulers.background import BackgroundScheduler
+
+    def enqueue(kind):
+        with app.app_context():
+            _enqueue_job(kind)
+
+    scheduler = BackgroundScheduler()
+    scheduler.add_job(
+        enqueue,
+        "cron",
+        hour=0,
+        minute=0,
+        args=["apply_recurring"],
+        id="apply_recurring",
+    )
+    scheduler.add_job(enqueue, "interval", hours=6, args=["bank_sync"], id="bank_sync")
+    scheduler.start()
+    app.extensions["scheduler"] = scheduler
+    logger.info("Scheduler started (recurring @ midnight, bank_sync every 6h)")
+    return scheduler
 
 
 # ---------------------------------------------------------------------------
@@ -351,20 +1102,23 @@ logger.info("Scheduler started (recurring @ midnight, bank_sync every 6h)")
 # ---------------------------------------------------------------------------
 
 
-@app.after_request
+@bp.after_app_request
 def add_header(response):
-    # Cache static assets for 1 day, but disable caching for API responses
-    if request.path.startswith("/static"):
-        response.headers["Cache-Control"] = "public, max-age=86400"
-        response.headers["Expires"] = (
-            datetime.now(timezone.utc).replace(microsecond=0)
-        ).strftime("%a, %d %b %Y %H:%M:%S GMT")
-    else:
+    # Static files, pages and API responses with an ETag set their own
+    # caching (fingerprinted assets are immutable, the rest revalidate); other
+    # API responses are never cached
+    if not (
+        request.path.startswith("/static")
+        or response.mimetype == "text/html"
+        or "ETag" in response.headers
+    ):
         response.headers["Cache-Control"] = (
             "no-store, no-cache, must-revalidate, max-age=0"
         )
         response.headers["Pragma"] = "no-cache"
         response.headers["Expires"] = "0"
+    # Static files and API payloads may be sent br/gzip-encoded
+    response.vary.add("Accept-Encoding")
     return response
 
 
@@ -373,26 +1127,20 @@ def is_test_environment():
     return (
         os.environ.get("FLASK_ENV") == "development"
         or os.environ.get("FLASK_DEBUG") == "1"
-        or app.debug
+        or current_app.debug
     )
 
 
-def _get_git_version():
+@functools.lru_cache(maxsize=1)
+def app_version():
+    """Deployed commit, from the VERSION file written at build time (or the
+    APP_VERSION environment variable)."""
     try:
-        result = run(
-            ["git", "rev-parse", "--short", "HEAD"],
-            capture_output=True,
-            text=True,
-            cwd=current_dir,
-        )
-        if result.returncode == 0:
-            return result.stdout.strip()
-    except Exception:
-        pass
-    return "unknown"
-
-
-APP_VERSION = _get_git_version()
+        with open(VERSION_FILE) as f:
+            version = f.read().strip()
+    except OSError:
+        version = ""
+    return version or os.environ.get("APP_VERSION", "unknown")
 
 
 # ---------------------------------------------------------------------------
@@ -400,44 +1148,94 @@ APP_VERSION = _get_git_version()
 # ---------------------------------------------------------------------------
 
 
-@app.route("/api/env")
+@bp.route("/api/env")
 def get_environment():
     """Return environment info for frontend (e.g., navbar badge)."""
-    return jsonify({"is_test": is_test_environment(), "version": APP_VERSION})
+    return jsonify({"is_test": is_test_environment(), "version": app_version()})
+
+
+def _database_file_sizes(app):
+    """Sizes of the SQLite database file and its WAL, for the metrics gauge."""
+    with app.app_context():
+        path = db.engine.url.database
+    sizes = {}
+    if path and path != ":memory:":
+        for kind, suffix in (("main", ""), ("wal", "-wal")):
+            try:
+                sizes[(kind,)] = os.path.getsize(path + suffix)
+            except OSError:
+                sizes[(kind,)] = 0
+    return sizes
+
+
+@bp.route("/metrics")
+def get_metrics():
+    """Prometheus text exposition of the in-process metrics."""
+    return metrics.REGISTRY.render(), 200, {"Content-Type": metrics.CONTENT_TYPE}
+
+
+@bp.route("/api/debug/slow-queries", methods=["GET", "DELETE"])
+@require_internal_key
+def handle_slow_queries():
+    """Slow statements captured by the SQL profiler (SLOW_QUERY_MS)."""
+    log = current_app.extensions[sql_profiler.EXTENSION_KEY]
+    if request.method == "DELETE":
+        log.clear()
+        return "", 204
+
+    try:
+        limit = int(request.args.get("limit", 50))
+    except ValueError:
+        return jsonify({"error": "Invalid limit value"}), 400
+    return jsonify(
+        {
+            "threshold_ms": current_app.config.get("SLOW_QUERY_MS"),
+            "capacity": log.entries.maxlen,
+            "statements": log.statements(),
+            "recent": log.recent(max(limit, 0)),
+        }
+    )
+
+
+@bp.route("/api/debug/expense-cache", methods=["GET"])
+@require_internal_key
+def get_expense_cache():
+    """Size and freshness of the in-memory expense cache (EXPENSE_CACHE)."""
+    return jsonify(expense_cache.footprint())
 
 
-@app.route("/")
+@bp.route("/")
 def serve_index():
-    return send_from_directory("static", "index.html")
+    return serve_page(current_app, "index.html")
 
 
-@app.route("/add")
+@bp.route("/add")
 def serve_add():
-    return send_from_directory("static", "add-expense.html")
+    return serve_page(current_app, "add-expense.html")
 
 
-@app.route("/expenses")
+@bp.route("/expenses")
 def serve_expenses():
-    return send_from_directory("static", "expenses.html")
+    return serve_page(current_app, "expenses.html")
 
 
-@app.route("/recurring")
+@bp.route("/recurring")
 def serve_recurring():
-    return send_from_directory("static", "recurring.html")
+    return serve_page(current_app, "recurring.html")
 
 
-@app.route("/bank")
+@bp.route("/bank")
 def serve_bank():
     # return send_from_directory("static", "bank.html")
     return "Bank Sync is currently disabled", 404
 
 
-@app.route("/trends")
+@bp.route("/trends")
 def serve_trends():
-    return send_from_directory("static", "trends.html")
+    return serve_page(current_app, "trends.html")
 
 
-@app.route("/styles.css")
+@bp.route("/styles.css")
 def serve_css():
     return send_from_directory("static", "styles.css", mimetype="text/css")
 
@@ -447,7 +1245,19 @@ def serve_css():
 # ---------------------------------------------------------------------------
 
 
-@app.route("/api/expenses", methods=["GET", "POST"])
+def month_bounds(year, month):
+    """Half-open [start, end) datetime range covering a calendar month.
+
+    Range filters let SQLite use the date indexes; extract() cannot.
+    """
+    year += (month - 1) // 12
+    month = (month - 1) % 12 + 1
+    start = datetime(year, month, 1)
+    end = datetime(year + 1, 1, 1) if month == 12 else datetime(year, month + 1, 1)
+    return start, end
+
+
+@bp.route("/api/expenses", methods=["GET", "POST"])
 def handle_expenses():
     if request.method == "POST":
         try:
@@ -507,24 +1317,29 @@ def handle_expenses():
         page = request.args.get("page")
         per_page = request.args.get("per_page")
 
-        query = (
-            Expense.query.filter(extract("year", Expense.date) == year)
-            .filter(extract("month", Expense.date) == month)
-            .order_by(Expense.date.desc())
+        start, end = month_bounds(year, month)
+        in_month = (Expense.date >= start, Expense.date < end)
+        statement = (
+            select(*EXPENSE_READ_COLUMNS).where(*in_month).order_by(Expense.date.desc())
         )
 
         if page and per_page:
             page = int(page)
             per_page = int(per_page)
-            total = query.count()
-            expenses = query.offset((page - 1) * per_page).limit(per_page).all()
+            total = db.session.execute(
+                select(func.count()).select_from(Expense).where(*in_month)
+            ).scalar()
+            expenses = read_dicts(
+                statement.offset((page - 1) * per_page).limit(per_page),
+                EXPENSE_ISO_KEYS,
+            )
         else:
-            expenses = query.all()
+            expenses = read_dicts(statement, EXPENSE_ISO_KEYS)
             total = len(expenses)
 
         return jsonify(
             {
-                "expenses": [expense.to_dict() for expense in expenses],
+                "expenses": expenses,
                 "month": month,
                 "year": year,
                 "page": int(page) if page else None,
@@ -537,66 +1352,315 @@ def handle_expenses():
         return jsonify({"error": "Server error fetching expenses"}), 500
 
 
-@app.route("/api/expenses/unclassified", methods=["GET"])
+def _fts_match_query(raw):
+    """Turn free text into an FTS5 query: every word must prefix-match."""
+    terms = [t.replace('"', "") for t in raw.split()]
+    return " ".join(f'"{t}"*' for t in terms if t)
+
+
+def _encode_cursor(values):
+    return base64.urlsafe_b64encode(json.dumps(values).encode()).decode()
+
+
+def _decode_cursor(cursor, size=2):
+    try:
+        values = json.loads(base64.urlsafe_b64decode(cursor.encode()))
+    except (ValueError, TypeError) as exc:
+        raise ValueError("Invalid cursor") from exc
+    if not isinstance(values, list) or len(values) != size:
+        raise ValueError("Invalid cursor")
+    return values
+
+
+@bp.route("/api/expenses/search", methods=["GET"])
+def search_expenses():
+    """Ranked full-text search over description and merchant.
+
+    Query params: q (required), from/to (YYYY-MM-DD, inclusive), category,
+    limit (default 20, max 100) and cursor (from a previous next_cursor).
+    Results are in bm25 rank order across all pages; the cursor pins the
+    expenses the first page saw (services/search.py).
+    """
+    match = _fts_match_query(request.args.get("q", ""))
+    if not match:
+        return jsonify({"error": "q parameter is required"}), 400
+
+    try:
+        limit = min(max(int(request.args.get("limit", 20)), 1), 100)
+        date_from = parse_expense_date(request.args.get("from"))
+        date_to = parse_expense_date(request.args.get("to"))
+        cursor = request.args.get("cursor")
+        after = _decode_cursor(cursor, 3) if cursor else None
+        if after is not None and not all(isinstance(v, int) and v >= 0 for v in after):
+            raise ValueError("Invalid cursor")
+    except ValueError as exc:
+        return jsonify({"error": str(exc)}), 400
+
+    try:
+        # The expenses as of the first page: the newest change_log seq names
+        # the snapshot (never reused; a rowid lookup), the highest id bounds
+        # its rows
+        if after is None:
+            version = db.session.execute(select(func.max(ChangeLog.seq))).scalar() or 0
+            max_id = db.session.execute(select(func.max(Expense.id))).scalar() or 0
+            position = 0
+        else:
+            version, max_id, position = after
+        conditions = ["expense_fts MATCH :match", "expense_fts.rowid <= :max_id"]
+        params = {"match": match, "max_id": max_id}
+        if date_from is not None:
+            conditions.append("e.date >= :date_from")
+            params["date_from"] = date_from.replace(tzinfo=None)
+        if date_to is not None:
+            conditions.append("e.date < :date_to")
+            params["date_to"] = date_to.replace(tzinfo=None) + timedelta(days=1)
+        if request.args.get("category"):
+            conditions.append("e.category_id = :category_id")
+            params["category_id"] = category_lookup.find(request.args["category"])
+
+        filtered = len(conditions) > 2
+        key = (version, *sorted(params.items()))
+        ranked = ranked_searches.get(key)
+        if ranked is None:
+            ranked = ranked_searches.put(
+                key,
+                db.session.execute(
+                    text(
+                        "SELECT expense_fts.rowid FROM expense_fts "
+                        # Only filters need the expense row
+                        + ("JOIN expense e ON e.id = expense_fts.rowid " * filtered)
+                        + f"WHERE {' AND '.join(conditions)} "
+                        "ORDER BY expense_fts.rank, expense_fts.rowid DESC"
+                    ),
+                    params,
+                ).scalars(),
+            )
+
+        page = ranked[position : position + limit]
+        by_id = {e.id: e for e in Expense.query.filter(Expense.id.in_(page))}
+        next_cursor = None
+        if position + limit < len(ranked):
+            next_cursor = _encode_cursor([version, max_id, position + limit])
+
+        return jsonify(
+            {
+                # Rows deleted since the search was ranked are left out
+                "expenses": [by_id[i].to_dict() for i in page if i in by_id],
+                "next_cursor": next_cursor,
+            }
+        )
+    except Exception as e:
+        logger.error(f"Error searching expenses: {e}")
+        return jsonify({"error": "Server error searching expenses"}), 500
+
+
+EXPENSE_SOURCES = ("manual", "bank_sync", "recurring")
+EXPENSE_SORTS = {
+    "date": Expense.date,
+    "amount": Expense.amount,
+}
+
+
+def _multi_arg(name):
+    """Read a repeatable query param, also accepting comma-separated values."""
+    values = []
+    for raw in request.args.getlist(name):
+        values.extend(v.strip() for v in raw.split(",") if v.strip())
+    return values
+
+
+def _optional_float(name):
+    raw = request.args.get(name)
+    if raw in (None, ""):
+        return None
+    try:
+        return float(raw)
+    except ValueError as exc:
+        raise ValueError(f"Invalid {name} value") from exc
+
+
+@bp.route("/api/expenses/query", methods=["GET"])
+def query_expenses():
+    """Filtered, sorted and cursor-paginated expense listing.
+
+    Query params: from/to (YYYY-MM-DD, inclusive), category and source
+    (repeatable or comma-separated), min_amount/max_amount, merchant
+    (case-insensitive substring), sort (date, -date, amount, -amount;
+    default -date), limit (default 50, max 500) and cursor.
+    """
+    try:
+        date_from = parse_expense_date(request.args.get("from"))
+        date_to = parse_expense_date(request.args.get("to"))
+        min_amount = _optional_float("min_amount")
+        max_amount = _optional_float("max_amount")
+        limit = min(max(int(request.args.get("limit", 50)), 1), 500)
+        cursor = request.args.get("cursor")
+        after = _decode_cursor(cursor) if cursor else None
+    except ValueError as exc:
+        return jsonify({"error": str(exc)}), 400
+
+    categories = _multi_arg("category")
+    sources = _multi_arg("source")
+    invalid = [s for s in sources if s not in EXPENSE_SOURCES]
+    if invalid:
+        return jsonify({"error": f"Invalid source: {', '.join(invalid)}"}), 400
+
+    sort = request.args.get("sort", "-date")
+    descending = sort.startswith("-")
+    sort_column = EXPENSE_SORTS.get(sort.lstrip("-"))
+    if sort_column is None:
+        return jsonify({"error": "Invalid sort value"}), 400
+
+    try:
+        query = Expense.query
+        if date_from is not None:
+            query = query.filter(Expense.date >= date_from.replace(tzinfo=None))
+        if date_to is not None:
+            end = date_to.replace(tzinfo=None) + timedelta(days=1)
+            query = query.filter(Expense.date < end)
+        if categories:
+            query = query.filter(
+                Expense.category_id.in_([category_lookup.find(c) for c in categories])
+            )
+        if sources:
+            query = query.filter(Expense.source.in_(sources))
+        if min_amount is not None:
+            query = query.filter(Expense.amount >= min_amount)
+        if max_amount is not None:
+            query = query.filter(Expense.amount <= max_amount)
+        if request.args.get("merchant"):
+            query = query.filter(
+                Expense.merchant.ilike(f"%{request.args['merchant']}%")
+            )
+
+        if after is not None:
+            value, after_id = after
+            if sort_column is Expense.date:
+                try:
+                    value = datetime.fromisoformat(value)
+                except (TypeError, ValueError):
+                    return jsonify({"error": "Invalid cursor"}), 400
+            if descending:
+                query = query.filter(
+                    (sort_column < value)
+                    | ((sort_column == value) & (Expense.id < after_id))
+                )
+            else:
+                query = query.filter(
+                    (sort_column > value)
+                    | ((sort_column == value) & (Expense.id > after_id))
+                )
+
+        if descending:
+            query = query.order_by(sort_column.desc(), Expense.id.desc())
+        else:
+            query = query.order_by(sort_column.asc(), Expense.id.asc())
+
+        rows = query.limit(limit + 1).all()
+        page = rows[:limit]
+        next_cursor = None
+        if len(rows) > limit:
+            last = page[-1]
+            value = (
+                last.date.isoformat() if sort_column is Expense.date else last.amount
+            )
+            next_cursor = _encode_cursor([value, last.id])
+
+        return jsonify(
+            {"expenses": [e.to_dict() for e in page], "next_cursor": next_cursor}
+        )
+    except Exception as e:
+        logger.error(f"Error querying expenses: {e}")
+        return jsonify({"error": "Server error querying expenses"}), 500
+
+
+@bp.route("/api/expenses/unclassified", methods=["GET"])
 def get_unclassified_expenses():
     """Expenses imported from bank sync that could not be mapped to a category."""
     try:
-        expenses = (
-            Expense.query.filter_by(source="bank_sync", category="other")
+        statement = (
+            select(*EXPENSE_READ_COLUMNS)
+            .where(
+                Expense.source == "bank_sync",
+                Expense.category_id == category_lookup.find("other"),
+            )
             .order_by(Expense.date.desc())
-            .all()
         )
-        return jsonify({"expenses": [e.to_dict() for e in expenses]})
+        return jsonify({"expenses": read_dicts(statement, EXPENSE_ISO_KEYS)})
     except Exception as e:
         logger.error(f"Error fetching unclassified expenses: {e}")
         return jsonify({"error": "Server error"}), 500
 
 
 # Application Configuration
-CATEGORIES = {
-    "super": {"label": "Super", "color": "#3b82f6", "icon": "shopping_cart"},
-    "xofa": {"label": "Xofa", "color": "#8b5cf6", "icon": "home"},
-    "food_drink": {"label": "Food & Drink", "color": "#10b981", "icon": "restaurant"},
-    "save_inv": {"label": "Save & Invest", "color": "#06b6d4", "icon": "savings"},
-    "recurrent": {"label": "Recurrent", "color": "#f59e0b", "icon": "repeat"},
-    "clothing": {"label": "Clothing", "color": "#ec4899", "icon": "checkroom"},
-    "personal": {"label": "Personal", "color": "#a855f7", "icon": "person"},
-    "taxes": {"label": "Taxes", "color": "#ef4444", "icon": "receipt_long"},
-    "transport": {"label": "Transport", "color": "#6366f1", "icon": "directions_car"},
-    "car": {"label": "Car", "color": "#64748b", "icon": "directions_car"},
-    "health": {"label": "Health", "color": "#14b8a6", "icon": "favorite"},
-    "cobeetrans": {
-        "label": "Cobee Trans",
-        "color": "#7c3aed",
-        "icon": "directions_bus",
-    },
-    "cobeefood": {"label": "Cobee Food", "color": "#f97316", "icon": "local_cafe"},
-    "other": {"label": "Other", "color": "#94a3b8", "icon": "more_horiz"},
-}
-
-
-@app.route("/api/categories", methods=["GET"])
+@bp.route("/api/categories", methods=["GET"])
 def get_categories():
-    """Return all available expense categories and their metadata."""
-    return jsonify(CATEGORIES)
+    """All expense categories and their metadata, keyed by category key.
 
+    Served with an ETag over the content, so clients revalidate cheaply.
+    """
+    body, etag = category_lookup.listing()
+    response = jsonify(body)
+    response.set_etag(etag)
+    response.headers["Cache-Control"] = "no-cache"
+    return response.make_conditional(request)
+
+
+@bp.route("/api/categories/<key>", methods=["PUT"])
+def put_category(key):
+    """Create or edit a category: label, color, icon and position."""
+    data = request.get_json(silent=True) or {}
+    fields = {
+        field: data[field]
+        for field in ("label", "color", "icon", "position")
+        if field in data
+    }
+    if "position" in fields and not isinstance(fields["position"], int):
+        return jsonify({"error": "position must be an integer"}), 400
+    for field in ("label", "color", "icon"):
+        if field in fields:
+            if not isinstance(fields[field], str) or not fields[field].strip():
+                return jsonify({"error": f"{field} must be a non-empty string"}), 400
+            fields[field] = fields[field].strip()
+
+    category = Category.query.filter_by(key=key).first()
+    created = category is None
+    if created:
+        category = Category(**{**new_category(key, Category.query.count()), **fields})
+        db.session.add(category)
+    else:
+        for field, value in fields.items():
+            setattr(category, field, value)
+    db.session.commit()
+    category_lookup.clear()
+    body, _ = category_lookup.listing()
+    return jsonify({key: body[key]}), 201 if created else 200
 
-@app.route("/api/trends", methods=["GET"])
+
+@bp.route("/api/trends", methods=["GET"])
 def get_trends():
     try:
         import calendar
-        from sqlalchemy import func
 
         now = datetime.now()
 
-        def period_data(start, end, include_top=False):
-            cat_rows = (
-                db.session.query(Expense.category, func.sum(Expense.amount))
-                .filter(Expense.date >= start, Expense.date <= end)
-                .group_by(Expense.category)
-                .all()
-            )
-            categories = {cat: float(total) for cat, total in cat_rows}
+        def period_data(first_day, last_day, include_top=False):
+            start = first_day.strftime("%Y-%m-%d 00:00:00")
+            end = last_day.strftime("%Y-%m-%d 23:59:59")
+            if expense_cache.enabled:
+                categories = expense_cache.category_totals(
+                    first_day.toordinal(), last_day.toordinal()
+                )
+            else:
+                cat_rows = (
+                    db.session.query(Expense.category_id, func.sum(Expense.amount))
+                    .filter(Expense.date >= start, Expense.date <= end)
+                    .group_by(Expense.category_id)
+                    .all()
+                )
+                categories = {
+                    category_lookup.key(cat): float(total) for cat, total in cat_rows
+                }
             total = sum(categories.values())
             result = {"total": total, "categories": categories}
             if include_top:
@@ -627,9 +1691,11 @@ def get_trends():
                 target_year -= 1
             label = f"{target_month:02d}/{str(target_year)[-2:]}"
             last_day = calendar.monthrange(target_year, target_month)[1]
-            start_str = f"{target_year}-{target_month:02d}-01 00:00:00"
-            end_str = f"{target_year}-{target_month:02d}-{last_day:02d} 23:59:59"
-            data = period_data(start_str, end_str, include_top=(i == 0))
+            data = period_data(
+                date(target_year, target_month, 1),
+                date(target_year, target_month, last_day),
+                include_top=(i == 0),
+            )
             monthly_data.insert(0, {"label": label, **data})
 
         weekly_data = []
@@ -637,9 +1703,7 @@ def get_trends():
         for i in range(4):
             end_date = now - timedelta(days=i * 7)
             start_date = end_date - timedelta(days=6)
-            start_str = start_date.strftime("%Y-%m-%d 00:00:00")
-            end_str = end_date.strftime("%Y-%m-%d 23:59:59")
-            data = period_data(start_str, end_str, include_top=(i == 0))
+            data = period_data(start_date, end_date, include_top=(i == 0))
             weekly_data.insert(0, {"label": labels[i], **data})
 
         return jsonify({"weekly": weekly_data, "monthly": monthly_data})
@@ -648,7 +1712,49 @@ def get_trends():
         return jsonify({"error": "Server error fetching trends"}), 500
 
 
-@app.route("/api/months", methods=["GET"])
+ANALYTICS_MAX_DAYS = 366 * 20
+
+
+@bp.route("/api/analytics", methods=["GET"])
+def get_analytics():
+    """Per-month totals, percentiles and year-over-year change, per-category
+    rolling 30/90-day averages and a month-end projection.
+
+    Query params: from/to (YYYY-MM-DD, inclusive; default the twelve
+    calendar months up to today). All rows, including the year before `from`
+    used for year-over-year, are read in one query (or one slice of the
+    expense cache); see services/analytics.
+    """
+    try:
+        date_from = parse_expense_date(request.args.get("from"))
+        date_to = parse_expense_date(request.args.get("to"))
+    except ValueError as exc:
+        return jsonify({"error": str(exc)}), 400
+    default_from, default_to = analytics.default_range()
+    start = date_from.date() if date_from else default_from
+    end = date_to.date() if date_to else default_to
+    if start > end:
+        return jsonify({"error": "'from' must not be after 'to'"}), 400
+    if (end - start).days > ANALYTICS_MAX_DAYS:
+        return jsonify({"error": "Date range too large"}), 400
+
+    if expense_cache.enabled:
+        rows = expense_cache.rows(
+            analytics.load_from(start).toordinal(), end.toordinal()
+        )
+    else:
+        rows = db.session.execute(
+            select(day_ordinal(Expense.date), Category.key, Expense.amount)
+            .join_from(Expense, Category)
+            .where(
+                Expense.date >= datetime.combine(analytics.load_from(start), time.min),
+                Expense.date < datetime.combine(end + timedelta(days=1), time.min),
+            )
+        ).all()
+    return jsonify(analytics.summarise(rows, start, end))
+
+
+@bp.route("/api/months", methods=["GET"])
 def get_months():
     try:
         results = (
@@ -667,7 +1773,7 @@ def get_months():
         return jsonify({"error": "Server error fetching months"}), 500
 
 
-@app.route("/api/expenses/<int:expense_id>", methods=["DELETE"])
+@bp.route("/api/expenses/<int:expense_id>", methods=["DELETE"])
 def delete_expense(expense_id):
     try:
         expense = Expense.query.get_or_404(expense_id)
@@ -681,7 +1787,7 @@ def delete_expense(expense_id):
         return jsonify({"error": "Server error deleting expense"}), 500
 
 
-@app.route("/api/expenses/<int:expense_id>", methods=["PUT"])
+@bp.route("/api/expenses/<int:expense_id>", methods=["PUT"])
 def update_expense(expense_id):
     try:
         expense = Expense.query.get_or_404(expense_id)
@@ -735,21 +1841,14 @@ def update_expense(expense_id):
 # ---------------------------------------------------------------------------
 
 
-@app.route("/api/backup", methods=["POST"])
+@bp.route("/api/backup", methods=["POST"])
 def backup_database():
-    try:
-        result = run(
-            ["python3", "scripts/database/export_csv.py"],
-            capture_output=True,
-            text=True,
-            check=True,
-        )
-        return jsonify({"success": True, "message": result.stdout.strip()}), 200
-    except CalledProcessError as e:
-        return jsonify({"success": False, "error": e.stderr.strip() or str(e)}), 500
+    """Queue a CSV export; poll the returned job's Location for the result."""
+    job, _ = _enqueue_job("backup")
+    return _job_accepted(job)
 
 
-@app.route("/api/backup/download", methods=["GET"])
+@bp.route("/api/backup/download", methods=["GET"])
 def download_backup():
     try:
         current_dir = os.path.dirname(os.path.abspath(__file__))
@@ -784,7 +1883,7 @@ def download_backup():
 
 
 # Recurring expense API endpoints
-@app.route("/api/recurring", methods=["GET", "POST"])
+@bp.route("/api/recurring", methods=["GET", "POST"])
 def handle_recurring_expenses():
     if request.method == "POST":
         try:
@@ -846,6 +1945,7 @@ def handle_recurring_expenses():
                 end_date=end_date,
                 is_active=data.get("is_active", True),
             )
+            recurring.next_due_date = compute_next_due_date(recurring, datetime.now())
 
             db.session.add(recurring)
             db.session.commit()
@@ -861,18 +1961,18 @@ def handle_recurring_expenses():
 
     # GET request
     try:
-        recurring_expenses = RecurringExpense.query.order_by(
+        statement = select(*RECURRING_READ_COLUMNS).order_by(
             RecurringExpense.created_at.desc()
-        ).all()
+        )
         return jsonify(
-            {"recurring_expenses": [r.to_dict() for r in recurring_expenses]}
+            {"recurring_expenses": read_dicts(statement, RECURRING_ISO_KEYS)}
         )
     except Exception as e:
         logger.error(f"Error fetching recurring expenses: {e}")
         return jsonify({"error": "Server error fetching recurring expenses"}), 500
 
 
-@app.route("/api/recurring/<int:recurring_id>", methods=["GET", "PUT", "DELETE"])
+@bp.route("/api/recurring/<int:recurring_id>", methods=["GET", "PUT", "DELETE"])
 def handle_recurring_expense(recurring_id):
     try:
         recurring = RecurringExpense.query.get_or_404(recurring_id)
@@ -934,6 +2034,7 @@ def handle_recurring_expense(recurring_id):
             if "is_active" in data:
                 recurring.is_active = bool(data["is_active"])
 
+            recurring.next_due_date = compute_next_due_date(recurring, datetime.now())
             db.session.commit()
             logger.info(f"Updated recurring expense {recurring_id}")
             return jsonify(recurring.to_dict())
@@ -944,52 +2045,26 @@ def handle_recurring_expense(recurring_id):
         return jsonify({"error": "Server error"}), 500
 
 
-@app.route("/api/recurring/apply", methods=["POST"])
+@bp.route("/api/recurring/apply", methods=["POST"])
 def manually_apply_recurring():
-    """Manually trigger application of due recurring expenses."""
-    try:
-        count = apply_due_recurring_expenses()
-        return jsonify({"success": True, "applied": count})
-    except Exception as e:
-        logger.error(f"Error manually applying recurring expenses: {e}")
-        return jsonify({"success": False, "error": str(e)}), 500
+    """Queue application of due recurring expenses; the job's result has
+    the number applied."""
+    job, _ = _enqueue_job("apply_recurring")
+    return _job_accepted(job)
 
 
-@app.route("/api/recurring/pending", methods=["GET"])
+@bp.route("/api/recurring/pending", methods=["GET"])
 def get_pending_recurring():
     """Preview which recurring expenses would be applied today."""
     try:
-        today = datetime.now(timezone.utc).replace(
-            hour=0, minute=0, second=0, microsecond=0
-        )
+        today = local_today()
 
-        recurring_expenses = (
-            RecurringExpense.query.filter(
-                RecurringExpense.is_active.is_(True),
-                RecurringExpense.start_date <= today,
-            )
-            .filter(
-                (RecurringExpense.end_date.is_(None))
-                | (RecurringExpense.end_date >= today)
-            )
-            .all()
-        )
+        recurring_expenses = due_recurring_query(today).all()
 
         pending = []
         for recurring in recurring_expenses:
-            if is_due_today(recurring, today):
-                # Check for duplicate
-                existing = Expense.query.filter(
-                    Expense.amount == recurring.amount,
-                    Expense.category == recurring.category,
-                    Expense.description == recurring.description,
-                    extract("year", Expense.date) == today.year,
-                    extract("month", Expense.date) == today.month,
-                    extract("day", Expense.date) == today.day,
-                ).first()
-
-                if not existing:
-                    pending.append(recurring.to_dict())
+            if is_due_today(recurring, today) and not applied_on(recurring, today):
+                pending.append(recurring.to_dict())
 
         return jsonify({"pending": pending})
     except Exception as e:
@@ -997,12 +2072,65 @@ def get_pending_recurring():
         return jsonify({"error": "Server error"}), 500
 
 
+class ForecastCache:
+    """One app's forecast results by horizon, for a single version: (last
+    recurring_expense change, day). A result for another version is dropped
+    with the rest. Shared by request threads, hence the lock."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._version = None
+        self._results = {}
+
+    def get(self, version, months):
+        with self._lock:
+            if version != self._version:
+                return None
+            return self._results.get(months)
+
+    def put(self, version, months, result):
+        with self._lock:
+            if version != self._version:
+                self._version, self._results = version, {}
+            self._results[months] = result
+
+
+forecast_cache = _extension("forecast_cache")
+
+
+@bp.route("/api/recurring/forecast", methods=["GET"])
+def get_recurring_forecast():
+    """Projected recurring spend per month and per category."""
+    try:
+        months = int(request.args.get("months", 12))
+    except ValueError:
+        return jsonify({"error": "Invalid months value"}), 400
+    if not 1 <= months <= 60:
+        return jsonify({"error": "months must be between 1 and 60"}), 400
+
+    try:
+        today = local_today()
+        version = (last_change_seq("recurring_expense"), today)
+        result = forecast_cache.get(version, months)
+        metrics.record_cache("recurring_forecast", result is not None)
+        if result is None:
+            recurring_expenses = RecurringExpense.query.filter(
+                RecurringExpense.is_active.is_(True)
+            ).all()
+            result = forecast_recurring(recurring_expenses, today, months)
+            forecast_cache.put(version, months, result)
+        return jsonify({**result, "horizon_months": months})
+    except Exception as e:
+        logger.error(f"Error building recurring forecast: {e}")
+        return jsonify({"error": "Server error"}), 500
+
+
 # ---------------------------------------------------------------------------
 # Bank OAuth + sync API
 # ---------------------------------------------------------------------------
 
 
-@app.route("/api/bank/auth-url", methods=["GET"])
+@bp.route("/api/bank/auth-url", methods=["GET"])
 def bank_auth_url():
     """Generate and return the Enable Banking OAuth authorization URL."""
     try:
@@ -1015,7 +2143,8 @@ def bank_auth_url():
         return jsonify({"error": str(e)}), 500
 
 
-@app.route("/api/bank/callback", methods=["GET", "POST"])
+@bp.route("/api/bank/callback", methods=["GET", "POST"])
+@writes_on_get
 def bank_callback():
     """Receive OAuth code — either direct GET (VPS/sandbox) or POST relay (Pi/prod)."""
     if request.method == "POST":
@@ -1058,21 +2187,27 @@ def bank_callback():
         return jsonify({"error": str(e)}), 500
 
 
-@app.route("/api/bank/sync", methods=["POST"])
+@bp.route("/api/bank/sync", methods=["POST"])
 def bank_sync_now():
-    """Manually trigger a bank transaction sync."""
-    try:
-        from services.bank_sync import sync_transactions
+    """Start a bank transaction sync in the background.
+
+    Returns 202 with the job; poll its Location for progress. A request made
+    while a sync is running gets the running job.
+    """
+    job, _ = _enqueue_job("bank_sync")
+    return _job_accepted(job, location=f"/api/bank/sync/{job['id']}")
 
-        sync_transactions()
-        last_log = SyncLog.query.order_by(SyncLog.ran_at.desc()).first()
-        return jsonify(last_log.to_dict() if last_log else {"status": "ok"})
-    except Exception as e:
-        logger.error(f"bank_sync_now error: {e}")
-        return jsonify({"error": str(e)}), 500
 
+@bp.route("/api/bank/sync/<job_id>", methods=["GET"])
+def bank_sync_status(job_id):
+    """Progress (pages fetched, rows inserted) and result of a sync job."""
+    job = job_queue.get(job_id)
+    if job is None or job["kind"] != "bank_sync":
+        return jsonify({"error": "Sync job not found"}), 404
+    return jsonify(job)
 
-@app.route("/api/bank/status", methods=["GET"])
+
+@bp.route("/api/bank/status", methods=["GET"])
 def bank_status():
     """Return current token info and last sync time."""
     try:
@@ -1097,7 +2232,7 @@ def bank_status():
         return jsonify({"error": str(e)}), 500
 
 
-@app.route("/api/bank/logs", methods=["GET"])
+@bp.route("/api/bank/logs", methods=["GET"])
 def bank_logs():
     """Return last 20 SyncLog entries, newest first."""
     try:
@@ -1113,7 +2248,7 @@ def bank_logs():
 # ---------------------------------------------------------------------------
 
 
-@app.route("/api/merchants", methods=["GET", "POST"])
+@bp.route("/api/merchants", methods=["GET", "POST"])
 def handle_merchants():
     if request.method == "POST":
         try:
@@ -1146,14 +2281,14 @@ def handle_merchants():
 
     # GET
     try:
-        mappings = MerchantMapping.query.order_by(MerchantMapping.pattern).all()
-        return jsonify({"mappings": [m.to_dict() for m in mappings]})
+        statement = select(*MERCHANT_READ_COLUMNS).order_by(MerchantMapping.pattern)
+        return jsonify({"mappings": read_dicts(statement)})
     except Exception as e:
         logger.error(f"Error fetching merchant mappings: {e}")
         return jsonify({"error": str(e)}), 500
 
 
-@app.route("/api/merchants/<int:mapping_id>", methods=["DELETE"])
+@bp.route("/api/merchants/<int:mapping_id>", methods=["DELETE"])
 def delete_merchant(mapping_id):
     try:
         mapping = MerchantMapping.query.get_or_404(mapping_id)
@@ -1166,12 +2301,220 @@ def delete_merchant(mapping_id):
         return jsonify({"error": str(e)}), 500
 
 
+# ---------------------------------------------------------------------------
+# Background jobs
+# ---------------------------------------------------------------------------
+
+
+def _job_accepted(job, location=None):
+    """202 with the (possibly already running) job and where to poll it."""
+    location = location or f"/api/jobs/{job['id']}"
+    return jsonify(job), 202, {"Location": location}
+
+
+@bp.route("/api/jobs/<job_id>", methods=["GET"])
+def get_job(job_id):
+    """Status, progress and result of a background job."""
+    job = job_queue.get(job_id)
+    if job is None:
+        return jsonify({"error": "Job not found"}), 404
+    return jsonify(job)
+
+
+# ---------------------------------------------------------------------------
+# Delta sync
+# ---------------------------------------------------------------------------
+
+CHANGE_READERS = {
+    "expense": (Expense, EXPENSE_READ_COLUMNS, EXPENSE_ISO_KEYS),
+    "recurring_expense": (
+        RecurringExpense,
+        RECURRING_READ_COLUMNS,
+        RECURRING_ISO_KEYS,
+    ),
+    "merchant_mapping": (MerchantMapping, MERCHANT_READ_COLUMNS, ()),
+}
+CHANGES_MAX_LIMIT = 5000
+
+
+@bp.route("/api/changes", methods=["GET"])
+def get_changes():
+    """Rows changed since `since`, oldest first, as upserts and tombstones.
+
+    Clients store `next` and pass it back as `since`; `has_more` means
+    another page is waiting. since=0 returns every live row.
+    """
+    try:
+        since = int(request.args.get("since", 0))
+        limit = int(request.args.get("limit", 1000))
+    except ValueError:
+        return jsonify({"error": "since and limit must be integers"}), 400
+    if since < 0 or not 1 <= limit <= CHANGES_MAX_LIMIT:
+        return (
+            jsonify({"error": f"since must be >= 0, limit 1-{CHANGES_MAX_LIMIT}"}),
+            400,
+        )
+
+    entries = db.session.execute(
+        select(ChangeLog.seq, ChangeLog.table_name, ChangeLog.row_id, ChangeLog.op)
+        .where(ChangeLog.seq > since)
+        .order_by(ChangeLog.seq)
+        .limit(limit + 1)
+    ).all()
+    has_more = len(entries) > limit
+    entries = entries[:limit]
+
+    # One query per table for the current state of every upserted row
+    rows = {}
+    for table, (model, columns, iso_keys) in CHANGE_READERS.items():
+        ids = [e.row_id for e in entries if e.table_name == table and e.op == "upsert"]
+        if ids:
+            statement = select(*columns).where(model.id.in_(ids))
+            rows[table] = {r["id"]: r for r in read_dicts(statement, iso_keys)}
+
+    changes = []
+    for entry in entries:
+        data = rows.get(entry.table_name, {}).get(entry.row_id)
+        change = {"seq": entry.seq, "table": entry.table_name, "id": entry.row_id}
+        # A row deleted since the log was read is reported as deleted
+        if entry.op == "upsert" and data is not None:
+            change.update(op="upsert", data=data)
+        else:
+            change["op"] = "delete"
+        changes.append(change)
+
+    return jsonify(
+        {
+            "changes": changes,
+            "next": entries[-1].seq if entries else since,
+            "has_more": has_more,
+        }
+    )
+
+
+# ---------------------------------------------------------------------------
+# Change stream
+# ---------------------------------------------------------------------------
+
+
+@bp.route("/api/events", methods=["GET"])
+def stream_events():
+    """Server-Sent Events: expense changes and bank sync completions."""
+    subscription = event_broker.subscribe()
+    if subscription is None:
+        # Each client holds a worker thread for as long as it stays connected
+        return (
+            jsonify({"error": "Too many event stream clients"}),
+            503,
+            {"Retry-After": "30"},
+        )
+    # Passed through as is: the server closes it, and the ASGI adapter
+    # streams it without a thread (EventStream)
+    response = current_app.response_class(
+        event_broker.stream(subscription, current_app.config["SSE_HEARTBEAT_SECONDS"]),
+        mimetype="text/event-stream",
+        direct_passthrough=True,
+    )
+    # Stop reverse proxies from buffering the stream
+    response.headers["X-Accel-Buffering"] = "no"
+    return response
+
+
+# ---------------------------------------------------------------------------
+# App factory
+# ---------------------------------------------------------------------------
+
+
+def create_app(config=None):
+    """Build the app: settings from the environment, overridden by `config`.
+
+    Importing this module only defines models and routes; the database,
+    background threads and schedules are set up here. `from app import app`
+    still works: it builds a process-wide app on first use.
+    """
+    app = Flask(__name__, static_folder="static", instance_path=instance_path)
+    app.config.from_mapping(config_from_env())
+    app.config.from_mapping(config or {})
+    os.makedirs(app.instance_path, exist_ok=True)
+
+    db.init_app(app)
+    init_database(app, db)
+    init_instrumentation(app)
+    init_compression(app)
+    init_static_assets(app)
+    init_events(app)
+    init_search(app)
+    app.extensions["forecast_cache"] = ForecastCache()
+    lookup = app.extensions["category_lookup"] = CategoryLookup(db, Category.__table__)
+    queue = init_jobs(app, db, QueuedJob.__table__)
+    queue.register("apply_recurring", _apply_recurring_job, priority=10)
+    queue.register("bank_sync", _bank_sync_job, priority=5)
+    queue.register("backup", _backup_job, priority=0)
+    cache = init_expense_cache(
+        app, db, Expense.__table__, ChangeLog.__table__, lookup.key
+    )
+    metrics.REGISTRY.register(
+        metrics.Gauge(
+            "pf_db_file_bytes",
+            "Size of the SQLite database file (main) and its write-ahead log (wal).",
+            ("file",),
+            callback=lambda: _database_file_sizes(app),
+        )
+    )
+    app.register_blueprint(bp)
+
+    # Startup does not change the schema unless MIGRATE_ON_START, but it will
+    # not serve a database that is behind the code: queries would fail on
+    # whatever changed
+    with app.app_context():
+        if app.config["MIGRATE_ON_START"]:
+            migrate_database()
+        if app.config["SCHEMA_CHECK"]:
+            with db.engine.connect() as connection:
+                behind = migrations.pending(connection, MIGRATIONS)
+            if behind:
+                raise RuntimeError(
+                    f"Database schema is {len(behind)} migration(s) behind; "
+                    "run scripts/database/migrate.py"
+                )
+
+    if app.config["SCHEDULER"]:
+        start_scheduler(app)
+    queue.start(app.config["JOB_WORKERS"])
+    if cache.enabled:
+        cache.warm()
+    return app
+
+
+_app = None
+_asgi_app = None
+
+
+def __getattr__(name):
+    # `app` is built on first access, so importing models costs no app.
+    # `asgi_app` wraps it for ASGI servers (services/asgi.py).
+    global _app, _asgi_app
+    if name == "app":
+        if _app is None:
+            _app = create_app()
+        return _app
+    if name == "asgi_app":
+        if _asgi_app is None:
+            from services.asgi import create_asgi_app
+
+            _asgi_app = create_asgi_app(__getattr__("app"))
+        return _asgi_app
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+
 # ---------------------------------------------------------------------------
 # Dev server
 # ---------------------------------------------------------------------------
 
 
-def run_dev_server():
+def run_dev_server(app):
+    from werkzeug.serving import run_simple
+
     extra_files = []
     for root, dirs, files in os.walk("static"):
         for file in files:
@@ -1188,8 +2531,19 @@ def run_dev_server():
     )
 
 
+def run_asgi_server(app):
+    import asyncio
+
+    from services.asgi import create_asgi_app, serve
+
+    asyncio.run(serve(create_asgi_app(app), "0.0.0.0", 5001))
+
+
 if __name__ == "__main__":
-    if os.environ.get("FLASK_ENV") == "production":
+    app = create_app()
+    if os.environ.get("SERVER_MODE") == "asgi":
+        run_asgi_server(app)
+    elif os.environ.get("FLASK_ENV") == "production":
         app.run(host="0.0.0.0", port=5001)
     else:
-        run_dev_server()
+        run_dev_server(app)
@@ -9,16 +9,9 @@ echo "Starting Personal Finances App..."
 mkdir -p /app/instance
 chown -R appuser:appgroup /app/instance 2>/dev/null || true
 
-# Initialize database if it doesn't exist
-if [ ! -f "/app/instance/expenses.db" ]; then
-    echo "Initializing database..."
-    python -c "
-from app import app, db
-with app.app_context():
-    db.create_all()
-    print('Database initialized successfully')
-"
-fi
+# Create or upgrade the schema (a no-op when it is up to date)
+echo "Migrating database..."
+python scripts/database/migrate.py
 
 echo "Database ready. Starting Flask application..."
 
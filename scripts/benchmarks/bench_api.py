@@ -0,0 +1,375 @@
+#!/usr/bin/env python3
+"""
+API latency benchmarks against generated databases.
+
+Every API route is timed through the Flask test client against synthetic
+databases of 10k, 100k and 1M expenses (see dataset.py). Each size runs in
+its own process so the app binds to a fresh database file; generated
+databases are cached under scripts/benchmarks/data/ and copied before each
+run, so mutating routes never change the cached copy.
+
+Usage:
+    python scripts/benchmarks/bench_api.py                      # all sizes
+    python scripts/benchmarks/bench_api.py --sizes 10000 --iterations 50
+    python scripts/benchmarks/bench_api.py --save-baseline      # write baseline
+    python scripts/benchmarks/bench_api.py --compare            # exit 1 on regression
+
+Reports are written to scripts/benchmarks/results/latest.json; --compare
+checks every case's p95 against results/baseline.json (or --baseline PATH).
+"""
+
+import argparse
+import glob
+import json
+import logging
+import os
+import shutil
+import sqlite3
+import subprocess
+import sys
+import tempfile
+import time
+from contextlib import closing
+from datetime import datetime
+
+bench_dir = os.path.dirname(os.path.abspath(__file__))
+project_root = os.path.dirname(os.path.dirname(bench_dir))
+sys.path.insert(0, bench_dir)
+
+import stats  # noqa: E402
+
+DATA_DIR = os.path.join(bench_dir, "data")
+RESULTS_DIR = os.path.join(bench_dir, "results")
+DEFAULT_SIZES = [10_000, 100_000, 1_000_000]
+
+
+class FakeBank:
+    """Stands in for services.enable_banking.get_transactions.
+
+    Each call returns `per_call` debits: half are re-sent from the previous
+    call (exercising dedup) and half are new, with merchants that partly
+    match the seeded merchant mappings.
+    """
+
+    def __init__(self, patterns, per_call=100):
+        self.patterns = patterns or ["UNKNOWN"]
+        self.per_call = per_call
+        self.calls = 0
+        self.previous = []
+
+    def get_transactions(self, account_id, date_from, on_page=None):
+        self.calls += 1
+        fresh = []
+        for i in range(self.per_call - len(self.previous)):
+            n = self.calls * self.per_call + i
+            merchant = (
+                f"{self.patterns[n % len(self.patterns)]} VALENCIA"
+                if n % 3
+                else f"SHOP {n}"
+            )
+            fresh.append(
+                {
+                    "external_id": f"fake-{n}",
+                    "amount": 10.0 + n % 90,
+                    "currency": "EUR",
+                    "date": datetime.now().strftime("%Y-%m-%d"),
+                    "merchant": merchant,
+                    "description": merchant,
+                }
+            )
+        batch = self.previous + fresh
+        self.previous = fresh[: self.per_call // 2]
+        if on_page:
+            on_page(1)
+        return batch
+
+
+class Case:
+    def __init__(self, name, run, iterations=None):
+        self.name = name
+        self.run = run
+        self.iterations = iterations
+
+
+def _request(client, method, url, **kwargs):
+    response = client.open(url, method=method, **kwargs)
+    if response.status_code >= 400:
+        raise RuntimeError(f"{method} {url} -> {response.status_code}")
+    return response
+
+
+def build_cases(client, app_module, app, iterations):
+    """All timed cases for one database. Each `run` does a single request."""
+    Expense = app_module.Expense
+    with app.app_context():
+        latest = Expense.query.order_by(Expense.date.desc()).first()
+    if latest is None:
+        raise RuntimeError(
+            f"No expenses in {app.config['SQLALCHEMY_DATABASE_URI']}; "
+            "the benchmark needs a populated database"
+        )
+    month, year = latest.date.month, latest.date.year
+    heavy = max(3, iterations // 10)
+
+    def get(url):
+        return lambda: _request(client, "GET", url)
+
+    created = []
+
+    def merchant_create():
+        response = _request(
+            client,
+            "POST",
+            "/api/merchants",
+            json={
+                "pattern": f"BENCH MERCHANT {len(created)}",
+                "category": "other",
+                "description": "Bench",
+            },
+        )
+        created.append(response.get_json()["id"])
+
+    def merchant_delete():
+        _request(client, "DELETE", f"/api/merchants/{created.pop()}")
+
+    def job(url):
+        """POST that queues a job, then the job itself (JOB_WORKERS is 0)."""
+        queue = app.extensions["job_queue"]
+
+        def run():
+            job_id = _request(client, "POST", url).get_json()["id"]
+            queue.run_pending()
+            status = queue.get(job_id)["status"]
+            if status != "succeeded":
+                raise RuntimeError(f"POST {url} -> job {status}")
+
+        return run
+
+    return [
+        Case(
+            "GET /api/expenses (month)", get(f"/api/expenses?month={month}&year={year}")
+        ),
+        Case(
+            "GET /api/expenses (paginated)",
+            get(f"/api/expenses?month={month}&year={year}&page=2&per_page=20"),
+        ),
+        Case("GET /api/expenses/unclassified", get("/api/expenses/unclassified")),
+        Case(
+            "GET /api/expenses/query (category, 90d)",
+            get(
+                f"/api/expenses/query?category=super&category=food_drink"
+                f"&from={year - 1}-{month:02d}-01&limit=100"
+            ),
+        ),
+        Case(
+            "GET /api/expenses/search",
+            get("/api/expenses/search?q=mercadona&limit=20"),
+        ),
+        Case("GET /api/trends", get("/api/trends")),
+        Case("GET /api/analytics", get("/api/analytics")),
+        Case(
+            "GET /api/analytics (10 years)",
+            get(f"/api/analytics?from={year - 10}-{month:02d}-01"),
+        ),
+        Case("GET /api/months", get("/api/months")),
+        Case("GET /api/categories", get("/api/categories")),
+        Case("GET /api/recurring", get("/api/recurring")),
+        Case("GET /api/recurring/pending", get("/api/recurring/pending")),
+        Case("GET /api/recurring/forecast", get("/api/recurring/forecast?months=12")),
+        Case("POST /api/merchants", merchant_create),
+        Case("GET /api/merchants", get("/api/merchants")),
+        Case("DELETE /api/merchants/<id>", merchant_delete),
+        Case("POST /api/bank/sync (fake bank)", job("/api/bank/sync"), heavy),
+        Case("POST /api/backup", job("/api/backup"), heavy),
+    ]
+
+
+def _copy_database(source, target):
+    """Copy a SQLite database, including what is still in its -wal file (the
+    app runs in WAL mode, so a file copy can miss every recent write)."""
+    with closing(sqlite3.connect(source)) as src, closing(
+        sqlite3.connect(target)
+    ) as dst:
+        src.backup(dst)
+
+
+def _has_expenses(path):
+    try:
+        with closing(sqlite3.connect(path)) as conn:
+            return conn.execute("SELECT count(*) FROM expense").fetchone()[0] > 0
+    except sqlite3.Error:
+        return False
+
+
+def prepare_database(work_path, size, seed, years):
+    """Copy the cached database for `size` to work_path, generating it first
+    if needed, and build an app bound to it. Returns (app module, app)."""
+    os.makedirs(DATA_DIR, exist_ok=True)
+    cache_path = os.path.join(DATA_DIR, f"bench_{size}_s{seed}_y{years}.db")
+    if os.path.exists(cache_path) and not _has_expenses(cache_path):
+        print(f"  discarding empty cached database {cache_path}", flush=True)
+        os.remove(cache_path)
+    if os.path.exists(cache_path):
+        _copy_database(cache_path, work_path)
+
+    sys.path.insert(0, project_root)
+    import app as app_module
+
+    app = app_module.create_app(
+        {
+            "SQLALCHEMY_DATABASE_URI": f"sqlite:///{work_path}",
+            # New databases, and cached ones generated by older code
+            "MIGRATE_ON_START": True,
+            "SCHEDULER": False,
+            # Queued jobs run on the caller's thread (run_pending), so a case
+            # that queues one can time the work, not just the enqueue
+            "JOB_WORKERS": 0,
+        }
+    )
+
+    if not os.path.exists(cache_path):
+        from dataset import populate_database
+
+        started = time.perf_counter()
+        print(f"  generating {size} expenses ...", flush=True)
+        populate_database(work_path, size, seed=seed, years=years)
+        _copy_database(work_path, cache_path)
+        print(f"  generated in {time.perf_counter() - started:.1f}s", flush=True)
+    return app_module, app
+
+
+def run_size(size, iterations, seed, years):
+    """Benchmark every case against one database size (child process)."""
+    workdir = tempfile.mkdtemp(prefix="pf-bench-")
+    app_module, app = prepare_database(
+        os.path.join(workdir, "bench.db"), size, seed, years
+    )
+    logging.getLogger().setLevel(logging.WARNING)
+
+    from services import enable_banking
+
+    with app.app_context():
+        patterns = [m.pattern for m in app_module.MerchantMapping.query.all()]
+        app_module.db.session.add(
+            app_module.AppToken(
+                key="enable_banking", value=json.dumps({"last_sync_at": None})
+            )
+        )
+        app_module.db.session.commit()
+    os.environ["ENABLE_BANKING_ACCOUNT_ID"] = "bench-account"
+    enable_banking.get_transactions = FakeBank(patterns).get_transactions
+
+    exports_before = set(
+        glob.glob(os.path.join(project_root, "scripts", "database", "exports", "*.csv"))
+    )
+    results = {}
+    try:
+        with app.test_client() as client:
+            for case in build_cases(client, app_module, app, iterations):
+                n = case.iterations or iterations
+                for _ in range(2):  # warm-up
+                    case.run()
+                samples = []
+                for _ in range(n):
+                    started = time.perf_counter()
+                    case.run()
+                    samples.append((time.perf_counter() - started) * 1000)
+                results[case.name] = stats.summarize(samples)
+    finally:
+        exports_after = set(
+            glob.glob(
+                os.path.join(project_root, "scripts", "database", "exports", "*.csv")
+            )
+        )
+        for path in exports_after - exports_before:
+            os.remove(path)
+        shutil.rmtree(workdir, ignore_errors=True)
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--sizes", type=int, nargs="+", default=DEFAULT_SIZES)
+    parser.add_argument("--iterations", type=int, default=30)
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--years", type=int, default=10)
+    parser.add_argument("--out", default=os.path.join(RESULTS_DIR, "latest.json"))
+    parser.add_argument(
+        "--baseline", default=os.path.join(RESULTS_DIR, "baseline.json")
+    )
+    parser.add_argument("--save-baseline", action="store_true")
+    parser.add_argument("--compare", action="store_true")
+    parser.add_argument(
+        "--tolerance",
+        type=float,
+        default=1.25,
+        help="allowed p95 ratio against the baseline before failing",
+    )
+    parser.add_argument("--child-size", type=int, help=argparse.SUPPRESS)
+    parser.add_argument("--child-out", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.child_size:
+        results = run_size(args.child_size, args.iterations, args.seed, args.years)
+        stats.write_report(args.child_out, results)
+        return 0
+
+    report = {
+        "environment": stats.environment(),
+        "config": {
+            "iterations": args.iterations,
+            "seed": args.seed,
+            "years": args.years,
+        },
+        "results": {},
+    }
+    for size in args.sizes:
+        print(f"Benchmarking {size} expenses", flush=True)
+        with tempfile.NamedTemporaryFile(suffix=".json", delete=False) as tmp:
+            child_out = tmp.name
+        try:
+            subprocess.run(
+                [
+                    sys.executable,
+                    os.path.abspath(__file__),
+                    "--child-size",
+                    str(size),
+                    "--child-out",
+                    child_out,
+                    "--iterations",
+                    str(args.iterations),
+                    "--seed",
+                    str(args.seed),
+                    "--years",
+                    str(args.years),
+                ],
+                check=True,
+            )
+            report["results"][str(size)] = stats.load_report(child_out)
+        finally:
+            os.remove(child_out)
+        stats.print_table(f"{size} expenses", report["results"][str(size)])
+
+    os.makedirs(RESULTS_DIR, exist_ok=True)
+    stats.write_report(args.out, report)
+    print(f"\nReport written to {args.out}")
+    if args.save_baseline:
+        stats.write_report(args.baseline, report)
+        print(f"Baseline written to {args.baseline}")
+
+    if args.compare:
+        if not os.path.exists(args.baseline):
+            print(f"No baseline at {args.baseline}; run with --save-baseline first")
+            return 1
+        baseline = stats.load_report(args.baseline)["results"]
+        regressions = stats.compare(report["results"], baseline, args.tolerance)
+        for size, case, before, after in regressions:
+            print(f"REGRESSION [{size}] {case}: p95 {before:.2f}ms -> {after:.2f}ms")
+        if regressions:
+            return 1
+        print(f"No p95 regressions beyond {args.tolerance:.2f}x baseline")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,102 @@
+#!/usr/bin/env python3
+"""
+Response encoding benchmark: payload size and encode time.
+
+Builds /api/expenses-shaped payloads of 1k and 10k rows from the benchmark
+dataset and encodes them with every backend services.serialization can use:
+Flask's stdlib JSON provider, orjson, msgpack and CBOR. Backends whose
+library is not installed are skipped.
+
+Usage:
+    python scripts/benchmarks/bench_encoding.py
+    python scripts/benchmarks/bench_encoding.py --rows 1000 10000 50000
+"""
+
+import argparse
+import os
+import sys
+import time
+from datetime import datetime
+
+bench_dir = os.path.dirname(os.path.abspath(__file__))
+project_root = os.path.dirname(os.path.dirname(bench_dir))
+sys.path.insert(0, bench_dir)
+sys.path.insert(0, project_root)
+
+import stats  # noqa: E402
+from dataset import generate_expenses  # noqa: E402
+from flask import Flask  # noqa: E402
+from services import serialization  # noqa: E402
+
+
+ROW_KEYS = ("amount", "category", "description", "date", "source", "external_id")
+
+
+def build_payload(rows, seed):
+    """An /api/expenses response body with `rows` expenses."""
+    expenses = []
+    for i, values in enumerate(generate_expenses(rows, seed=seed, years=1), 1):
+        expense = {"id": i, **dict(zip(ROW_KEYS, values)), "merchant": values[6]}
+        expense["date"] = datetime.strptime(
+            expense["date"], "%Y-%m-%d %H:%M:%S.%f"
+        ).isoformat()
+        expenses.append(expense)
+    return {"expenses": expenses, "total": rows, "page": None, "per_page": None}
+
+
+def encoders():
+    """(name, encode) for every backend available here."""
+    stub = Flask(__name__)
+    stub.config["JSON_BACKEND"] = "stdlib"
+    stdlib = serialization.FastJSONProvider(stub)
+    compact = {"separators": serialization.COMPACT_SEPARATORS}  # as response()
+    result = [("json (stdlib)", lambda obj: stdlib.dumps(obj, **compact))]
+    if serialization.orjson is not None:
+        stub.config["JSON_BACKEND"] = "orjson"
+        fast = serialization.FastJSONProvider(stub)
+        result.append(("json (orjson)", lambda obj: fast.dumps(obj, **compact)))
+    if serialization.msgpack is not None:
+        result.append(
+            (
+                "msgpack",
+                lambda obj: stdlib.pack(obj, serialization.MSGPACK_MIMETYPE),
+            )
+        )
+    if serialization.cbor2 is not None:
+        result.append(
+            ("cbor", lambda obj: stdlib.pack(obj, serialization.CBOR_MIMETYPE))
+        )
+    return result
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--rows", type=int, nargs="+", default=[1_000, 10_000])
+    parser.add_argument("--iterations", type=int, default=30)
+    parser.add_argument("--seed", type=int, default=42)
+    args = parser.parse_args()
+
+    for rows in args.rows:
+        payload = build_payload(rows, args.seed)
+        results = {}
+        sizes = {}
+        for name, encode in encoders():
+            body = encode(payload)
+            sizes[name] = len(body.encode() if isinstance(body, str) else body)
+            samples = []
+            for _ in range(args.iterations):
+                started = time.perf_counter()
+                encode(payload)
+                samples.append((time.perf_counter() - started) * 1000)
+            results[name] = stats.summarize(samples)
+
+        stats.print_table(f"{rows} rows: encode time", results)
+        baseline = sizes["json (stdlib)"]
+        print(f"  {'payload size':<45} {'bytes':>9} {'vs json':>9}")
+        for name, size in sizes.items():
+            print(f"  {name:<45} {size:>9} {size / baseline:>8.0%}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
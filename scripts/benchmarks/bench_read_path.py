@@ -0,0 +1,119 @@
+#!/usr/bin/env python3
+"""
+ORM vs Core read path on a single busy month.
+
+Loads one month of `--rows` expenses (default 5k) into a throwaway database
+and times, for the same SELECT, hydrating Expense instances and calling
+to_dict() on each against the Core read path (read_dicts). Also times the
+full GET /api/expenses?month=&year= request, which now uses the Core path.
+Per-row cost is the median run time divided by the row count.
+
+Usage:
+    python scripts/benchmarks/bench_read_path.py
+    python scripts/benchmarks/bench_read_path.py --rows 20000 --iterations 50
+"""
+
+import argparse
+import logging
+import os
+import shutil
+import sys
+import tempfile
+import time
+from datetime import datetime
+
+bench_dir = os.path.dirname(os.path.abspath(__file__))
+project_root = os.path.dirname(os.path.dirname(bench_dir))
+sys.path.insert(0, bench_dir)
+
+import stats  # noqa: E402
+
+
+def _time(func, iterations):
+    for _ in range(2):  # warm-up
+        func()
+    samples = []
+    for _ in range(iterations):
+        started = time.perf_counter()
+        func()
+        samples.append((time.perf_counter() - started) * 1000)
+    return stats.summarize(samples)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--rows", type=int, default=5_000)
+    parser.add_argument("--iterations", type=int, default=30)
+    parser.add_argument("--seed", type=int, default=42)
+    args = parser.parse_args()
+
+    workdir = tempfile.mkdtemp(prefix="pf-read-")
+    sys.path.insert(0, project_root)
+    import app as app_module
+    from dataset import populate_database
+    from sqlalchemy import select
+
+    app = app_module.create_app(
+        {
+            "SQLALCHEMY_DATABASE_URI": f"sqlite:///{workdir}/read.db",
+            "MIGRATE_ON_START": True,
+            "SCHEDULER": False,
+        }
+    )
+    logging.getLogger().setLevel(logging.WARNING)
+    Expense = app_module.Expense
+
+    # Every row lands in March 2024: 27-day span ending on the 28th
+    end = datetime(2024, 3, 28, 23, 59)
+    populate_database(
+        os.path.join(workdir, "read.db"),
+        args.rows,
+        seed=args.seed,
+        years=27 / 365,
+        end=end,
+    )
+    start, stop = app_module.month_bounds(2024, 3)
+    where = (Expense.date >= start, Expense.date < stop)
+
+    def orm():
+        rows = Expense.query.filter(*where).order_by(Expense.date.desc()).all()
+        result = [expense.to_dict() for expense in rows]
+        app_module.db.session.expunge_all()
+        return result
+
+    def core():
+        statement = (
+            select(*app_module.EXPENSE_READ_COLUMNS)
+            .where(*where)
+            .order_by(Expense.date.desc())
+        )
+        return app_module.read_dicts(statement, app_module.EXPENSE_ISO_KEYS)
+
+    try:
+        with app.app_context():
+            count = len(core())
+            assert orm() == core(), "read paths disagree"
+            results = {
+                "ORM + to_dict": _time(orm, args.iterations),
+                "Core read_dicts": _time(core, args.iterations),
+            }
+        with app.test_client() as client:
+            results["GET /api/expenses (month)"] = _time(
+                lambda: client.get("/api/expenses?month=3&year=2024"),
+                args.iterations,
+            )
+    finally:
+        shutil.rmtree(workdir, ignore_errors=True)
+
+    stats.print_table(f"{count} rows in one month", results)
+    orm_row = results["ORM + to_dict"]["p50_ms"] * 1000 / count
+    core_row = results["Core read_dicts"]["p50_ms"] * 1000 / count
+    print(
+        f"\nPer row (p50): ORM {orm_row:.2f}us, Core {core_row:.2f}us "
+        f"({orm_row / core_row:.1f}x)"
+    )
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,101 @@
+#!/usr/bin/env python3
+"""
+Cold start: import, create_app() and the first request, against a budget.
+
+Each run is a fresh interpreter (what a worker or a restarted service pays)
+against a throwaway, already migrated database. It times `import app`,
+`create_app()` with the production defaults (scheduler on, job workers, warm
+expense cache) and the first GET /api/expenses. Exits 1 when the p50 of the
+total exceeds the budget.
+
+Usage:
+    python scripts/benchmarks/bench_startup.py
+    python scripts/benchmarks/bench_startup.py --runs 10 --budget-ms 1500
+"""
+
+import argparse
+import json
+import os
+import shutil
+import subprocess
+import sys
+import tempfile
+
+bench_dir = os.path.dirname(os.path.abspath(__file__))
+project_root = os.path.dirname(os.path.dirname(bench_dir))
+sys.path.insert(0, bench_dir)
+
+import stats  # noqa: E402
+
+# Import through first response on a Raspberry Pi 4; a desktop is well under
+BUDGET_MS = 2000
+
+CHILD = """
+import json, sys, time
+started = time.perf_counter()
+import app as app_module
+imported = time.perf_counter()
+app = app_module.create_app()
+created = time.perf_counter()
+response = app.test_client().get("/api/expenses")
+served = time.perf_counter()
+assert response.status_code == 200, response.status_code
+if "scheduler" in app.extensions:
+    app.extensions["scheduler"].shutdown(wait=False)
+app.extensions["job_queue"].stop()
+ms = lambda a, b: (b - a) * 1000
+json.dump({
+    "import app": ms(started, imported),
+    "create_app()": ms(imported, created),
+    "first request": ms(created, served),
+    "total": ms(started, served),
+}, sys.stdout)
+"""
+
+
+def _run_once(env):
+    output = subprocess.run(
+        [sys.executable, "-c", CHILD],
+        cwd=project_root,
+        env=env,
+        check=True,
+        capture_output=True,
+        text=True,
+    ).stdout
+    return json.loads(output)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--budget-ms", type=float, default=BUDGET_MS)
+    args = parser.parse_args()
+
+    workdir = tempfile.mkdtemp(prefix="pf-startup-")
+    env = dict(
+        os.environ,
+        DATABASE_URL=f"sqlite:///{workdir}/startup.db",
+        MIGRATE_ON_START="1",
+    )
+    try:
+        _run_once(env)  # creates and migrates the database, warms the disk cache
+        env["MIGRATE_ON_START"] = "0"
+        samples = {}
+        for _ in range(args.runs):
+            for phase, value in _run_once(env).items():
+                samples.setdefault(phase, []).append(value)
+    finally:
+        shutil.rmtree(workdir, ignore_errors=True)
+
+    results = {phase: stats.summarize(values) for phase, values in samples.items()}
+    stats.print_table(f"Cold start, {args.runs} runs", results)
+    total = results["total"]["p50_ms"]
+    if total > args.budget_ms:
+        print(f"\nOver budget: p50 {total:.0f}ms > {args.budget_ms:.0f}ms")
+        return 1
+    print(f"\nWithin budget: p50 {total:.0f}ms <= {args.budget_ms:.0f}ms")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
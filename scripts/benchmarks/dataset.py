@@ -0,0 +1,131 @@
+"""
+Synthetic expense databases for benchmarks.
+
+Rows follow the category mix and amount ranges of
+scripts/database/create_test_data.py, spread over several years so month
+listings, trends and the recurring scan see realistic multi-year volumes.
+About a third of the rows look like bank imports (merchant + external_id),
+a few are recurring applications, the rest are manual entries.
+"""
+
+import os
+import random
+import sqlite3
+import sys
+from datetime import datetime, timedelta
+
+project_root = os.path.dirname(
+    os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+)
+sys.path.insert(0, os.path.join(project_root, "scripts", "database"))
+
+from create_test_data import CATEGORIES  # noqa: E402
+
+CITIES = ["VALENCIA", "MADRID", "BARCELONA", "ONLINE"]
+BATCH_SIZE = 50_000
+
+
+def generate_expenses(size, seed=42, years=10, end=None):
+    """Yield `size` expense tuples (amount, category, description, date,
+    source, external_id, merchant) ordered by date."""
+    rng = random.Random(seed)
+    end = end or datetime.now().replace(hour=23, minute=59, second=0, microsecond=0)
+    start = end - timedelta(days=365 * years)
+    span_seconds = int((end - start).total_seconds())
+
+    names = list(CATEGORIES)
+    weights = [CATEGORIES[c]["frequency"] for c in names]
+    offsets = sorted(rng.randrange(span_seconds) for _ in range(size))
+
+    for i, offset in enumerate(offsets):
+        category = rng.choices(names, weights)[0]
+        config = CATEGORIES[category]
+        low, high = config["amount_range"]
+        # Skewed towards the low end, like real receipts
+        amount = round(rng.triangular(low, high, low + (high - low) * 0.2), 2)
+        description = rng.choice(config["descriptions"])
+        day = start + timedelta(seconds=offset)
+        date = day.replace(hour=rng.randint(8, 22)).strftime("%Y-%m-%d %H:%M:%S.%f")
+
+        roll = rng.random()
+        if roll < 0.35:
+            merchant = f"{description.upper()} {rng.choice(CITIES)}"
+            yield (
+                amount,
+                category,
+                description,
+                date,
+                "bank_sync",
+                f"bench-{i}",
+                merchant,
+            )
+        elif roll < 0.40:
+            yield (amount, category, description, date, "recurring", None, None)
+        else:
+            yield (amount, category, description, date, "manual", None, None)
+
+
+def populate_database(
+    db_path, size, seed=42, years=10, recurring=60, mappings=40, end=None
+):
+    """Fill an empty, already-migrated database with synthetic rows."""
+    rng = random.Random(seed + 1)
+    conn = sqlite3.connect(db_path)
+    try:
+        conn.execute("PRAGMA synchronous=OFF")
+        conn.executemany(
+            "INSERT OR IGNORE INTO category (key, label, color, icon, position) "
+            "VALUES (?, ?, '#94a3b8', 'more_horiz', 100)",
+            [(name, name) for name in CATEGORIES],
+        )
+        rows = generate_expenses(size, seed=seed, years=years, end=end)
+        while True:
+            batch = [row for _, row in zip(range(BATCH_SIZE), rows)]
+            if not batch:
+                break
+            conn.executemany(
+                "INSERT INTO expense "
+                "(amount, category_id, description, date, source, external_id, "
+                "merchant) VALUES (?, (SELECT id FROM category WHERE key = ?), "
+                "?, ?, ?, ?, ?)",
+                batch,
+            )
+            conn.commit()
+
+        today = datetime.now().replace(hour=0, minute=0, second=0, microsecond=0)
+        names = list(CATEGORIES)
+        for i in range(recurring):
+            frequency = rng.choice(["monthly", "monthly", "weekly", "yearly"])
+            day = rng.randint(1, 7) if frequency == "weekly" else rng.randint(1, 28)
+            conn.execute(
+                "INSERT INTO recurring_expense "
+                "(amount, category, description, frequency, day_of_month, "
+                "start_date, is_active, created_at) VALUES (?, ?, ?, ?, ?, ?, 1, ?)",
+                (
+                    round(rng.uniform(5, 300), 2),
+                    rng.choice(names),
+                    f"Recurring {i}",
+                    frequency,
+                    day,
+                    (today - timedelta(days=400)).strftime("%Y-%m-%d %H:%M:%S.%f"),
+                    today.strftime("%Y-%m-%d %H:%M:%S.%f"),
+                ),
+            )
+
+        patterns = sorted(
+            {d.upper() for c in CATEGORIES.values() for d in c["descriptions"]}
+        )[:mappings]
+        for pattern in patterns:
+            category = next(
+                c
+                for c, cfg in CATEGORIES.items()
+                if pattern in {d.upper() for d in cfg["descriptions"]}
+            )
+            conn.execute(
+                "INSERT INTO merchant_mapping (pattern, category, description) "
+                "VALUES (?, ?, ?)",
+                (pattern, category, pattern.title()),
+            )
+        conn.commit()
+    finally:
+        conn.close()
@@ -0,0 +1,555 @@
+#!/usr/bin/env python3
+"""
+Concurrent load test for the HTTP API.
+
+Starts the app on a local port against a generated database (see
+dataset.py) and drives it with asyncio virtual users that replay what the
+pages do in a browser:
+
+    browse_expenses  open /expenses (HTML, scripts, /api/env, /api/months and
+                     the month fetches made by category-chart/latest-expenses),
+                     then step back two months with the date navigation
+    add_expense      open /add, POST /api/expenses, reload the month
+    trends           open /trends and fetch /api/trends
+
+Each stage in --users runs for --duration seconds; the report gives
+throughput, per-step latency percentiles and error rates, which shows where
+SQLite locking or GIL contention starts to bite. --with-scheduler also runs
+the recurring job and a bank sync against a fake bank in a loop inside the
+server while the load is applied.
+
+--server picks the threaded WSGI server (what app.py runs by default) or the
+ASGI mode (services/asgi.py). --idle N holds N extra connections open for
+the whole run, like idle tabs: half follow /api/events, half sit in
+keep-alive after one request. The report then adds how long they took to
+open and the server's thread count and memory while holding them, which is
+where the two modes differ.
+
+Usage:
+    python scripts/benchmarks/load_test.py --users 1 5 10 25 50
+    python scripts/benchmarks/load_test.py --size 100000 --with-scheduler
+    python scripts/benchmarks/load_test.py --url http://pi.local:5001 --users 10
+    python scripts/benchmarks/load_test.py --server asgi --idle 400 --users 10
+
+The HTTP client is a minimal HTTP/1.1 keep-alive client on asyncio streams,
+so the script needs nothing beyond the standard library.
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import random
+import re
+import socket
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from collections import defaultdict
+from datetime import datetime
+from urllib.parse import urlsplit
+
+bench_dir = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, bench_dir)
+
+import stats  # noqa: E402
+
+ASSET_RE = re.compile(r'(?:src|href)="(/static/[^"?]+\.(?:js|css)(?:\?[^"]*)?)"')
+JOURNEY_WEIGHTS = {"browse_expenses": 6, "add_expense": 1, "trends": 3}
+
+
+# ---------------------------------------------------------------------------
+# Server side
+# ---------------------------------------------------------------------------
+
+
+def serve(port, size, seed, years, with_scheduler, job_interval, server, idle):
+    """Run the app on `port` (subprocess entry point)."""
+    import logging
+
+    from werkzeug.serving import make_server
+
+    from bench_api import FakeBank, prepare_database
+
+    workdir = tempfile.mkdtemp(prefix="pf-load-")
+    app_module, app = prepare_database(
+        os.path.join(workdir, "load.db"), size, seed, years
+    )
+    logging.getLogger().setLevel(logging.WARNING)
+
+    if with_scheduler:
+        from services import enable_banking
+        from services.bank_sync import sync_transactions
+
+        with app.app_context():
+            patterns = [m.pattern for m in app_module.MerchantMapping.query.all()]
+            app_module.db.session.add(
+                app_module.AppToken(
+                    key="enable_banking", value=json.dumps({"last_sync_at": None})
+                )
+            )
+            app_module.db.session.commit()
+        os.environ["ENABLE_BANKING_ACCOUNT_ID"] = "load-account"
+        enable_banking.get_transactions = FakeBank(patterns).get_transactions
+
+        def sync():
+            return sync_transactions(app_module.db, app_module)
+
+        for job in (app_module.apply_due_recurring_expenses, sync):
+            threading.Thread(
+                target=_job_loop, args=(app, job, job_interval), daemon=True
+            ).start()
+
+    # Room for the idle event streams on top of the usual limit
+    broker = app.extensions["event_broker"]
+    broker.max_clients = max(broker.max_clients, idle + 32)
+
+    if server == "asgi":
+        import asyncio
+
+        from services.asgi import create_asgi_app, serve as serve_asgi
+
+        asyncio.run(
+            serve_asgi(
+                create_asgi_app(app),
+                "127.0.0.1",
+                port,
+                ready=lambda address: print("READY", flush=True),
+                # Held idle connections are what is measured; werkzeug keeps
+                # them too
+                idle_timeout=None,
+            )
+        )
+        return
+
+    # Same threaded server app.run() uses in production
+    httpd = make_server("127.0.0.1", port, app, threaded=True)
+    print("READY", flush=True)
+    httpd.serve_forever()
+
+
+def _job_loop(app, job, interval):
+    while True:
+        started = time.perf_counter()
+        with app.app_context():
+            job()
+        took = (time.perf_counter() - started) * 1000
+        print(f"JOB {job.__name__} {took:.1f}ms", flush=True)
+        time.sleep(interval)
+
+
+def start_server(args):
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        port = sock.getsockname()[1]
+    command = [
+        sys.executable,
+        os.path.abspath(__file__),
+        "--serve-port",
+        str(port),
+        "--size",
+        str(args.size),
+        "--seed",
+        str(args.seed),
+        "--years",
+        str(args.years),
+        "--job-interval",
+        str(args.job_interval),
+        "--server",
+        args.server,
+        "--idle",
+        str(args.idle),
+    ]
+    if args.with_scheduler:
+        command.append("--with-scheduler")
+    process = subprocess.Popen(command, stdout=subprocess.PIPE, text=True)
+    for line in process.stdout:
+        if line.strip() == "READY":
+            break
+    else:
+        raise RuntimeError("server exited before becoming ready")
+
+    job_log = []
+    reader = threading.Thread(
+        target=lambda: job_log.extend(process.stdout), daemon=True
+    )
+    reader.start()
+    return process, reader, f"http://127.0.0.1:{port}", job_log
+
+
+# ---------------------------------------------------------------------------
+# Client side
+# ---------------------------------------------------------------------------
+
+
+class Connection:
+    """One keep-alive HTTP/1.1 connection, like a browser tab's socket."""
+
+    def __init__(self, host, port):
+        self.host = host
+        self.port = port
+        self.reader = None
+        self.writer = None
+
+    async def request(self, method, path, body=None):
+        if self.writer is None:
+            self.reader, self.writer = await asyncio.open_connection(
+                self.host, self.port
+            )
+        payload = json.dumps(body).encode() if body is not None else b""
+        head = [
+            f"{method} {path} HTTP/1.1",
+            f"Host: {self.host}:{self.port}",
+            "Connection: keep-alive",
+            "Accept-Encoding: identity",
+        ]
+        if body is not None:
+            head += [
+                "Content-Type: application/json",
+                f"Content-Length: {len(payload)}",
+            ]
+        self.writer.write(("\r\n".join(head) + "\r\n\r\n").encode() + payload)
+        await self.writer.drain()
+
+        status_line = await self.reader.readline()
+        if not status_line:
+            raise ConnectionError("connection closed by server")
+        status = int(status_line.split()[1])
+        headers = {}
+        while True:
+            line = await self.reader.readline()
+            if line in (b"\r\n", b"\n", b""):
+                break
+            name, _, value = line.decode("latin-1").partition(":")
+            headers[name.strip().lower()] = value.strip()
+
+        if "content-length" in headers:
+            data = await self.reader.readexactly(int(headers["content-length"]))
+        elif headers.get("transfer-encoding") == "chunked":
+            data = b""
+            while True:
+                chunk_size = int((await self.reader.readline()).strip(), 16)
+                if chunk_size == 0:
+                    await self.reader.readline()
+                    break
+                data += await self.reader.readexactly(chunk_size)
+                await self.reader.readline()
+        else:
+            data = await self.reader.read()
+            headers["connection"] = "close"
+
+        if headers.get("connection", "").lower() == "close":
+            await self.close()
+        return status, data
+
+    async def close(self):
+        if self.writer is not None:
+            self.writer.close()
+            try:
+                await self.writer.wait_closed()
+            except ConnectionError:
+                pass
+        self.reader = self.writer = None
+
+
+class Recorder:
+    def __init__(self):
+        self.latencies = defaultdict(list)
+        self.errors = defaultdict(int)
+        self.requests = 0
+        self.journeys = defaultdict(int)
+
+    async def call(self, conn, step, method, path, body=None):
+        started = time.perf_counter()
+        try:
+            status, data = await conn.request(method, path, body)
+        except (OSError, ConnectionError, asyncio.IncompleteReadError, ValueError):
+            await conn.close()
+            status, data = 599, b""
+        self.latencies[step].append((time.perf_counter() - started) * 1000)
+        self.requests += 1
+        if status >= 400:
+            self.errors[step] += 1
+            return None
+        return data
+
+
+class VirtualUser:
+    def __init__(self, base_url, recorder, think_ms, rng):
+        parts = urlsplit(base_url)
+        self.conn = Connection(parts.hostname, parts.port or 80)
+        self.rec = recorder
+        self.think = think_ms / 1000
+        self.rng = rng
+        now = datetime.now()
+        self.month, self.year = now.month, now.year
+
+    async def open_page(self, path):
+        html = await self.rec.call(self.conn, f"GET {path}", "GET", path)
+        for asset in ASSET_RE.findall((html or b"").decode("utf-8", "ignore")):
+            await self.rec.call(self.conn, "GET /static/*", "GET", asset)
+        await self.rec.call(self.conn, "GET /api/env", "GET", "/api/env")
+
+    async def load_month(self, month, year):
+        # category-chart and latest-expenses each fetch the month
+        for _ in range(2):
+            await self.rec.call(
+                self.conn,
+                "GET /api/expenses (month)",
+                "GET",
+                f"/api/expenses?month={month}&year={year}",
+            )
+
+    async def browse_expenses(self):
+        await self.open_page("/expenses")
+        await self.rec.call(self.conn, "GET /api/months", "GET", "/api/months")
+        month, year = self.month, self.year
+        await self.load_month(month, year)
+        for _ in range(2):
+            await asyncio.sleep(self.think)
+            month, year = (12, year - 1) if month == 1 else (month - 1, year)
+            await self.load_month(month, year)
+
+    async def add_expense(self):
+        await self.open_page("/add")
+        await asyncio.sleep(self.think)
+        await self.rec.call(
+            self.conn,
+            "POST /api/expenses",
+            "POST",
+            "/api/expenses",
+            {
+                "amount": round(self.rng.uniform(2, 80), 2),
+                "category": self.rng.choice(["super", "food_drink", "transport"]),
+                "description": "Load test",
+            },
+        )
+        await self.load_month(self.month, self.year)
+
+    async def trends(self):
+        await self.open_page("/trends")
+        await self.rec.call(self.conn, "GET /api/trends", "GET", "/api/trends")
+
+    async def run(self, deadline):
+        names = list(JOURNEY_WEIGHTS)
+        weights = list(JOURNEY_WEIGHTS.values())
+        while time.monotonic() < deadline:
+            journey = self.rng.choices(names, weights)[0]
+            await getattr(self, journey)()
+            self.rec.journeys[journey] += 1
+            await asyncio.sleep(self.think)
+        await self.conn.close()
+
+
+async def run_stage(base_url, users, duration, think_ms, seed):
+    recorder = Recorder()
+    deadline = time.monotonic() + duration
+    started = time.perf_counter()
+    await asyncio.gather(
+        *(
+            VirtualUser(base_url, recorder, think_ms, random.Random(seed + i)).run(
+                deadline
+            )
+            for i in range(users)
+        )
+    )
+    elapsed = time.perf_counter() - started
+
+    steps = {}
+    for step, samples in sorted(recorder.latencies.items()):
+        summary = stats.summarize(samples)
+        summary["errors"] = recorder.errors.get(step, 0)
+        steps[step] = summary
+    total_errors = sum(recorder.errors.values())
+    return {
+        "users": users,
+        "duration_s": round(elapsed, 2),
+        "requests": recorder.requests,
+        "requests_per_s": round(recorder.requests / elapsed, 1),
+        "journeys": dict(recorder.journeys),
+        "error_rate": (
+            round(total_errors / recorder.requests, 4) if recorder.requests else 0.0
+        ),
+        "steps": steps,
+    }
+
+
+async def open_idle(base_url, count):
+    """Open `count` connections and leave them idle: even ones stream
+    /api/events, odd ones stay in keep-alive after GET /api/env. Returns
+    the open connections and the time each took to get its response."""
+    parts = urlsplit(base_url)
+
+    async def open_one(i):
+        started = time.perf_counter()
+        if i % 2:
+            conn = Connection(parts.hostname, parts.port)
+            status, _ = await conn.request("GET", "/api/env")
+        else:
+            reader, conn = await asyncio.open_connection(parts.hostname, parts.port)
+            conn.write(
+                f"GET /api/events HTTP/1.1\r\nHost: {parts.netloc}\r\n\r\n".encode()
+            )
+            status = int((await reader.readline()).split()[1])
+        if status != 200:
+            raise ConnectionError(f"status {status}")
+        return conn, (time.perf_counter() - started) * 1000
+
+    results = await asyncio.gather(
+        *(asyncio.wait_for(open_one(i), 30) for i in range(count)),
+        return_exceptions=True,
+    )
+    opened = [r for r in results if not isinstance(r, BaseException)]
+    return [conn for conn, _ in opened], [ms for _, ms in opened]
+
+
+async def close_idle(connections):
+    for conn in connections:
+        if isinstance(conn, Connection):
+            await conn.close()
+        else:
+            conn.close()
+
+
+def server_resources(pid):
+    """Threads and resident memory of the server process (Linux only)."""
+    try:
+        with open(f"/proc/{pid}/status") as f:
+            fields = dict(line.split(":", 1) for line in f)
+    except OSError:
+        return {}
+    return {
+        "threads": int(fields["Threads"]),
+        "rss_kb": int(fields["VmRSS"].split()[0]),
+    }
+
+
+async def run_all(args, base_url, process, report):
+    idle, open_ms = [], []
+    if args.idle:
+        idle, open_ms = await open_idle(base_url, args.idle)
+        report["idle"] = {
+            "requested": args.idle,
+            "opened": len(idle),
+            "open": stats.summarize(open_ms) if open_ms else None,
+            "server": server_resources(process.pid) if process else {},
+        }
+        print_idle(report["idle"])
+    try:
+        for users in args.users:
+            stage = await run_stage(
+                base_url, users, args.duration, args.think_ms, args.seed
+            )
+            report["stages"].append(stage)
+            print_stage(stage)
+    finally:
+        await close_idle(idle)
+
+
+def print_idle(idle):
+    print(f"\nIdle connections: {idle['opened']}/{idle['requested']} opened")
+    if idle["open"]:
+        print(
+            f"  time to response p50 {idle['open']['p50_ms']:.1f}ms, "
+            f"p95 {idle['open']['p95_ms']:.1f}ms"
+        )
+    if idle["server"]:
+        print(
+            f"  server: {idle['server']['threads']} threads, "
+            f"{idle['server']['rss_kb'] / 1024:.1f} MiB resident"
+        )
+
+
+def print_stage(stage):
+    print(
+        f"\n{stage['users']} users: {stage['requests_per_s']} req/s, "
+        f"{stage['requests']} requests, error rate {stage['error_rate']:.2%}"
+    )
+    print(f"  {'step':<34} {'n':>6} {'p50':>9} {'p95':>9} {'p99':>9} {'err':>5}")
+    for step, s in stage["steps"].items():
+        print(
+            f"  {step:<34} {s['n']:>6} {s['p50_ms']:>9.2f} {s['p95_ms']:>9.2f} "
+            f"{s['p99_ms']:>9.2f} {s['errors']:>5}"
+        )
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--url", help="target a running instance instead")
+    parser.add_argument("--users", type=int, nargs="+", default=[1, 5, 10, 25])
+    parser.add_argument("--duration", type=float, default=20.0)
+    parser.add_argument("--think-ms", type=float, default=50.0)
+    parser.add_argument("--size", type=int, default=100_000)
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--years", type=int, default=10)
+    parser.add_argument("--with-scheduler", action="store_true")
+    parser.add_argument("--job-interval", type=float, default=2.0)
+    parser.add_argument("--server", choices=("threaded", "asgi"), default="threaded")
+    parser.add_argument("--idle", type=int, default=0)
+    parser.add_argument("--out", help="write the JSON report here")
+    parser.add_argument("--serve-port", type=int, help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.serve_port:
+        serve(
+            args.serve_port,
+            args.size,
+            args.seed,
+            args.years,
+            args.with_scheduler,
+            args.job_interval,
+            args.server,
+            args.idle,
+        )
+        return 0
+
+    process, reader, job_log = None, None, []
+    base_url = args.url
+    if not base_url:
+        print(
+            f"Starting local {args.server} server on a {args.size}-expense "
+            "database ..."
+        )
+        process, reader, base_url, job_log = start_server(args)
+
+    report = {
+        "environment": stats.environment(),
+        "config": {
+            "url": base_url,
+            "size": None if args.url else args.size,
+            "duration_s": args.duration,
+            "think_ms": args.think_ms,
+            "with_scheduler": args.with_scheduler,
+            "server": None if args.url else args.server,
+            "idle": args.idle,
+        },
+        "stages": [],
+    }
+    try:
+        # One loop for the whole run: the idle connections outlive each stage
+        asyncio.run(run_all(args, base_url, process, report))
+    finally:
+        if process is not None:
+            process.terminate()
+            process.wait()
+            reader.join(timeout=5)
+
+    jobs = defaultdict(list)
+    for line in job_log:
+        if line.startswith("JOB "):
+            _, name, took = line.split()
+            jobs[name].append(float(took.rstrip("ms")))
+    if jobs:
+        report["jobs"] = {name: stats.summarize(s) for name, s in jobs.items()}
+        stats.print_table("Scheduler jobs under load", report["jobs"])
+
+    if args.out:
+        stats.write_report(args.out, report)
+        print(f"\nReport written to {args.out}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
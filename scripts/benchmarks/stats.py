@@ -0,0 +1,74 @@
+"""Latency summaries and baseline comparison shared by the benchmark scripts."""
+
+import json
+import platform
+import sqlite3
+from datetime import datetime
+
+
+def percentile(sorted_samples, pct):
+    """Nearest-rank percentile of an already sorted list."""
+    if not sorted_samples:
+        return 0.0
+    rank = max(1, -(-len(sorted_samples) * pct // 100))
+    return sorted_samples[int(rank) - 1]
+
+
+def summarize(samples_ms):
+    ordered = sorted(samples_ms)
+    return {
+        "n": len(ordered),
+        "mean_ms": round(sum(ordered) / len(ordered), 3) if ordered else 0.0,
+        "p50_ms": round(percentile(ordered, 50), 3),
+        "p95_ms": round(percentile(ordered, 95), 3),
+        "p99_ms": round(percentile(ordered, 99), 3),
+        "max_ms": round(ordered[-1], 3) if ordered else 0.0,
+    }
+
+
+def environment():
+    return {
+        "created_at": datetime.now().isoformat(timespec="seconds"),
+        "python": platform.python_version(),
+        "sqlite": sqlite3.sqlite_version,
+        "machine": platform.machine(),
+        "node": platform.node(),
+    }
+
+
+def print_table(title, results):
+    print(f"\n{title}")
+    print(f"  {'case':<44} {'p50':>9} {'p95':>9} {'p99':>9}  (ms)")
+    for name, summary in results.items():
+        print(
+            f"  {name:<44} {summary['p50_ms']:>9.2f} "
+            f"{summary['p95_ms']:>9.2f} {summary['p99_ms']:>9.2f}"
+        )
+
+
+def compare(current, baseline, tolerance):
+    """Return (label, case, baseline p95, current p95) for every regression.
+
+    Both arguments are the "results" mapping of a report: label -> case ->
+    summary. A case regresses when its p95 exceeds baseline p95 * tolerance.
+    """
+    regressions = []
+    for label, cases in current.items():
+        for case, summary in cases.items():
+            base = baseline.get(label, {}).get(case)
+            if not base or "p95_ms" not in summary:
+                continue
+            if summary["p95_ms"] > base["p95_ms"] * tolerance:
+                regressions.append((label, case, base["p95_ms"], summary["p95_ms"]))
+    return regressions
+
+
+def load_report(path):
+    with open(path) as f:
+        return json.load(f)
+
+
+def write_report(path, report):
+    with open(path, "w") as f:
+        json.dump(report, f, indent=2, sort_keys=True)
+        f.write("\n")
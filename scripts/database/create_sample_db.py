@@ -90,6 +90,7 @@ def create_sample_db():
     conn.close()
 
     print(f"Sample database created at: {db_path}")
+    print("Run scripts/database/migrate.py before starting the app.")
 
 
 if __name__ == "__main__":
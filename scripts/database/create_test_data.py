@@ -115,6 +115,8 @@ CATEGORIES = {
 
 def create_test_data():
     """Create test database with sample expenses."""
+    # The app refuses to start on a database that is behind its migrations
+    os.environ.setdefault("MIGRATE_ON_START", "1")
     from app import app, db, Expense
 
     # Use the app's instance folder
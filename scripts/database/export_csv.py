@@ -10,6 +10,10 @@ project_root = os.path.abspath(os.path.join(os.path.dirname(__file__), "../.."))
 exports_dir = os.path.join(os.path.dirname(__file__), "exports")
 os.makedirs(exports_dir, exist_ok=True)
 db_path = os.path.join(project_root, "instance", "expenses.db")
+# Follow the app when it runs against another absolute SQLite file
+db_url = os.environ.get("DATABASE_URL", "")
+if db_url.startswith("sqlite:////"):
+    db_path = db_url[len("sqlite:///") :]
 
 # Get current date and time for filename
 now = datetime.now()
@@ -24,9 +28,9 @@ try:
     # Get all expenses
     cursor.execute(
         """
-        SELECT date, amount, category, description
-        FROM expense
-        ORDER BY date DESC
+        SELECT expense.date, expense.amount, category.key, expense.description
+        FROM expense JOIN category ON category.id = expense.category_id
+        ORDER BY expense.date DESC
     """
     )
     # Write to CSV
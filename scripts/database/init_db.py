@@ -1,4 +1,4 @@
-from app import db, app
+from app import create_app, instance_path
 import os
 import logging
 import time
@@ -12,11 +12,11 @@ logger = logging.getLogger(__name__)
 
 def init_database():
     # Get the database path from Flask's instance folder
-    db_path = os.path.join(app.instance_path, "expenses.db")
+    db_path = os.path.join(instance_path, "expenses.db")
 
     logger.info(f"Database path: {db_path}")
     logger.info(f"Current working directory: {os.getcwd()}")
-    logger.info(f"Flask instance path: {app.instance_path}")
+    logger.info(f"Flask instance path: {instance_path}")
 
     # Remove existing database if it exists
     if os.path.exists(db_path):
@@ -28,13 +28,15 @@ def init_database():
             return False
 
     # Ensure instance folder exists
-    os.makedirs(app.instance_path, exist_ok=True)
-    logger.info(f"Ensured instance directory exists: {app.instance_path}")
+    os.makedirs(instance_path, exist_ok=True)
+    logger.info(f"Ensured instance directory exists: {instance_path}")
 
     # Create the database
     try:
+        app = create_app(
+            {"SCHEDULER": False, "JOB_WORKERS": 0, "MIGRATE_ON_START": True}
+        )
         with app.app_context():
-            db.create_all()
             logger.info("Successfully created database")
 
             # Wait a short moment to ensure the file system has processed the creation
@@ -44,9 +46,9 @@ def init_database():
             if not os.path.exists(db_path):
                 logger.error(f"Database file not found at expected path: {db_path}")
                 # Try to list directory contents to debug
-                dir_contents = os.listdir(app.instance_path)
+                dir_contents = os.listdir(instance_path)
                 logger.info(f"Instance directory contents: {dir_contents}")
-                parent_contents = os.listdir(os.path.dirname(app.instance_path))
+                parent_contents = os.listdir(os.path.dirname(instance_path))
                 logger.info(f"Parent directory contents: {parent_contents}")
                 return False
 
@@ -72,7 +74,7 @@ def init_database():
         logger.error(f"Error creating database: {e}")
         # Try to list directory contents to debug
         try:
-            dir_contents = os.listdir(app.instance_path)
+            dir_contents = os.listdir(instance_path)
             logger.info(f"Instance directory contents after error: {dir_contents}")
         except Exception as list_err:
             logger.error(f"Error listing directory: {list_err}")
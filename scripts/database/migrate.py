@@ -0,0 +1,60 @@
+"""
+Bring the database schema up to date.
+
+Run once per deploy, before starting the new code (the systemd unit and the
+Docker entrypoint do this):
+    python scripts/database/migrate.py            # apply pending migrations
+    python scripts/database/migrate.py --status   # applied and pending steps
+
+Steps are defined in app.py (MIGRATIONS); see services/migrations.py.
+"""
+
+import argparse
+import os
+import sys
+
+project_root = os.path.dirname(os.path.dirname(os.path.dirname(__file__)))
+sys.path.insert(0, os.path.abspath(project_root))
+
+from app import MIGRATIONS, create_app, db, migrate_database  # noqa: E402
+from services import migrations  # noqa: E402
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--status", action="store_true")
+    args = parser.parse_args()
+
+    # No schedules, workers or cache against a half-migrated database, and no
+    # refusal to start on one either: bringing it up to date is the point
+    app = create_app(
+        {
+            "SCHEDULER": False,
+            "JOB_WORKERS": 0,
+            "EXPENSE_CACHE": False,
+            "SCHEMA_CHECK": False,
+        }
+    )
+    with app.app_context(), db.engine.connect() as connection:
+        print(f"Database: {db.engine.url.database}")
+        applied = migrations.history(connection)
+        behind = migrations.pending(connection, MIGRATIONS)
+
+    if args.status:
+        for row in applied:
+            print(f"  {row['version']:>3}  applied  {row['applied_at']}  {row['name']}")
+        for migration in behind:
+            print(f"  {migration.version:>3}  pending  {migration.name}")
+        return 0
+
+    if not behind:
+        print("Schema is up to date.")
+        return 0
+    with app.app_context():
+        applied = migrate_database()
+    print(f"Migration complete: {len(applied)} step(s) applied.")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
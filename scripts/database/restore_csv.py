@@ -64,6 +64,7 @@ def restore_from_csv(csv_path):
             conn.commit()
             rows = cursor.rowcount
             print(f"Successfully restored {rows} expenses from backup!")
+            print("Run scripts/database/migrate.py before starting the app.")
 
     except Exception as e:
         print(f"Error restoring data: {e}")
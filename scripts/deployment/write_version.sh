@@ -0,0 +1,5 @@
+#!/bin/sh
+# Record the deployed commit in VERSION, which /api/env reports; the app
+# itself never runs git. Run after every checkout (the systemd units do).
+cd "$(dirname "$0")/../.." || exit 1
+git rev-parse --short HEAD > VERSION 2>/dev/null || echo unknown > VERSION
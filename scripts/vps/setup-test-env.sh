@@ -60,6 +60,8 @@ User=$USER
 WorkingDirectory=$APP_DIR
 Environment=FLASK_ENV=development
 Environment=FLASK_DEBUG=1
+ExecStartPre=/bin/sh $APP_DIR/scripts/deployment/write_version.sh
+ExecStartPre=$APP_DIR/venv/bin/python scripts/database/migrate.py
 ExecStart=$APP_DIR/venv/bin/python app.py
 Restart=always
 RestartSec=5
@@ -0,0 +1,190 @@
+"""
+Spending analytics over a date range.
+
+summarise() takes the (day, category, amount) rows of one SELECT, where
+`day` is the proleptic ordinal (date.toordinal()) computed by SQLite, so no
+row's date is parsed in Python. It needs rows from load_from(start) on: a
+year before the range for year-over-year deltas, which also covers the 90
+days behind the first rolling window.
+
+The work is linear in rows plus days x categories, with no per-window
+loops: each category's spend is bucketed into a flat per-day series and
+turned into prefix sums once, so every window total (each month, the 30 or
+90 days before each month end, the same days a year earlier) is a
+difference of two entries, computed a whole column at a time. Percentiles
+sort each month's amounts once.
+"""
+
+import calendar
+from datetime import date, timedelta
+from itertools import accumulate
+
+PERCENTILES = (50, 75, 90)
+ROLLING_WINDOWS = (30, 90)
+
+
+def _month_start(day):
+    return day.replace(day=1)
+
+
+def _month_end(day):
+    return day.replace(day=calendar.monthrange(day.year, day.month)[1])
+
+
+def _shift_year(day, years):
+    year = day.year + years
+    return day.replace(
+        year=year, day=min(day.day, calendar.monthrange(year, day.month)[1])
+    )
+
+
+def _months(start, end):
+    month = _month_start(start)
+    while month <= end:
+        yield month
+        month = _month_end(month) + timedelta(days=1)
+
+
+def load_from(start):
+    """First day whose rows summarise(start, ...) needs."""
+    return _shift_year(_month_start(start), -1)
+
+
+def percentile(values, q):
+    """q-th percentile of sorted `values`, interpolating linearly between
+    the closest ranks (NumPy's default method)."""
+    if not values:
+        return None
+    rank = (len(values) - 1) * q / 100
+    low = int(rank)
+    high = min(low + 1, len(values) - 1)
+    return values[low] + (values[high] - values[low]) * (rank - low)
+
+
+def _sums(prefix, ranges):
+    """Totals over [a, b) day-index ranges, from prefix sums."""
+    return [prefix[b] - prefix[a] for a, b in ranges]
+
+
+def _round(value):
+    return round(value, 2) if value is not None else None
+
+
+def summarise(rows, start, end):
+    """Per-month totals, percentiles and year-over-year change, per-category
+    rolling averages, and a projection for the month containing `end`."""
+    origin = load_from(start).toordinal()
+
+    def index(day):
+        return day.toordinal() - origin
+
+    size = index(end) + 1
+    months = [
+        (month, max(month, start), min(_month_end(month), end))
+        for month in _months(start, end)
+    ]
+    # [a, b) day-index ranges: each month in range, the same days a year
+    # earlier, and the windows ending on each month's last day in range
+    bounds = [(index(lo), index(hi) + 1) for _, lo, hi in months]
+    year_ago = [
+        (index(_shift_year(lo, -1)), index(_shift_year(hi, -1)) + 1)
+        for _, lo, hi in months
+    ]
+    windows = {w: [(max(b - w, 0), b) for _, b in bounds] for w in ROLLING_WINDOWS}
+    month_start = index(max(_month_start(end), start))
+
+    month_at = [None] * size
+    for position, (a, b) in enumerate(bounds):
+        month_at[a:b] = [position] * (b - a)
+
+    daily = {}
+    amounts = [[] for _ in months]
+    for day, category, amount in rows:
+        i = day - origin
+        series = daily.get(category)
+        if series is None:
+            series = daily[category] = [0.0] * size
+        series[i] += amount
+        if month_at[i] is not None:
+            amounts[month_at[i]].append(amount)
+
+    prefix = {c: [0.0, *accumulate(v)] for c, v in sorted(daily.items())}
+    overall = [0.0, *accumulate(map(sum, zip(*daily.values())))] if daily else None
+    overall = overall or [0.0] * (size + 1)
+
+    totals = _sums(overall, bounds)
+    previous = _sums(overall, year_ago)
+    by_month = {c: _sums(p, bounds) for c, p in prefix.items()}
+
+    result_months = []
+    for position, (month, _, _) in enumerate(months):
+        values = sorted(amounts[position])
+        total, before = totals[position], previous[position]
+        result_months.append(
+            {
+                "month": month.strftime("%Y-%m"),
+                "total": _round(total),
+                "count": len(values),
+                "percentiles": {
+                    f"p{q}": _round(percentile(values, q)) for q in PERCENTILES
+                },
+                "categories": {
+                    c: _round(sums[position])
+                    for c, sums in by_month.items()
+                    if sums[position]
+                },
+                "previous_year": _round(before),
+                "yoy_change": _round(total - before),
+                "yoy_percent": (
+                    _round((total - before) / before * 100) if before else None
+                ),
+            }
+        )
+
+    def average(p, days):
+        return (p[size] - p[max(size - days, 0)]) / days
+
+    categories = {
+        c: {
+            "total": _round(p[size] - p[index(start)]),
+            **{f"avg_{w}": _round(average(p, w)) for w in ROLLING_WINDOWS},
+            **{
+                f"rolling_{w}": [_round(t / w) for t in _sums(p, windows[w])]
+                for w in ROLLING_WINDOWS
+            },
+        }
+        for c, p in prefix.items()
+    }
+
+    # Month-end projection: spend so far plus the trailing 90-day daily rate
+    # for the days left in the month
+    remaining = (_month_end(end) - end).days
+
+    def projected(p):
+        return p[size] - p[month_start] + average(p, 90) * remaining
+
+    projection = {
+        "month": end.strftime("%Y-%m"),
+        "days_elapsed": end.day,
+        "days_in_month": _month_end(end).day,
+        "spent": _round(overall[size] - overall[month_start]),
+        "projected": _round(projected(overall)),
+        "categories": {
+            c: _round(projected(p)) for c, p in prefix.items() if projected(p)
+        },
+    }
+
+    return {
+        "from": start.isoformat(),
+        "to": end.isoformat(),
+        "months": result_months,
+        "categories": categories,
+        "projection": projection,
+    }
+
+
+def default_range(today=None):
+    """The twelve calendar months up to and including today."""
+    end = today or date.today()
+    year_ago = _shift_year(_month_start(end), -1)
+    return _month_start(year_ago + timedelta(days=31)), end
@@ -0,0 +1,390 @@
+"""
+ASGI serving mode.
+
+AsgiAdapter exposes the Flask app as an ASGI application. Views are still
+the same synchronous Flask views, run on a bounded thread pool (ASGI_THREADS),
+so routes behave exactly as under WSGI. What changes is what waits: idle
+keep-alive connections and open /api/events streams are coroutines on the
+event loop instead of one server thread each. A response body that supports
+`async for` (services.events.EventStream) is streamed from the loop; other
+bodies are read on the pool, in the same call as the view when the length
+is known.
+
+serve() is a small asyncio HTTP/1.1 server for it (keep-alive,
+Content-Length request bodies), so the mode needs nothing beyond the
+standard library. Start it with SERVER_MODE=asgi python app.py. It is meant
+for the home network and development: a connection that sends nothing for
+IDLE_TIMEOUT is closed, request bodies are capped at MAX_BODY_BYTES and
+ambiguous framing (conflicting Content-Length, or Content-Length with
+Transfer-Encoding) is refused, but it is no hardened front end. On an
+exposed host run `app:asgi_app` under a production ASGI server.
+"""
+
+import asyncio
+import contextlib
+import io
+import logging
+import sys
+from concurrent.futures import ThreadPoolExecutor
+from http import HTTPStatus
+from urllib.parse import unquote
+
+logger = logging.getLogger(__name__)
+
+MAX_HEADER_BYTES = 64 * 1024
+MAX_BODY_BYTES = 16 * 1024 * 1024
+# Seconds a connection may wait between requests or in the middle of one
+IDLE_TIMEOUT = 30.0
+
+
+def _environ(scope, body):
+    server = scope.get("server") or ("localhost", 80)
+    client = scope.get("client") or ("", 0)
+    environ = {
+        "REQUEST_METHOD": scope["method"],
+        "SCRIPT_NAME": scope.get("root_path", ""),
+        # WSGI carries the decoded path as latin-1 code points
+        "PATH_INFO": scope["path"].encode("utf-8").decode("latin-1"),
+        "QUERY_STRING": scope.get("query_string", b"").decode("latin-1"),
+        "SERVER_NAME": server[0],
+        "SERVER_PORT": str(server[1]),
+        "SERVER_PROTOCOL": f"HTTP/{scope.get('http_version', '1.1')}",
+        "REMOTE_ADDR": client[0],
+        "REMOTE_PORT": str(client[1]),
+        "wsgi.version": (1, 0),
+        "wsgi.url_scheme": scope.get("scheme", "http"),
+        "wsgi.input": io.BytesIO(body),
+        "wsgi.errors": sys.stderr,
+        "wsgi.multithread": True,
+        "wsgi.multiprocess": False,
+        "wsgi.run_once": False,
+    }
+    for raw_name, raw_value in scope.get("headers", ()):
+        name = raw_name.decode("latin-1").upper().replace("-", "_")
+        value = raw_value.decode("latin-1")
+        if name in ("CONTENT_TYPE", "CONTENT_LENGTH"):
+            environ[name] = value
+            continue
+        key = f"HTTP_{name}"
+        environ[key] = f"{environ[key]},{value}" if key in environ else value
+    return environ
+
+
+async def _read_body(receive):
+    chunks = []
+    while True:
+        message = await receive()
+        if message["type"] == "http.disconnect":
+            return None
+        chunks.append(message.get("body", b""))
+        if not message.get("more_body"):
+            return b"".join(chunks)
+
+
+async def _wait_for_disconnect(receive):
+    while (await receive())["type"] != "http.disconnect":
+        pass
+
+
+class AsgiAdapter:
+    def __init__(self, wsgi_app, threads=8):
+        self.wsgi_app = wsgi_app
+        self.executor = ThreadPoolExecutor(threads, thread_name_prefix="asgi")
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] == "http":
+            await self._http(scope, receive, send)
+        elif scope["type"] == "lifespan":
+            await self._lifespan(receive, send)
+        else:
+            raise ValueError(f"Unsupported ASGI scope {scope['type']!r}")
+
+    async def _lifespan(self, receive, send):
+        while True:
+            message = await receive()
+            if message["type"] == "lifespan.startup":
+                await send({"type": "lifespan.startup.complete"})
+            elif message["type"] == "lifespan.shutdown":
+                self.executor.shutdown(wait=False)
+                await send({"type": "lifespan.shutdown.complete"})
+                return
+
+    def _call(self, environ):
+        """Run the view (on the pool). Returns status, headers and either
+        the whole body or the body iterable to stream."""
+        started = {}
+
+        def start_response(status, headers, exc_info=None):
+            started["status"], started["headers"] = status, headers
+            return lambda data: None  # write() is not used by Flask
+
+        app_iter = self.wsgi_app(environ, start_response)
+        has_length = any(k.lower() == "content-length" for k, _ in started["headers"])
+        if has_length and not hasattr(app_iter, "__aiter__"):
+            try:
+                return started["status"], started["headers"], b"".join(app_iter), None
+            finally:
+                getattr(app_iter, "close", lambda: None)()
+        return started["status"], started["headers"], None, app_iter
+
+    async def _http(self, scope, receive, send):
+        body = await _read_body(receive)
+        if body is None:
+            return
+        loop = asyncio.get_running_loop()
+        status, headers, content, app_iter = await loop.run_in_executor(
+            self.executor, self._call, _environ(scope, body)
+        )
+        await send(
+            {
+                "type": "http.response.start",
+                "status": int(status.split(" ", 1)[0]),
+                "headers": [
+                    (name.lower().encode("latin-1"), value.encode("latin-1"))
+                    for name, value in headers
+                ],
+            }
+        )
+        if app_iter is None:
+            await send({"type": "http.response.body", "body": content})
+            return
+        try:
+            if hasattr(app_iter, "__aiter__"):
+                await self._stream_async(app_iter, receive, send)
+            else:
+                await self._stream(app_iter, send)
+        finally:
+            close = getattr(app_iter, "close", None)
+            if close is not None:
+                await loop.run_in_executor(self.executor, close)
+
+    async def _stream(self, app_iter, send):
+        loop = asyncio.get_running_loop()
+        chunks = iter(app_iter)
+        while (
+            chunk := await loop.run_in_executor(self.executor, next, chunks, None)
+        ) is not None:
+            await send({"type": "http.response.body", "body": chunk, "more_body": True})
+        await send({"type": "http.response.body", "body": b""})
+
+    async def _stream_async(self, app_iter, receive, send):
+        # A stream stops when the client goes away, not only at a failed write
+        disconnected = asyncio.ensure_future(_wait_for_disconnect(receive))
+        chunks = aiter(app_iter)
+        try:
+            while True:
+                next_chunk = asyncio.ensure_future(anext(chunks))
+                await asyncio.wait(
+                    (next_chunk, disconnected), return_when=asyncio.FIRST_COMPLETED
+                )
+                if disconnected.done():
+                    next_chunk.cancel()
+                    with contextlib.suppress(asyncio.CancelledError):
+                        await next_chunk
+                    return
+                try:
+                    chunk = next_chunk.result()
+                except StopAsyncIteration:
+                    break
+                await send(
+                    {"type": "http.response.body", "body": chunk, "more_body": True}
+                )
+            await send({"type": "http.response.body", "body": b""})
+        finally:
+            disconnected.cancel()
+            await chunks.aclose()
+
+
+def create_asgi_app(app):
+    app.config.setdefault("ASGI_THREADS", 8)
+    return AsgiAdapter(app, app.config["ASGI_THREADS"])
+
+
+# ---------------------------------------------------------------------------
+# Server
+# ---------------------------------------------------------------------------
+
+
+class _Reject(Exception):
+    """A request answered with `status` and then the connection closed."""
+
+    def __init__(self, status):
+        super().__init__(status.phrase)
+        self.status = status
+
+
+async def _read_request(reader, timeout):
+    """(method, target, version, headers) of the next request, or None at EOF
+    or when nothing arrives within `timeout`."""
+    try:
+        head = await asyncio.wait_for(reader.readuntil(b"\r\n\r\n"), timeout)
+    except (asyncio.IncompleteReadError, asyncio.TimeoutError):
+        return None
+    except asyncio.LimitOverrunError:
+        raise _Reject(HTTPStatus.REQUEST_HEADER_FIELDS_TOO_LARGE)
+    request_line, *lines = head[:-4].decode("latin-1").split("\r\n")
+    try:
+        method, target, version = request_line.split(" ", 2)
+    except ValueError:
+        raise _Reject(HTTPStatus.BAD_REQUEST)
+    if version not in ("HTTP/1.0", "HTTP/1.1"):
+        raise _Reject(HTTPStatus.HTTP_VERSION_NOT_SUPPORTED)
+    headers = []
+    for line in lines:
+        name, _, value = line.partition(":")
+        headers.append((name.strip().lower(), value.strip()))
+    return method, target, version, headers
+
+
+def _content_length(headers):
+    """The request body's length. Framing a proxy could read differently
+    from us (request smuggling) is refused rather than guessed."""
+    lengths = {value for name, value in headers if name == "content-length"}
+    if any(name == "transfer-encoding" for name, _ in headers):
+        if lengths:
+            raise _Reject(HTTPStatus.BAD_REQUEST)
+        raise _Reject(HTTPStatus.LENGTH_REQUIRED)  # chunked bodies unsupported
+    if len(lengths) > 1:
+        raise _Reject(HTTPStatus.BAD_REQUEST)
+    length = lengths.pop() if lengths else "0"
+    if not length.isdigit():
+        raise _Reject(HTTPStatus.BAD_REQUEST)
+    if int(length) > MAX_BODY_BYTES:
+        raise _Reject(HTTPStatus.REQUEST_ENTITY_TOO_LARGE)
+    return int(length)
+
+
+async def _handle(asgi_app, reader, writer, timeout=IDLE_TIMEOUT):
+    client = writer.get_extra_info("peername")[:2]
+    closed = asyncio.Event()
+    try:
+        while True:
+            try:
+                request = await _read_request(reader, timeout)
+                if request is None:
+                    return
+                method, target, version, headers = request
+                body = await asyncio.wait_for(
+                    reader.readexactly(_content_length(headers)), timeout
+                )
+            except _Reject as e:
+                writer.write(
+                    f"HTTP/1.1 {e.status.value} {e.status.phrase}\r\n"
+                    "Content-Length: 0\r\nConnection: close\r\n\r\n".encode()
+                )
+                return
+            except asyncio.TimeoutError:
+                return
+            fields = dict(headers)
+            keep_alive = (
+                fields.get("connection", "").lower() != "close"
+                if version == "HTTP/1.1"
+                else fields.get("connection", "").lower() == "keep-alive"
+            )
+            path, _, query = target.partition("?")
+            scope = {
+                "type": "http",
+                "asgi": {"version": "3.0"},
+                "http_version": version.split("/", 1)[1],
+                "method": method,
+                "scheme": "http",
+                "path": unquote(path),
+                "raw_path": path.encode("latin-1"),
+                "query_string": query.encode("latin-1"),
+                "root_path": "",
+                "headers": [
+                    (name.encode("latin-1"), value.encode("latin-1"))
+                    for name, value in headers
+                ],
+                "client": client,
+                "server": writer.get_extra_info("sockname")[:2],
+            }
+            response = {"streamed": False}
+            delivered = False
+
+            async def receive():
+                nonlocal delivered
+                if not delivered:
+                    delivered = True
+                    return {"type": "http.request", "body": body, "more_body": False}
+                # After the body, the next thing to hear is the client leaving
+                while await reader.read(4096):
+                    pass
+                closed.set()
+                return {"type": "http.disconnect"}
+
+            async def send(message):
+                if message["type"] == "http.response.start":
+                    names = {name.lower() for name, _ in message["headers"]}
+                    # No length: stream until the body ends, then close
+                    response["streamed"] = b"content-length" not in names
+                    lines = [
+                        f"HTTP/1.1 {message['status']} "
+                        f"{HTTPStatus(message['status']).phrase}".encode()
+                    ]
+                    lines += [
+                        name + b": " + value for name, value in message["headers"]
+                    ]
+                    if response["streamed"] or not keep_alive:
+                        lines.append(b"Connection: close")
+                    writer.write(b"\r\n".join(lines) + b"\r\n\r\n")
+                elif message["type"] == "http.response.body" and method != "HEAD":
+                    writer.write(message.get("body", b""))
+                await writer.drain()
+
+            await asgi_app(scope, receive, send)
+            if response["streamed"] or not keep_alive or closed.is_set():
+                return
+    except (ConnectionError, asyncio.IncompleteReadError):
+        pass
+    except Exception:
+        logger.exception("Error handling request")
+    finally:
+        writer.close()
+
+
+async def serve(
+    asgi_app, host="0.0.0.0", port=5001, ready=None, idle_timeout=IDLE_TIMEOUT
+):
+    """Serve `asgi_app` until cancelled. `ready`, if given, is called with
+    the bound (host, port) once the socket listens."""
+    connections = set()
+
+    async def connected(reader, writer):
+        connections.add(asyncio.current_task())
+        try:
+            await _handle(asgi_app, reader, writer, idle_timeout)
+        finally:
+            connections.discard(asyncio.current_task())
+
+    server = await asyncio.start_server(
+        connected,
+        host,
+        port,
+        limit=MAX_HEADER_BYTES,
+    )
+    address = server.sockets[0].getsockname()[:2]
+    logger.info(f"Serving ASGI on http://{address[0]}:{address[1]}")
+    if ready is not None:
+        ready(address)
+    async with server:
+        try:
+            await server.serve_forever()
+        finally:
+            # Open streams and idle keep-alive connections end with the server
+            for task in connections:
+                task.cancel()
+            await asyncio.gather(*connections, return_exceptions=True)
+            await _shutdown(asgi_app)
+
+
+async def _shutdown(asgi_app):
+    messages = [{"type": "lifespan.shutdown"}]
+
+    async def receive():
+        return messages.pop(0)
+
+    async def send(message):
+        pass
+
+    await asgi_app({"type": "lifespan"}, receive, send)
@@ -1,7 +1,8 @@
 """
 Bank sync service.
 
-sync_transactions() is called by APScheduler every 6 hours.
+sync_transactions() runs as a background job (services.jobs), every 6 hours
+from APScheduler or on demand from POST /api/bank/sync.
 It fetches settled BBVA transactions via Enable Banking, deduplicates them,
 maps merchants to categories, and inserts new Expense rows.
 """
@@ -10,16 +11,29 @@ import json
 import logging
 from datetime import datetime, timezone, timedelta
 
+from flask import current_app
+
+from services import events, metrics
+
 logger = logging.getLogger(__name__)
 
 
-def sync_transactions():
-    """Fetch new bank transactions and persist them as Expense rows."""
-    # Import here to avoid circular imports at module load time
-    from app import app, db, AppToken, SyncLog, Expense, MerchantMapping
+def sync_transactions(db, models, progress=None):
+    """Fetch new bank transactions and persist them as Expense rows.
+
+    `db` and `models` (AppToken, SyncLog, Expense and MerchantMapping as
+    attributes) are the running app's; importing them from `app` would load a
+    second copy of it when the server was started as `python app.py`.
+    progress(**fields), if given, is called as pages are fetched and rows
+    inserted. Returns the result: status ("ok", "skipped" or "error") plus
+    the transaction counts, or the error message.
+    """
+    report = progress or (lambda **fields: None)
+    AppToken, SyncLog = models.AppToken, models.SyncLog
+    Expense, MerchantMapping = models.Expense, models.MerchantMapping
     from services import enable_banking as eb
 
-    with app.app_context():
+    with metrics.track_job("bank_sync") as job:
         expenses_added = 0
         unclassified = 0
         try:
@@ -27,7 +41,8 @@ def sync_transactions():
             token_record = AppToken.query.get("enable_banking")
             if not token_record:
                 logger.warning("bank_sync: no AppToken for 'enable_banking', skipping")
-                return
+                job.outcome = "skipped"
+                return {"status": "skipped", "reason": "not connected"}
 
             token_data = json.loads(token_record.value)
 
@@ -45,7 +60,11 @@ def sync_transactions():
                 raise ValueError("ENABLE_BANKING_ACCOUNT_ID env var not set")
 
             # 4. Fetch transactions
-            transactions = eb.get_transactions(account_id, date_from)
+            transactions = eb.get_transactions(
+                account_id, date_from, on_page=lambda pages: report(pages=pages)
+            )
+            report(fetched=len(transactions))
+            duplicates = 0
 
             # 5. Load merchant mappings (case-insensitive substring match)
             mappings = MerchantMapping.query.all()
@@ -60,6 +79,7 @@ def sync_transactions():
 
                 # Dedup
                 if Expense.query.filter_by(external_id=ext_id).first():
+                    duplicates += 1
                     continue
 
                 # Map merchant → category
@@ -97,6 +117,7 @@ def sync_transactions():
                 )
                 db.session.add(expense)
                 expenses_added += 1
+                report(inserted=expenses_added)
 
             # 6. Update last_sync_at
             token_data["last_sync_at"] = datetime.now(timezone.utc).isoformat()
@@ -111,17 +132,35 @@ def sync_transactions():
                 )
             )
             db.session.commit()
+            for result, count in (
+                ("fetched", len(transactions)),
+                ("added", expenses_added),
+                ("unclassified", unclassified),
+                ("duplicate", duplicates),
+            ):
+                metrics.bank_sync_transactions.inc(result, amount=count)
+            result = {
+                "fetched": len(transactions),
+                "added": expenses_added,
+                "unclassified": unclassified,
+                "duplicate": duplicates,
+            }
+            current_app.extensions["event_broker"].publish(
+                events.SYNC_COMPLETED, result
+            )
             logger.info(
                 f"bank_sync: added {expenses_added} expenses "
                 f"({unclassified} unclassified)"
             )
+            return {"status": "ok", **result}
 
         except Exception as e:
             logger.error(f"bank_sync error: {e}", exc_info=True)
+            job.outcome = "error"
             db.session.rollback()
             try:
-                with app.app_context():
-                    db.session.add(SyncLog(status="error", error_message=str(e)))
-                    db.session.commit()
+                db.session.add(SyncLog(status="error", error_message=str(e)))
+                db.session.commit()
             except Exception:
                 pass
+            return {"status": "error", "error": str(e)}
@@ -0,0 +1,126 @@
+"""
+Expense categories.
+
+Categories are rows of the category table; expenses reference them by a
+small integer category_id. The API keeps speaking category keys ("super",
+"food_drink"), so CategoryLookup translates between keys and ids from an
+in-memory map of the table, reloaded when it misses. Expenses have always
+accepted free-text categories, so an unknown key is inserted on first use,
+inside the caller's session: it commits or rolls back with the expense.
+
+DEFAULT_CATEGORIES seeds a new table. From then on the table is the source
+of truth and categories can be added or edited without a deploy.
+"""
+
+import hashlib
+import json
+
+from sqlalchemy import insert, select
+
+DEFAULT_CATEGORIES = {
+    "super": {"label": "Super", "color": "#3b82f6", "icon": "shopping_cart"},
+    "xofa": {"label": "Xofa", "color": "#8b5cf6", "icon": "home"},
+    "food_drink": {"label": "Food & Drink", "color": "#10b981", "icon": "restaurant"},
+    "save_inv": {"label": "Save & Invest", "color": "#06b6d4", "icon": "savings"},
+    "recurrent": {"label": "Recurrent", "color": "#f59e0b", "icon": "repeat"},
+    "clothing": {"label": "Clothing", "color": "#ec4899", "icon": "checkroom"},
+    "personal": {"label": "Personal", "color": "#a855f7", "icon": "person"},
+    "taxes": {"label": "Taxes", "color": "#ef4444", "icon": "receipt_long"},
+    "transport": {"label": "Transport", "color": "#6366f1", "icon": "directions_car"},
+    "car": {"label": "Car", "color": "#64748b", "icon": "directions_car"},
+    "health": {"label": "Health", "color": "#14b8a6", "icon": "favorite"},
+    "cobeetrans": {
+        "label": "Cobee Trans",
+        "color": "#7c3aed",
+        "icon": "directions_bus",
+    },
+    "cobeefood": {"label": "Cobee Food", "color": "#f97316", "icon": "local_cafe"},
+    "other": {"label": "Other", "color": "#94a3b8", "icon": "more_horiz"},
+}
+DEFAULT_COLOR = DEFAULT_CATEGORIES["other"]["color"]
+DEFAULT_ICON = DEFAULT_CATEGORIES["other"]["icon"]
+
+
+def default_rows():
+    """Rows seeding an empty category table, in display order."""
+    return [
+        {"key": key, "position": position, **meta}
+        for position, (key, meta) in enumerate(DEFAULT_CATEGORIES.items())
+    ]
+
+
+def new_category(key, position):
+    """Row for a key first seen on an expense: labelled with the key itself."""
+    return {
+        "key": key,
+        "label": key,
+        "color": DEFAULT_COLOR,
+        "icon": DEFAULT_ICON,
+        "position": position,
+    }
+
+
+class CategoryLookup:
+    def __init__(self, db, table):
+        self.db = db
+        self.table = table
+        self.clear()
+
+    def clear(self):
+        """Forget the map; the next lookup reloads it."""
+        self._ids = {}  # key -> id
+        self._keys = {}  # id -> key
+
+    def _load(self):
+        t = self.table
+        with self.db.session.no_autoflush:
+            rows = self.db.session.execute(select(t.c.id, t.c.key)).all()
+        self._ids = {key: category_id for category_id, key in rows}
+        self._keys = {category_id: key for category_id, key in rows}
+
+    def find(self, key):
+        """Id of an existing category key, or None."""
+        if key not in self._ids:
+            self._load()
+        return self._ids.get(key)
+
+    def key(self, category_id):
+        if category_id is None:
+            return None
+        if category_id not in self._keys:
+            self._load()
+        return self._keys.get(category_id)
+
+    def id_for(self, key):
+        """Id of `key`, creating the category if it does not exist yet."""
+        if key is None:
+            return None
+        category_id = self.find(key)
+        if category_id is not None:
+            return category_id
+        session = self.db.session
+        with session.no_autoflush:
+            session.execute(
+                insert(self.table)
+                .prefix_with("OR IGNORE")
+                .values(new_category(key, len(self._ids)))
+            )
+        session.info["new_categories"] = True
+        self._load()
+        return self._ids[key]
+
+    def listing(self):
+        """{key: {label, color, icon, position}} in display order, and an
+        ETag over it."""
+        t = self.table
+        rows = self.db.session.execute(
+            select(t.c.key, t.c.label, t.c.color, t.c.icon, t.c.position).order_by(
+                t.c.position, t.c.id
+            )
+        ).all()
+        body = {
+            key: {"label": label, "color": color, "icon": icon, "position": position}
+            for key, label, color, icon, position in rows
+        }
+        digest = hashlib.sha256(json.dumps(body, sort_keys=True).encode())
+        return body, digest.hexdigest()[:16]
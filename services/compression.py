@@ -0,0 +1,164 @@
+"""
+Response compression.
+
+- API payloads (JSON, msgpack, CBOR) at or above COMPRESS_MIN_BYTES are
+  compressed per request with brotli or gzip, whichever the client prefers
+  (brotli only when the `brotli` package is installed).
+- Static files are never compressed per request. precompress_static() writes
+  `.br`/`.gz` siblings next to each text asset, at image build time
+  (`python -m services.compression`) or on startup, and
+  send_static_precompressed() serves the best sibling the client accepts.
+"""
+
+import gzip
+import logging
+import mimetypes
+import os
+import sys
+
+from flask import request, send_from_directory
+from werkzeug.security import safe_join
+
+try:
+    import brotli
+except ImportError:  # pragma: no cover - depends on the environment
+    brotli = None
+
+logger = logging.getLogger(__name__)
+
+COMPRESSIBLE_MIMETYPES = {
+    "application/json",
+    "application/msgpack",
+    "application/cbor",
+}
+STATIC_EXTENSIONS = (".js", ".css", ".html", ".svg", ".json", ".webmanifest")
+# (Content-Encoding, file suffix), preferred first
+STATIC_ENCODINGS = (("br", ".br"), ("gzip", ".gz"))
+
+
+def encode(data, encoding, static=False):
+    """Compress `data`; static=True trades speed for the smallest output."""
+    if encoding == "br":
+        return brotli.compress(data, quality=11 if static else 4)
+    return gzip.compress(data, compresslevel=9 if static else 6, mtime=0)
+
+
+def supported_encodings():
+    return ["br", "gzip"] if brotli is not None else ["gzip"]
+
+
+def negotiate_encoding(offered):
+    """Best Content-Encoding among `offered` for the current request."""
+    accepted = request.accept_encodings
+    best = max(offered, key=lambda encoding: accepted[encoding], default=None)
+    if best is None or accepted[best] <= 0:
+        return None
+    return best
+
+
+def compress_response(response, min_bytes):
+    if (
+        response.status_code != 200
+        or response.direct_passthrough
+        or response.is_streamed
+        or "Content-Encoding" in response.headers
+        or response.mimetype not in COMPRESSIBLE_MIMETYPES
+    ):
+        return response
+    response.vary.add("Accept-Encoding")
+    data = response.get_data()
+    if len(data) < min_bytes:
+        return response
+    encoding = negotiate_encoding(supported_encodings())
+    if encoding is None:
+        return response
+    response.set_data(encode(data, encoding))
+    response.headers["Content-Encoding"] = encoding
+    etag, weak = response.get_etag()
+    if etag:
+        # The view tagged (and checked) the identity body; each encoding is
+        # a different representation, so it needs its own tag and check.
+        response.set_etag(f"{etag}-{encoding}", weak)
+        response.make_conditional(request)
+    return response
+
+
+def precompress_static(static_dir, min_bytes=1024):
+    """Write .br/.gz siblings for text assets that lack an up-to-date one.
+
+    Returns the number of files written.
+    """
+    written = 0
+    for root, _, files in os.walk(static_dir):
+        for name in files:
+            if not name.endswith(STATIC_EXTENSIONS):
+                continue
+            path = os.path.join(root, name)
+            stat = os.stat(path)
+            if stat.st_size < min_bytes:
+                continue
+            data = None
+            for encoding, suffix in STATIC_ENCODINGS:
+                if encoding == "br" and brotli is None:
+                    continue
+                target = path + suffix
+                if os.path.exists(target) and os.stat(target).st_mtime >= stat.st_mtime:
+                    continue
+                if data is None:
+                    with open(path, "rb") as f:
+                        data = f.read()
+                tmp = f"{target}.tmp"
+                with open(tmp, "wb") as f:
+                    f.write(encode(data, encoding, static=True))
+                os.replace(tmp, target)
+                written += 1
+    return written
+
+
+def send_static_precompressed(directory, filename, **kwargs):
+    """send_from_directory() that prefers a fresh .br/.gz sibling."""
+    source = safe_join(directory, filename)
+    offered = {}
+    if source and os.path.isfile(source):
+        source_mtime = os.stat(source).st_mtime
+        for encoding, suffix in STATIC_ENCODINGS:
+            sibling = source + suffix
+            if os.path.isfile(sibling) and os.stat(sibling).st_mtime >= source_mtime:
+                offered[encoding] = suffix
+
+    encoding = negotiate_encoding(list(offered)) if offered else None
+    if encoding is None:
+        response = send_from_directory(directory, filename, **kwargs)
+    else:
+        response = send_from_directory(
+            directory,
+            filename + offered[encoding],
+            mimetype=mimetypes.guess_type(filename)[0] or "application/octet-stream",
+            **kwargs,
+        )
+        response.headers["Content-Encoding"] = encoding
+    response.vary.add("Accept-Encoding")
+    return response
+
+
+def init_compression(app):
+    app.config.setdefault("COMPRESS_MIN_BYTES", 1024)
+    app.config.setdefault("PRECOMPRESS_STATIC", True)
+
+    if app.config["PRECOMPRESS_STATIC"]:
+        try:
+            written = precompress_static(app.static_folder)
+            if written:
+                logger.info(f"Precompressed {written} static files")
+        except OSError as e:
+            # Read-only deployments rely on the build step instead
+            logger.warning(f"Could not precompress static files: {e}")
+
+    @app.after_request
+    def compress(response):
+        return compress_response(response, app.config["COMPRESS_MIN_BYTES"])
+
+
+if __name__ == "__main__":
+    static_dir = sys.argv[1] if len(sys.argv) > 1 else "static"
+    print(f"Precompressed {precompress_static(static_dir)} files in {static_dir}")
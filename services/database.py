@@ -0,0 +1,173 @@
+"""
+SQLite connection roles: WAL, a read-only engine for safe requests and one
+writer at a time.
+
+init_database() switches file databases to write-ahead logging, so readers
+see the last committed state without blocking or delaying a writer, and
+builds a second engine on the same file opened read-only (`mode=ro`, plus
+`PRAGMA query_only`) with its own pool (READ_POOL_SIZE connections, 0 turns
+it off). ReadRoutingSession sends what db.session reads during a GET or HEAD
+request to that engine; flushes, and every request marked @writes_on_get,
+stay on the app's engine. Long reads (trends, analytics, exports) then run
+on reader connections while bank sync and the recurring job write.
+
+SQLite admits a single writer. Instead of letting concurrent writers poll
+the file lock (busy timeout), each write transaction on the app's engine
+takes a process-wide lock at its first INSERT/UPDATE/DELETE or DDL statement
+and releases it on commit or rollback. Waits are queued in this process and
+recorded in pf_db_write_wait_seconds. After WRITE_LOCK_TIMEOUT the writer
+proceeds anyway and SQLite's own locking decides, as before.
+"""
+
+import logging
+import re
+import sqlite3
+import threading
+import time
+from urllib.parse import quote
+
+from flask import current_app, has_request_context, request
+from flask_sqlalchemy.session import Session
+from sqlalchemy import Delete, Insert, Update, create_engine, event
+from sqlalchemy.engine import URL
+
+from services import metrics
+
+logger = logging.getLogger(__name__)
+
+EXTENSION_KEY = "read_engine"
+SAFE_METHODS = frozenset(("GET", "HEAD"))
+# pysqlite's default busy timeout
+WRITE_LOCK_TIMEOUT = 5.0
+
+_WRITE_STATEMENT = re.compile(
+    r"\s*(INSERT|UPDATE|DELETE|REPLACE|CREATE|DROP|ALTER)\b", re.IGNORECASE
+)
+
+db_write_wait = metrics.REGISTRY.register(
+    metrics.Histogram(
+        "pf_db_write_wait_seconds",
+        "Time a write transaction waited for the single SQLite writer slot.",
+    )
+)
+
+
+def writes_on_get(view):
+    """Keep a view on the app's engine for GET requests too (it writes)."""
+    view.writes_on_get = True
+    return view
+
+
+def _reads_routed():
+    if not has_request_context() or request.method not in SAFE_METHODS:
+        return False
+    view = current_app.view_functions.get(request.endpoint)
+    return not getattr(view, "writes_on_get", False)
+
+
+class ReadRoutingSession(Session):
+    """db.session: reads in safe requests go to the read-only engine."""
+
+    def get_bind(self, mapper=None, clause=None, bind=None, **kwargs):
+        if (
+            bind is None
+            and not self._flushing
+            and not isinstance(clause, (Insert, Update, Delete))
+            and _reads_routed()
+        ):
+            engine = current_app.extensions.get(EXTENSION_KEY)
+            if engine is not None:
+                return engine
+        return super().get_bind(mapper=mapper, clause=clause, bind=bind, **kwargs)
+
+
+def read_engine(app, db):
+    """The app's read-only engine, or its main engine when there is none."""
+    engine = app.extensions.get(EXTENSION_KEY)
+    if engine is None:
+        with app.app_context():
+            engine = db.engine
+    return engine
+
+
+def _database_path(engine):
+    path = engine.url.database
+    if engine.dialect.name != "sqlite" or not path or path == ":memory:":
+        return None
+    if path.startswith("file:"):
+        return None  # already a URI; leave it alone
+    return path
+
+
+def _use_wal(dbapi_connection, connection_record):
+    cursor = dbapi_connection.cursor()
+    try:
+        # Persistent in the file: a no-op once any connection has set it
+        cursor.execute("PRAGMA journal_mode=WAL")
+        # Safe under WAL: a power cut can lose the last commits, not the file
+        cursor.execute("PRAGMA synchronous=NORMAL")
+    except sqlite3.OperationalError as e:
+        logger.warning(f"Could not enable WAL: {e}")
+    finally:
+        cursor.close()
+
+
+def _query_only(dbapi_connection, connection_record):
+    dbapi_connection.execute("PRAGMA query_only=ON")
+
+
+def _serialize_writes(engine):
+    lock = threading.RLock()
+
+    @event.listens_for(engine, "before_cursor_execute")
+    def take(conn, cursor, statement, parameters, context, executemany):
+        # True: holds the lock; False: gave up on it for this transaction
+        if "write_lock" in conn.info or not _WRITE_STATEMENT.match(statement):
+            return
+        started = time.perf_counter()
+        conn.info["write_lock"] = lock.acquire(timeout=WRITE_LOCK_TIMEOUT)
+        if not conn.info["write_lock"]:
+            logger.warning(
+                f"Waited {WRITE_LOCK_TIMEOUT:.0f}s for the writer; this "
+                "transaction continues without it, so writes are not "
+                "serialized until it ends"
+            )
+        db_write_wait.observe(time.perf_counter() - started)
+
+    def release(conn):
+        if conn.info.pop("write_lock", False):
+            lock.release()
+
+    event.listen(engine, "commit", release)
+    event.listen(engine, "rollback", release)
+
+
+def init_database(app, db):
+    """Set up the app's engine (already made by db.init_app) and the
+    read-only engine next to it."""
+    app.config.setdefault("SQLITE_WAL", True)
+    app.config.setdefault("READ_POOL_SIZE", 5)
+    with app.app_context():
+        writer = db.engine
+    path = _database_path(writer)
+    if path is None:
+        return None
+
+    if app.config["SQLITE_WAL"]:
+        event.listen(writer, "connect", _use_wal)
+    _serialize_writes(writer)
+
+    if not app.config["READ_POOL_SIZE"]:
+        return None
+    reader = create_engine(
+        URL.create(
+            "sqlite",
+            database=f"file:{quote(path)}",
+            query={"mode": "ro", "uri": "true"},
+        ),
+        pool_size=app.config["READ_POOL_SIZE"],
+        max_overflow=app.config["READ_POOL_SIZE"],
+    )
+    event.listen(reader, "connect", _query_only)
+    app.extensions[EXTENSION_KEY] = reader
+    return reader
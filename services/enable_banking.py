@@ -126,26 +126,40 @@ def exchange_code(code: str) -> dict:
     }
 
 
-def get_transactions(account_id: str, date_from: datetime) -> list:
+def _transaction_pages(account_id: str, date_from: datetime):
+    """Yield the raw transaction lists, following continuation_key."""
+    params = {"date_from": date_from.strftime("%Y-%m-%d"), "status": "booked"}
+    while True:
+        resp = requests.get(
+            f"{_BASE_URL}/accounts/{account_id}/transactions",
+            params=params,
+            headers=_headers(),
+            timeout=30,
+        )
+        resp.raise_for_status()
+        raw = resp.json()
+        yield raw.get("transactions", [])
+        if not raw.get("continuation_key"):
+            return
+        params = {**params, "continuation_key": raw["continuation_key"]}
+
+
+def get_transactions(account_id: str, date_from: datetime, on_page=None) -> list:
     """Fetch booked transactions for an account since date_from.
 
+    on_page(pages_fetched) is called after each page of results.
+
     Returns a list of dicts with keys:
         external_id, amount, currency, date, merchant, description
     """
-    resp = requests.get(
-        f"{_BASE_URL}/accounts/{account_id}/transactions",
-        params={
-            "date_from": date_from.strftime("%Y-%m-%d"),
-            "status": "booked",
-        },
-        headers=_headers(),
-        timeout=30,
-    )
-    resp.raise_for_status()
-    raw = resp.json()
+    raw_transactions = []
+    for pages, page in enumerate(_transaction_pages(account_id, date_from), 1):
+        raw_transactions.extend(page)
+        if on_page:
+            on_page(pages)
 
     transactions = []
-    for txn in raw.get("transactions", []):
+    for txn in raw_transactions:
         amount = txn.get("transaction_amount", {})
         amount_value = abs(float(amount.get("amount", 0)))
         # Only ingest debits (expenses)
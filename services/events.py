@@ -0,0 +1,191 @@
+"""
+Server-Sent Events change stream.
+
+EventBroker fans published events out to every connected /api/events
+client. Each event is encoded once, in the SSE wire format, and the same
+string is queued for every subscriber. Queues are bounded and publish()
+never blocks: a subscriber that falls SSE_QUEUE_SIZE events behind has its
+backlog replaced by a single `resync` event, so a stalled tab cannot grow
+memory or hold up a writer. Clients answer `resync` by refetching what they
+show.
+
+Event types:
+
+- expense.created / expense.updated: data is the expense's to_dict()
+- expense.deleted: data is {"id", "date"} of the removed expense
+- sync.completed: data is the bank sync result counts
+- resync: the client missed events and must reload
+"""
+
+import asyncio
+import json
+import logging
+import queue
+import threading
+
+from services import metrics
+
+logger = logging.getLogger(__name__)
+
+EXPENSE_CREATED = "expense.created"
+EXPENSE_UPDATED = "expense.updated"
+EXPENSE_DELETED = "expense.deleted"
+SYNC_COMPLETED = "sync.completed"
+RESYNC = "resync"
+
+RETRY_MS = 5000
+
+
+def format_event(event_type, data, event_id=None):
+    lines = []
+    if event_id is not None:
+        lines.append(f"id: {event_id}")
+    lines.append(f"event: {event_type}")
+    payload = json.dumps(data, separators=(",", ":"), default=str)
+    lines.append(f"data: {payload}")
+    return "\n".join(lines) + "\n\n"
+
+
+class Subscription:
+    def __init__(self, maxsize):
+        self.queue = queue.Queue(maxsize)
+        # Called after every put; async readers use it to wake their loop
+        self.notify = None
+
+    def put(self, message):
+        try:
+            self.queue.put_nowait(message)
+        except queue.Full:
+            # Everything queued is stale once the client must reload anyway
+            with self.queue.mutex:
+                dropped = len(self.queue.queue)
+                self.queue.queue.clear()
+            self.queue.put_nowait(format_event(RESYNC, {}))
+            sse_events_dropped.inc(amount=dropped + 1)
+        if self.notify is not None:
+            self.notify()
+
+
+class EventStream:
+    """Response body of one /api/events client, as encoded SSE messages.
+
+    Iterating it blocks the calling thread on the subscription queue, which
+    is what a WSGI server does. `async for` (services.asgi) waits on the
+    event loop instead, so an open stream holds no thread. Closing it
+    unsubscribes.
+    """
+
+    def __init__(self, broker, subscription, heartbeat=15.0):
+        self.broker = broker
+        self.subscription = subscription
+        self.heartbeat = heartbeat
+
+    def __iter__(self):
+        yield f"retry: {RETRY_MS}\n\n".encode()
+        while True:
+            try:
+                message = self.subscription.queue.get(timeout=self.heartbeat)
+            except queue.Empty:
+                message = ": keepalive\n\n"
+            yield message.encode()
+
+    async def _aiter(self):
+        loop = asyncio.get_running_loop()
+        wake = asyncio.Event()
+        self.subscription.notify = lambda: loop.call_soon_threadsafe(wake.set)
+        try:
+            yield f"retry: {RETRY_MS}\n\n".encode()
+            while True:
+                wake.clear()
+                try:
+                    message = self.subscription.queue.get_nowait()
+                except queue.Empty:
+                    try:
+                        await asyncio.wait_for(wake.wait(), self.heartbeat)
+                        continue
+                    except asyncio.TimeoutError:
+                        message = ": keepalive\n\n"
+                yield message.encode()
+        finally:
+            self.subscription.notify = None
+
+    def __aiter__(self):
+        return self._aiter()
+
+    def close(self):
+        self.subscription.notify = None
+        self.broker.unsubscribe(self.subscription)
+
+
+class EventBroker:
+    def __init__(self, queue_size=256, max_clients=32):
+        self.queue_size = queue_size
+        self.max_clients = max_clients
+        self._subscribers = set()
+        self._lock = threading.Lock()
+        self._next_id = 0
+
+    def __len__(self):
+        return len(self._subscribers)
+
+    def subscribe(self):
+        """A new Subscription, or None when max_clients are connected."""
+        with self._lock:
+            if len(self._subscribers) >= self.max_clients:
+                return None
+            subscription = Subscription(self.queue_size)
+            self._subscribers.add(subscription)
+            return subscription
+
+    def unsubscribe(self, subscription):
+        with self._lock:
+            self._subscribers.discard(subscription)
+
+    def publish(self, event_type, data):
+        # Held across the fan-out so every client sees events in id order
+        with self._lock:
+            self._next_id += 1
+            message = format_event(event_type, data, self._next_id)
+            for subscription in self._subscribers:
+                subscription.put(message)
+        sse_events.inc(event_type)
+
+    def stream(self, subscription, heartbeat=15.0):
+        """An EventStream of SSE messages for `subscription`.
+
+        A comment line is sent every `heartbeat` seconds without events, so
+        proxies keep the connection open and a dead client is noticed on the
+        next write.
+        """
+        return EventStream(self, subscription, heartbeat)
+
+
+sse_events = metrics.REGISTRY.register(
+    metrics.Counter(
+        "pf_sse_events_total",
+        "Change events published to /api/events subscribers, by type.",
+        ("type",),
+    )
+)
+sse_events_dropped = metrics.REGISTRY.register(
+    metrics.Counter(
+        "pf_sse_events_dropped_total",
+        "Events discarded from full subscriber queues (replaced by resync).",
+    )
+)
+
+
+def init_events(app):
+    app.config.setdefault("SSE_QUEUE_SIZE", 256)
+    app.config.setdefault("SSE_MAX_CLIENTS", 32)
+    app.config.setdefault("SSE_HEARTBEAT_SECONDS", 15.0)
+    broker = EventBroker(app.config["SSE_QUEUE_SIZE"], app.config["SSE_MAX_CLIENTS"])
+    app.extensions["event_broker"] = broker
+    metrics.REGISTRY.register(
+        metrics.Gauge(
+            "pf_sse_subscribers",
+            "Connected /api/events clients.",
+            callback=lambda: {(): len(broker)},
+        )
+    )
+    return broker
@@ -0,0 +1,238 @@
+"""
+Process-local columnar mirror of the expense table.
+
+Four parallel arrays (stdlib `array`, one machine value per row, sorted by
+day) hold each expense's day ordinal, amount, category id and id. A range
+aggregate finds its slice with two binary searches over the days and sums it
+in one pass, without a round trip to SQLite.
+
+Every read first checks PRAGMA data_version on the cache's own connection.
+It changes whenever any other connection commits: a request in this process,
+a job worker or another process altogether. When it has moved, the expense
+rows changed since the last refresh are read from change_log (its triggers
+log every insert, update and delete, whoever made them) and applied in
+place. The arrays are rebuilt instead on first use, after a schema change
+(PRAGMA schema_version, e.g. tables dropped and recreated) and when more than
+REBUILD_THRESHOLD rows changed at once, where reloading is cheaper.
+
+Enabled with EXPENSE_CACHE (default on). Callers fall back to SQL when off.
+"""
+
+import logging
+import sys
+import threading
+from array import array
+from bisect import bisect_left, bisect_right
+from datetime import datetime, timezone
+
+from sqlalchemy import Integer, cast, func, select
+
+from services import metrics
+from services.database import read_engine
+
+logger = logging.getLogger(__name__)
+
+EXTENSION_KEY = "expense_cache"
+REBUILD_THRESHOLD = 256
+
+COLUMNS = {"days": "l", "amounts": "d", "category_ids": "H", "ids": "q"}
+
+
+def day_ordinal(column):
+    """SQL for a DateTime column's date as date.toordinal(): the Julian day
+    number of a date is its ordinal + 1721425, and julianday() is that
+    minus 0.5 at midnight."""
+    return cast(func.julianday(column) + 0.5, Integer) - 1721425
+
+
+class ExpenseCache:
+    def __init__(self, app, db, table, change_log, category_key):
+        self.app = app
+        self.db = db
+        self.table = table
+        self.change_log = change_log
+        self.category_key = category_key  # category id -> key
+        self._lock = threading.Lock()
+        self._conn = None
+        self._version = None  # (schema_version, data_version) last seen
+        self._seq = 0  # change_log position applied up to
+        self.rebuilds = 0
+        self.applied = 0
+        self.built_at = None
+        self._reset()
+
+    @property
+    def enabled(self):
+        return self.app.config["EXPENSE_CACHE"]
+
+    def _reset(self):
+        for name, typecode in COLUMNS.items():
+            setattr(self, name, array(typecode))
+
+    # -- reads -------------------------------------------------------------
+
+    def _span(self, first, last):
+        return bisect_left(self.days, first), bisect_right(self.days, last)
+
+    def category_totals(self, first, last):
+        """{category: total} over the day ordinals first..last (inclusive)."""
+        with self._lock:
+            self._refresh()
+            lo, hi = self._span(first, last)
+            totals = {}
+            for category_id, amount in zip(
+                self.category_ids[lo:hi], self.amounts[lo:hi]
+            ):
+                totals[category_id] = totals.get(category_id, 0.0) + amount
+        return {self.category_key(c): total for c, total in totals.items()}
+
+    def rows(self, first, last):
+        """(day, category, amount) of every expense in first..last."""
+        with self._lock:
+            self._refresh()
+            lo, hi = self._span(first, last)
+            days, amounts = self.days[lo:hi], self.amounts[lo:hi]
+            category_ids = self.category_ids[lo:hi]
+        keys = {c: self.category_key(c) for c in set(category_ids)}
+        return list(zip(days, [keys[c] for c in category_ids], amounts))
+
+    def footprint(self):
+        """Row count and memory used by the arrays, for the debug endpoint."""
+        with self._lock:
+            columns = {
+                name: {
+                    "typecode": getattr(self, name).typecode,
+                    "bytes": len(getattr(self, name)) * getattr(self, name).itemsize,
+                    "allocated_bytes": sys.getsizeof(getattr(self, name)),
+                }
+                for name in COLUMNS
+            }
+            return {
+                "enabled": self.enabled,
+                "rows": len(self.ids),
+                "categories": len(set(self.category_ids)),
+                "columns": columns,
+                "bytes": sum(c["bytes"] for c in columns.values()),
+                "allocated_bytes": sum(c["allocated_bytes"] for c in columns.values()),
+                "change_log_seq": self._seq,
+                "rebuilds": self.rebuilds,
+                "applied_changes": self.applied,
+                "built_at": self.built_at.isoformat() if self.built_at else None,
+            }
+
+    # -- freshness ---------------------------------------------------------
+
+    def _connection(self):
+        # One long-lived read-only connection: data_version is per connection
+        if self._conn is None:
+            self._conn = read_engine(self.app, self.db).connect()
+        return self._conn
+
+    def _refresh(self):
+        conn = self._connection()
+        try:
+            version = (
+                conn.exec_driver_sql("PRAGMA schema_version").scalar(),
+                conn.exec_driver_sql("PRAGMA data_version").scalar(),
+            )
+            metrics.record_cache("expense_cache", version == self._version)
+            if version == self._version:
+                return
+            if self._version is None or version[0] != self._version[0]:
+                self._rebuild(conn)
+            else:
+                self._catch_up(conn)
+            self._version = version
+        finally:
+            conn.rollback()
+
+    def _rebuild(self, conn):
+        t, log = self.table, self.change_log
+        # Position first: changes committed while loading are applied again
+        seq = conn.execute(select(func.coalesce(func.max(log.c.seq), 0))).scalar()
+        day = day_ordinal(t.c.date)
+        rows = conn.execute(
+            select(day, t.c.amount, t.c.category_id, t.c.id).order_by(day, t.c.id)
+        )
+        self._reset()
+        days, amounts, ids = self.days, self.amounts, self.ids
+        category_ids = self.category_ids
+        for row_day, amount, category_id, row_id in rows:
+            days.append(row_day)
+            amounts.append(amount)
+            category_ids.append(category_id)
+            ids.append(row_id)
+        self._seq = seq
+        self.rebuilds += 1
+        self.built_at = datetime.now(timezone.utc)
+        logger.info(f"Expense cache built: {len(ids)} rows")
+
+    def _catch_up(self, conn):
+        t, log = self.table, self.change_log
+        changes = conn.execute(
+            select(log.c.seq, log.c.row_id)
+            .where(log.c.table_name == t.name, log.c.seq > self._seq)
+            .order_by(log.c.seq)
+        ).all()
+        if not changes:
+            return
+        if len(changes) > REBUILD_THRESHOLD:
+            self._rebuild(conn)
+            return
+        changed = [row_id for _, row_id in changes]
+        current = {
+            row_id: (row_day, amount, category_id)
+            for row_id, row_day, amount, category_id in conn.execute(
+                select(
+                    t.c.id, day_ordinal(t.c.date), t.c.amount, t.c.category_id
+                ).where(t.c.id.in_(changed))
+            )
+        }
+        for row_id in changed:
+            self._remove(row_id)
+            if row_id in current:
+                self._insert(row_id, *current[row_id])
+        self._seq = changes[-1].seq
+        self.applied += len(changed)
+
+    def _remove(self, row_id):
+        try:
+            i = self.ids.index(row_id)
+        except ValueError:
+            return
+        for name in COLUMNS:
+            del getattr(self, name)[i]
+
+    def _insert(self, row_id, day, amount, category_id):
+        i = bisect_right(self.days, day)
+        self.days.insert(i, day)
+        self.amounts.insert(i, amount)
+        self.category_ids.insert(i, category_id)
+        self.ids.insert(i, row_id)
+
+    def warm(self):
+        """Build the arrays on a background thread, so the first request
+        does not pay for it."""
+
+        def build():
+            try:
+                with self.app.app_context(), self._lock:
+                    self._refresh()
+            except Exception as e:
+                logger.warning(f"Expense cache warm-up failed: {e}")
+
+        threading.Thread(target=build, name="expense-cache-warm", daemon=True).start()
+
+
+def init_expense_cache(app, db, table, change_log, category_key):
+    app.config.setdefault("EXPENSE_CACHE", True)
+    cache = ExpenseCache(app, db, table, change_log, category_key)
+    app.extensions[EXTENSION_KEY] = cache
+    metrics.REGISTRY.register(
+        metrics.Gauge(
+            "pf_expense_cache_rows",
+            "Expenses held in the in-memory columnar cache.",
+            callback=lambda: {(): len(cache.ids)},
+        )
+    )
+    return cache
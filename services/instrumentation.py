@@ -0,0 +1,166 @@
+"""
+Per-request timing and query accounting.
+
+init_instrumentation() hooks SQLAlchemy cursor events and Flask request
+hooks so every response carries a Server-Timing header splitting the request
+into SQL time (with the query count), to_dict serialization, response
+encoding (JSON, msgpack or CBOR) and the remainder (routing, ORM hydration,
+handler logic). Requests slower than SLOW_REQUEST_MS are also logged as a
+single JSON line. The same hooks feed the request and query histograms in
+services.metrics and the optional slow-query profiler in services.sql_profiler.
+"""
+
+import functools
+import json
+import logging
+import time
+
+from flask import g, has_request_context, request
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+from services import metrics, sql_profiler
+from services.serialization import FastJSONProvider
+
+logger = logging.getLogger(__name__)
+
+
+class RequestTiming:
+    __slots__ = ("started", "queries", "db", "serialize", "json")
+
+    def __init__(self):
+        self.started = time.perf_counter()
+        self.queries = 0
+        self.db = 0.0
+        self.serialize = 0.0
+        self.json = 0.0
+
+
+def current_timing():
+    """The RequestTiming for the active request, or None outside requests."""
+    if has_request_context():
+        return g.get("_timing")
+    return None
+
+
+def timed(section):
+    """Decorator adding the wrapped call's duration to a timing section.
+
+    Nested calls (a to_dict calling another to_dict) are only counted once.
+    """
+
+    def decorator(func):
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            timing = current_timing()
+            if timing is None or g.get("_timing_active"):
+                return func(*args, **kwargs)
+            g._timing_active = True
+            started = time.perf_counter()
+            try:
+                return func(*args, **kwargs)
+            finally:
+                g._timing_active = False
+                elapsed = time.perf_counter() - started
+                setattr(timing, section, getattr(timing, section) + elapsed)
+
+        return wrapper
+
+    return decorator
+
+
+def _book_encoding(method):
+    @functools.wraps(method)
+    def wrapper(self, *args, **kwargs):
+        timing = current_timing()
+        if timing is None:
+            return method(self, *args, **kwargs)
+        started = time.perf_counter()
+        try:
+            return method(self, *args, **kwargs)
+        finally:
+            timing.json += time.perf_counter() - started
+
+    return wrapper
+
+
+class TimingJSONProvider(FastJSONProvider):
+    """Response encoder that books encoding time to the request."""
+
+    dumps = _book_encoding(FastJSONProvider.dumps)
+    pack = _book_encoding(FastJSONProvider.pack)
+
+
+def _before_cursor_execute(conn, cursor, statement, parameters, context, many):
+    conn.info.setdefault("query_start", []).append(time.perf_counter())
+
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, many):
+    elapsed = time.perf_counter() - conn.info["query_start"].pop()
+    metrics.db_query_duration.observe(elapsed)
+    sql_profiler.profile_statement(conn, statement, parameters, many, elapsed)
+    timing = current_timing()
+    if timing is not None:
+        timing.queries += 1
+        timing.db += elapsed
+
+
+def _ms(seconds):
+    return round(seconds * 1000, 2)
+
+
+def init_instrumentation(app):
+    app.config.setdefault("SLOW_REQUEST_MS", 500.0)
+    app.json = TimingJSONProvider(app)
+    sql_profiler.init_sql_profiler(app)
+
+    if not event.contains(Engine, "before_cursor_execute", _before_cursor_execute):
+        event.listen(Engine, "before_cursor_execute", _before_cursor_execute)
+        event.listen(Engine, "after_cursor_execute", _after_cursor_execute)
+
+    @app.before_request
+    def start_timing():
+        g._timing = RequestTiming()
+
+    @app.after_request
+    def add_server_timing(response):
+        timing = g.pop("_timing", None)
+        if timing is None:
+            return response
+        total = time.perf_counter() - timing.started
+        # Label by URL rule, not path, so ids don't explode the label set
+        route = request.url_rule.rule if request.url_rule else "unmatched"
+        labels = (route, request.method, str(response.status_code))
+        metrics.http_requests.inc(*labels)
+        metrics.http_request_duration.observe(total, *labels)
+
+        other = max(total - timing.db - timing.serialize - timing.json, 0.0)
+        response.headers["Server-Timing"] = ", ".join(
+            [
+                f'db;dur={_ms(timing.db)};desc="{timing.queries} queries"',
+                f"serialize;dur={_ms(timing.serialize)}",
+                f"json;dur={_ms(timing.json)}",
+                f"app;dur={_ms(other)}",
+                f"total;dur={_ms(total)}",
+            ]
+        )
+
+        if total * 1000 >= app.config["SLOW_REQUEST_MS"]:
+            logger.warning(
+                "slow_request %s",
+                json.dumps(
+                    {
+                        "method": request.method,
+                        "path": request.path,
+                        "endpoint": request.endpoint,
+                        "status": response.status_code,
+                        "total_ms": _ms(total),
+                        "db_ms": _ms(timing.db),
+                        "queries": timing.queries,
+                        "serialize_ms": _ms(timing.serialize),
+                        "json_ms": _ms(timing.json),
+                        "app_ms": _ms(other),
+                    }
+                ),
+            )
+        return response
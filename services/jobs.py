@@ -0,0 +1,398 @@
+"""
+Durable background job queue.
+
+Jobs live in the app database (the job_queue table), so queued work and
+retries survive a restart. A pool of JOB_WORKERS threads claims jobs with a
+single UPDATE ... RETURNING, which SQLite serialises, so a job is never
+claimed twice (SQLite before 3.35 has no RETURNING; there the UPDATE is
+conditional on the job still being ready):
+
+- priority: higher runs first, then oldest run_at
+- dedupe_key: enqueueing while a job with the same key is queued or running
+  returns that job (a unique index over active jobs enforces it)
+- retries: a handler that raises is re-queued with exponential backoff until
+  max_attempts, then marked failed
+- visibility timeout: a claimed job is leased for JOB_VISIBILITY_SECONDS; if
+  its worker dies (or the process restarts) the job is claimed again once the
+  lease expires, unless that was its last attempt: then it is marked failed
+  (a job that kills its worker cannot retry forever). Handlers must
+  therefore be safe to re-run. job.update()
+  renews the lease once half of it has passed, so a long job that reports
+  progress keeps it; only the attempt holding the lease records an outcome.
+
+Handlers are registered per kind and called as handler(job) inside an app
+context. job.update(**progress) publishes progress counters; they are kept in
+memory while the job runs (a write per update would contend with the job's
+own transaction) and stored with the result.
+"""
+
+import json
+import logging
+import sqlite3
+import threading
+import time
+import uuid
+from datetime import datetime, timedelta, timezone
+
+from sqlalchemy import and_, func, insert, or_, select, update
+from sqlalchemy.exc import OperationalError
+
+from services import metrics
+
+logger = logging.getLogger(__name__)
+
+QUEUED = "queued"
+RUNNING = "running"
+SUCCEEDED = "succeeded"
+FAILED = "failed"
+ACTIVE = (QUEUED, RUNNING)
+
+MAX_BACKOFF_SECONDS = 3600
+UPDATE_RETURNING = sqlite3.sqlite_version_info >= (3, 35)
+
+
+def _utcnow():
+    # Naive UTC, as SQLite stores the other DateTime columns
+    return datetime.now(timezone.utc).replace(tzinfo=None)
+
+
+def _iso(value):
+    return value.isoformat() if value else None
+
+
+class Handler:
+    def __init__(self, func, priority=0, max_attempts=3):
+        self.func = func
+        self.priority = priority
+        self.max_attempts = max_attempts
+
+
+class RunningJob:
+    """What a handler gets: the claimed row's id, kind, payload and attempt."""
+
+    def __init__(self, queue, row):
+        self.id = row.id
+        self.kind = row.kind
+        self.payload = json.loads(row.payload) if row.payload else None
+        self.attempt = row.attempts
+        self.locked_until = row.locked_until
+        self.progress = {}
+        self._queue = queue
+
+    def update(self, **progress):
+        self.progress = {**self.progress, **progress}
+        self._queue._live[self.id] = self.progress
+        self._queue.renew(self)
+
+
+class JobQueue:
+    def __init__(self, app, db, table):
+        self.app = app
+        self.db = db
+        self.table = table
+        self.handlers = {}
+        self._live = {}  # job id -> progress of jobs running in this process
+        self._wake = threading.Event()
+        self._stop = threading.Event()
+        self._workers = []
+        self._engine_ref = None
+
+    def register(self, kind, func, priority=0, max_attempts=3):
+        self.handlers[kind] = Handler(func, priority, max_attempts)
+
+    def _engine(self):
+        if self._engine_ref is None:
+            with self.app.app_context():
+                self._engine_ref = self.db.engine
+        return self._engine_ref
+
+    # -- producers ---------------------------------------------------------
+
+    def enqueue(self, kind, payload=None, dedupe_key=None, priority=None, delay=0):
+        """Queue a `kind` job. Returns (job dict, created); created is False
+        when an active job with the same dedupe_key was returned instead."""
+        handler = self.handlers[kind]
+        t = self.table
+        now = _utcnow()
+        job_id = uuid.uuid4().hex
+        with self._engine().begin() as conn:
+            # OR IGNORE: the partial unique index on active dedupe keys
+            inserted = conn.execute(
+                insert(t)
+                .prefix_with("OR IGNORE")
+                .values(
+                    id=job_id,
+                    kind=kind,
+                    dedupe_key=dedupe_key,
+                    priority=handler.priority if priority is None else priority,
+                    status=QUEUED,
+                    payload=json.dumps(payload) if payload is not None else None,
+                    attempts=0,
+                    max_attempts=handler.max_attempts,
+                    run_at=now + timedelta(seconds=delay),
+                    created_at=now,
+                )
+            ).rowcount
+            if not inserted:
+                job_id = conn.execute(
+                    select(t.c.id).where(
+                        t.c.dedupe_key == dedupe_key, t.c.status.in_(ACTIVE)
+                    )
+                ).scalar_one()
+        self._wake.set()
+        return self.get(job_id), bool(inserted)
+
+    def get(self, job_id):
+        t = self.table
+        with self._engine().connect() as conn:
+            row = conn.execute(select(t).where(t.c.id == job_id)).first()
+        if row is None:
+            return None
+        progress = self._live.get(job_id)
+        if progress is None:
+            progress = json.loads(row.progress) if row.progress else {}
+        return {
+            "id": row.id,
+            "kind": row.kind,
+            "status": row.status,
+            "priority": row.priority,
+            "attempts": row.attempts,
+            "max_attempts": row.max_attempts,
+            "progress": progress,
+            "result": json.loads(row.result) if row.result else None,
+            "error": row.error,
+            "created_at": _iso(row.created_at),
+            "run_at": _iso(row.run_at),
+            "started_at": _iso(row.started_at),
+            "finished_at": _iso(row.finished_at),
+        }
+
+    def depth(self):
+        """{(kind, status): count} of queued and running jobs."""
+        t = self.table
+        try:
+            with self._engine().connect() as conn:
+                rows = conn.execute(
+                    select(t.c.kind, t.c.status, func.count())
+                    .where(t.c.status.in_(ACTIVE))
+                    .group_by(t.c.kind, t.c.status)
+                ).all()
+        except OperationalError:
+            return {}
+        return {(kind, status): count for kind, status, count in rows}
+
+    # -- consumers ---------------------------------------------------------
+
+    def _lease(self, now):
+        return now + timedelta(seconds=self.app.config["JOB_VISIBILITY_SECONDS"])
+
+    def _held(self, job_id, attempt):
+        """The job's row while `attempt` still holds its lease."""
+        t = self.table
+        return and_(t.c.id == job_id, t.c.attempts == attempt, t.c.status == RUNNING)
+
+    def claim(self):
+        """Lease the next ready job, or return None."""
+        t = self.table
+        now = _utcnow()
+        expired = and_(t.c.status == RUNNING, t.c.locked_until < now)
+        ready = or_(
+            and_(t.c.status == QUEUED, t.c.run_at <= now),
+            and_(expired, t.c.attempts < t.c.max_attempts),
+        )
+        # Lost its worker on the last attempt: no outcome was ever recorded
+        give_up = (
+            update(t)
+            .where(expired, t.c.attempts >= t.c.max_attempts)
+            .values(
+                status=FAILED,
+                error="lease expired on the last attempt",
+                finished_at=now,
+                locked_until=None,
+            )
+        )
+        candidate = (
+            select(t.c.id)
+            .where(ready)
+            .order_by(t.c.priority.desc(), t.c.run_at)
+            .limit(1)
+        )
+        take = update(t).values(
+            status=RUNNING,
+            attempts=t.c.attempts + 1,
+            locked_until=self._lease(now),
+            started_at=now,
+        )
+        columns = (
+            t.c.id,
+            t.c.kind,
+            t.c.payload,
+            t.c.attempts,
+            t.c.max_attempts,
+            t.c.run_at,
+            t.c.locked_until,
+        )
+        with self._engine().begin() as conn:
+            conn.execute(give_up)
+            if UPDATE_RETURNING:
+                return conn.execute(
+                    take.where(t.c.id == candidate.scalar_subquery()).returning(
+                        *columns
+                    )
+                ).first()
+            # Pick, then take it only if it is still ready: another process
+            # may have claimed it between the two statements
+            while (job_id := conn.execute(candidate).scalar()) is not None:
+                if conn.execute(take.where(t.c.id == job_id, ready)).rowcount:
+                    return conn.execute(
+                        select(*columns).where(t.c.id == job_id)
+                    ).first()
+            return None
+
+    def renew(self, job):
+        """Extend `job`'s lease once half of it has passed. A failed renewal
+        (the database is busy) is retried on the next progress update."""
+        now = _utcnow()
+        half = timedelta(seconds=self.app.config["JOB_VISIBILITY_SECONDS"] / 2)
+        if job.locked_until is None or job.locked_until - now > half:
+            return
+        locked_until = self._lease(now)
+        try:
+            with self._engine().begin() as conn:
+                renewed = conn.execute(
+                    update(self.table)
+                    .where(self._held(job.id, job.attempt))
+                    .values(locked_until=locked_until)
+                ).rowcount
+        except OperationalError as e:
+            logger.debug(f"job {job.kind} {job.id} lease renewal failed: {e}")
+            return
+        if renewed:
+            job.locked_until = locked_until
+        else:
+            logger.warning(
+                f"job {job.kind} {job.id} attempt {job.attempt} lost its lease"
+            )
+
+    def execute(self, row):
+        """Run a claimed job and record its outcome."""
+        job = RunningJob(self, row)
+        self._live[job.id] = job.progress
+        job_queue_wait.observe(
+            max((_utcnow() - row.run_at).total_seconds(), 0), row.kind
+        )
+        started = time.perf_counter()
+        values = {}
+        try:
+            handler = self.handlers.get(row.kind)
+            if handler is None:
+                raise LookupError(f"no handler for job kind {row.kind!r}")
+            with self.app.app_context():
+                result = handler.func(job)
+            outcome = SUCCEEDED
+            values = {"result": json.dumps(result), "error": None}
+        except Exception as e:
+            logger.error(
+                f"job {row.kind} {row.id} attempt {row.attempts} failed: {e}",
+                exc_info=True,
+            )
+            values = {"error": str(e)}
+            outcome = FAILED if row.attempts >= row.max_attempts else "retry"
+        job_queue_run.observe(time.perf_counter() - started, row.kind, outcome)
+
+        now = _utcnow()
+        if outcome == "retry":
+            backoff = self.app.config["JOB_RETRY_BACKOFF_SECONDS"]
+            delay = min(backoff * 2 ** (row.attempts - 1), MAX_BACKOFF_SECONDS)
+            values.update(
+                status=QUEUED, run_at=now + timedelta(seconds=delay), locked_until=None
+            )
+        else:
+            values.update(status=outcome, finished_at=now, locked_until=None)
+        values["progress"] = json.dumps(job.progress)
+        with self._engine().begin() as conn:
+            recorded = conn.execute(
+                update(self.table)
+                .where(self._held(row.id, row.attempts))
+                .values(**values)
+            ).rowcount
+        if not recorded:
+            # The lease expired and a newer attempt owns the row now
+            logger.warning(
+                f"job {row.kind} {row.id} attempt {row.attempts} finished after "
+                f"losing its lease; outcome {outcome} not recorded"
+            )
+        if self._live.get(job.id) is job.progress:
+            del self._live[job.id]
+        return outcome
+
+    def run_pending(self):
+        """Run ready jobs on the calling thread until none is left."""
+        ran = 0
+        while (row := self.claim()) is not None:
+            self.execute(row)
+            ran += 1
+        return ran
+
+    def _work(self):
+        poll = self.app.config["JOB_POLL_SECONDS"]
+        while not self._stop.is_set():
+            try:
+                row = self.claim()
+            except OperationalError as e:
+                # Locked by a long write, or tables not created yet
+                logger.debug(f"job queue poll failed: {e}")
+                row = None
+            if row is None:
+                self._wake.wait(poll)
+                self._wake.clear()
+                continue
+            self.execute(row)
+
+    def start(self, workers):
+        for i in range(workers):
+            thread = threading.Thread(
+                target=self._work, name=f"job-worker-{i}", daemon=True
+            )
+            thread.start()
+            self._workers.append(thread)
+
+    def stop(self):
+        self._stop.set()
+        self._wake.set()
+
+
+job_queue_wait = metrics.REGISTRY.register(
+    metrics.Histogram(
+        "pf_job_queue_wait_seconds",
+        "Time a ready job waited in the queue before a worker claimed it.",
+        ("kind",),
+        buckets=metrics.JOB_BUCKETS,
+    )
+)
+job_queue_run = metrics.REGISTRY.register(
+    metrics.Histogram(
+        "pf_job_queue_run_seconds",
+        "Queued job run time by outcome (succeeded, retry, failed).",
+        ("kind", "outcome"),
+        buckets=metrics.JOB_BUCKETS,
+    )
+)
+
+
+def init_jobs(app, db, table):
+    app.config.setdefault("JOB_WORKERS", 2)
+    app.config.setdefault("JOB_POLL_SECONDS", 5.0)
+    app.config.setdefault("JOB_VISIBILITY_SECONDS", 600)
+    app.config.setdefault("JOB_RETRY_BACKOFF_SECONDS", 30)
+    queue = JobQueue(app, db, table)
+    app.extensions["job_queue"] = queue
+    metrics.REGISTRY.register(
+        metrics.Gauge(
+            "pf_job_queue_depth",
+            "Jobs queued or running, by kind and status.",
+            ("kind", "status"),
+            callback=queue.depth,
+        )
+    )
+    return queue
@@ -0,0 +1,255 @@
+"""
+In-process metrics in the Prometheus text exposition format.
+
+A deliberately small subset of prometheus_client: counters, histograms and
+callback gauges keyed by label tuples. Each metric guards its own dict with a
+lock held only for a dict update, so recording from request threads and
+scheduler jobs stays cheap, and a scrape only formats what is already there.
+"""
+
+import bisect
+import threading
+import time
+from contextlib import contextmanager
+
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+QUERY_BUCKETS = (0.0001, 0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.5)
+JOB_BUCKETS = (0.01, 0.05, 0.1, 0.5, 1.0, 5.0, 10.0, 30.0, 60.0, 120.0)
+
+
+def _format_labels(names, values, extra=()):
+    pairs = list(zip(names, values)) + list(extra)
+    if not pairs:
+        return ""
+    escaped = (
+        (k, str(v).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n"))
+        for k, v in pairs
+    )
+    return "{" + ",".join(f'{k}="{v}"' for k, v in escaped) + "}"
+
+
+def _format_value(value):
+    if value == float("inf"):
+        return "+Inf"
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+class Counter:
+    kind = "counter"
+
+    def __init__(self, name, documentation, labelnames=()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._values = {}
+        self._lock = threading.Lock()
+
+    def inc(self, *labelvalues, amount=1):
+        with self._lock:
+            self._values[labelvalues] = self._values.get(labelvalues, 0) + amount
+
+    def value(self, *labelvalues):
+        return self._values.get(labelvalues, 0)
+
+    def samples(self):
+        with self._lock:
+            items = list(self._values.items())
+        for labels, value in sorted(items):
+            yield self.name, _format_labels(self.labelnames, labels), value
+
+
+class Histogram:
+    kind = "histogram"
+
+    def __init__(self, name, documentation, labelnames=(), buckets=LATENCY_BUCKETS):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self.buckets = tuple(buckets)
+        # labels -> [per-bucket counts..., +Inf count, sum]
+        self._values = {}
+        self._lock = threading.Lock()
+
+    def observe(self, seconds, *labelvalues):
+        index = bisect.bisect_left(self.buckets, seconds)
+        with self._lock:
+            state = self._values.get(labelvalues)
+            if state is None:
+                state = self._values[labelvalues] = [0] * (len(self.buckets) + 1) + [
+                    0.0
+                ]
+            state[index] += 1
+            state[-1] += seconds
+
+    def count(self, *labelvalues):
+        state = self._values.get(labelvalues)
+        return sum(state[:-1]) if state else 0
+
+    def samples(self):
+        with self._lock:
+            items = [(labels, list(state)) for labels, state in self._values.items()]
+        for labels, state in sorted(items):
+            cumulative = 0
+            for bound, count in zip(self.buckets + (float("inf"),), state[:-1]):
+                cumulative += count
+                le = (("le", _format_value(bound)),)
+                yield (
+                    f"{self.name}_bucket",
+                    _format_labels(self.labelnames, labels, le),
+                    cumulative,
+                )
+            label_str = _format_labels(self.labelnames, labels)
+            yield f"{self.name}_count", label_str, cumulative
+            yield f"{self.name}_sum", label_str, state[-1]
+
+
+class Gauge:
+    """Gauge whose samples come from a callback evaluated at scrape time.
+
+    The callback returns {labelvalues_tuple: value}.
+    """
+
+    kind = "gauge"
+
+    def __init__(self, name, documentation, labelnames=(), callback=None):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self.callback = callback
+
+    def samples(self):
+        values = self.callback() if self.callback else {}
+        for labels, value in sorted(values.items()):
+            yield self.name, _format_labels(self.labelnames, labels), value
+
+
+class Registry:
+    def __init__(self):
+        self._metrics = {}
+
+    def register(self, metric):
+        self._metrics[metric.name] = metric
+        return metric
+
+    def get(self, name):
+        return self._metrics.get(name)
+
+    def render(self):
+        lines = []
+        for metric in self._metrics.values():
+            lines.append(f"# HELP {metric.name} {metric.documentation}")
+            lines.append(f"# TYPE {metric.name} {metric.kind}")
+            for name, labels, value in metric.samples():
+                lines.append(f"{name}{labels} {_format_value(value)}")
+        return "\n".join(lines) + "\n"
+
+
+REGISTRY = Registry()
+
+http_requests = REGISTRY.register(
+    Counter(
+        "pf_http_requests_total",
+        "HTTP requests by route, method and status.",
+        ("route", "method", "status"),
+    )
+)
+http_request_duration = REGISTRY.register(
+    Histogram(
+        "pf_http_request_duration_seconds",
+        "HTTP request latency by route, method and status.",
+        ("route", "method", "status"),
+    )
+)
+db_query_duration = REGISTRY.register(
+    Histogram(
+        "pf_db_query_duration_seconds",
+        "SQL statement execution time.",
+        buckets=QUERY_BUCKETS,
+    )
+)
+job_runs = REGISTRY.register(
+    Counter(
+        "pf_job_runs_total",
+        "Scheduler job runs by outcome.",
+        ("job", "outcome"),
+    )
+)
+job_duration = REGISTRY.register(
+    Histogram(
+        "pf_job_duration_seconds",
+        "Scheduler job duration by outcome.",
+        ("job", "outcome"),
+        buckets=JOB_BUCKETS,
+    )
+)
+bank_sync_transactions = REGISTRY.register(
+    Counter(
+        "pf_bank_sync_transactions_total",
+        "Bank transactions seen by sync, by result "
+        "(fetched, added, unclassified, duplicate).",
+        ("result",),
+    )
+)
+cache_requests = REGISTRY.register(
+    Counter(
+        "pf_cache_requests_total",
+        "Cache lookups by cache and result (hit, miss).",
+        ("cache", "result"),
+    )
+)
+
+
+def _hit_ratios():
+    totals = {}
+    for (cache, result), count in list(cache_requests._values.items()):
+        hits, lookups = totals.get(cache, (0, 0))
+        totals[cache] = (hits + (count if result == "hit" else 0), lookups + count)
+    return {(cache,): hits / lookups for cache, (hits, lookups) in totals.items()}
+
+
+REGISTRY.register(
+    Gauge(
+        "pf_cache_hit_ratio",
+        "Share of cache lookups served from the cache since start.",
+        ("cache",),
+        callback=_hit_ratios,
+    )
+)
+
+
+def record_cache(cache, hit):
+    cache_requests.inc(cache, "hit" if hit else "miss")
+
+
+class JobRun:
+    def __init__(self):
+        self.outcome = "ok"
+
+
+_job_context = threading.local()
+
+
+def current_job():
+    """Name of the job running on this thread, or None."""
+    return getattr(_job_context, "name", None)
+
+
+@contextmanager
+def track_job(job):
+    """Time a scheduler job. Set `.outcome` on the yielded run to override
+    "ok"; an exception escaping the block records "error"."""
+    run = JobRun()
+    previous = current_job()
+    _job_context.name = job
+    started = time.perf_counter()
+    try:
+        yield run
+    except Exception:
+        run.outcome = "error"
+        raise
+    finally:
+        _job_context.name = previous
+        job_runs.inc(job, run.outcome)
+        job_duration.observe(time.perf_counter() - started, job, run.outcome)
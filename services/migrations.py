@@ -0,0 +1,164 @@
+"""
+Versioned schema migrations.
+
+Migrations are numbered steps applied in order, once each. The schema_version
+table records every applied step, so the database's version is the highest
+number in it (0 for a database that predates the table). Run them at deploy
+time with scripts/database/migrate.py; app startup only checks that none are
+pending.
+
+Each step runs in its own transaction, together with its schema_version row.
+The row is inserted first. That INSERT opens the write transaction, so the
+step's DDL runs inside it and a failing step leaves no trace. The primary key
+also stops two concurrent runners from both applying a step.
+
+Steps are written to be safe on any database the app has ever created,
+because older databases reach version 1 from whatever shape they were in. The
+helpers below do nothing when the change is already present:
+
+- add_column: ALTER TABLE ... ADD COLUMN, which SQLite applies to the
+  table definition only; existing rows are not rewritten
+- create_index: an index built from one scan of the table, without copying
+  it. Readers carry on meanwhile and writers wait for that step only, so give
+  each index on a large table its own step
+"""
+
+import logging
+import time
+from datetime import datetime, timezone
+
+from sqlalchemy import text
+
+logger = logging.getLogger(__name__)
+
+SCHEMA_VERSION_DDL = """
+    CREATE TABLE IF NOT EXISTS schema_version (
+        version INTEGER PRIMARY KEY,
+        name VARCHAR(200) NOT NULL,
+        applied_at DATETIME NOT NULL,
+        duration_ms FLOAT
+    )
+"""
+
+
+class Migration:
+    def __init__(self, version, name, upgrade):
+        self.version = version
+        self.name = name
+        self.upgrade = upgrade  # upgrade(connection)
+
+
+def _table_exists(connection, name):
+    return (
+        connection.execute(
+            text("SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = :name"),
+            {"name": name},
+        ).first()
+        is not None
+    )
+
+
+def current_version(connection):
+    """Highest applied migration, or 0."""
+    if not _table_exists(connection, "schema_version"):
+        return 0
+    return connection.execute(
+        text("SELECT coalesce(max(version), 0) FROM schema_version")
+    ).scalar()
+
+
+def pending(connection, migrations):
+    """Migrations not yet applied, in order."""
+    version = current_version(connection)
+    return [
+        m for m in sorted(migrations, key=lambda m: m.version) if m.version > version
+    ]
+
+
+def history(connection):
+    """Applied migrations as dicts, oldest first."""
+    if not _table_exists(connection, "schema_version"):
+        return []
+    rows = connection.execute(
+        text(
+            "SELECT version, name, applied_at, duration_ms FROM schema_version "
+            "ORDER BY version"
+        )
+    )
+    return [dict(row._mapping) for row in rows]
+
+
+def upgrade(engine, migrations):
+    """Apply every pending migration. Returns the versions applied."""
+    versions = [m.version for m in migrations]
+    if len(set(versions)) != len(versions):
+        raise ValueError("Migration versions must be unique")
+
+    applied = []
+    with engine.connect() as connection:
+        connection.execute(text(SCHEMA_VERSION_DDL))
+        steps = pending(connection, migrations)
+        connection.commit()
+        for migration in steps:
+            started = time.perf_counter()
+            with connection.begin():
+                connection.execute(
+                    text(
+                        "INSERT INTO schema_version (version, name, applied_at) "
+                        "VALUES (:version, :name, :applied_at)"
+                    ),
+                    {
+                        "version": migration.version,
+                        "name": migration.name,
+                        "applied_at": datetime.now(timezone.utc).replace(tzinfo=None),
+                    },
+                )
+                migration.upgrade(connection)
+                duration_ms = (time.perf_counter() - started) * 1000
+                connection.execute(
+                    text(
+                        "UPDATE schema_version SET duration_ms = :duration_ms "
+                        "WHERE version = :version"
+                    ),
+                    {
+                        "duration_ms": round(duration_ms, 2),
+                        "version": migration.version,
+                    },
+                )
+            logger.info(
+                f"Applied migration {migration.version} ({migration.name}) "
+                f"in {duration_ms:.0f}ms"
+            )
+            applied.append(migration.version)
+    return applied
+
+
+def column_names(connection, table):
+    return [row[1] for row in connection.exec_driver_sql(f"PRAGMA table_info({table})")]
+
+
+def add_column(connection, table, column):
+    """Add a Column to an existing table unless it is already there. Returns
+    True when it was added."""
+    if column.name in column_names(connection, table.name):
+        return False
+    ddl = column.type.compile(dialect=connection.dialect)
+    default = column.default
+    if default is not None and default.is_scalar:
+        ddl += f" DEFAULT '{default.arg}'"
+    connection.exec_driver_sql(
+        f"ALTER TABLE {table.name} ADD COLUMN {column.name} {ddl}"
+    )
+    return True
+
+
+def create_index(connection, index):
+    """Build an Index unless it exists. Returns True when it was built."""
+    exists = connection.execute(
+        text("SELECT 1 FROM sqlite_master WHERE type = 'index' AND name = :name"),
+        {"name": index.name},
+    ).first()
+    if exists:
+        return False
+    index.create(connection)
+    return True
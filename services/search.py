@@ -0,0 +1,52 @@
+"""
+Ranked search snapshots.
+
+Search results are ordered by bm25 rank, which FTS5 derives from statistics
+over the whole index: every insert shifts every rank value, so a cursor on
+(rank, id) repeats or skips rows as expenses are added. Instead, a search
+ranks all its matches once, over the expenses that existed at that moment
+(ids up to a snapshot id), and RankedSearches keeps the ordered ids. The
+cursor carries the snapshot id and a position; later pages are slices of the
+kept order and cost no ranking at all.
+
+A search that was evicted, or whose next page is served by another process,
+is ranked again under the same snapshot. That gives the same order unless
+expenses were edited, or enough were added to move the corpus statistics.
+"""
+
+import threading
+from array import array
+from collections import OrderedDict
+
+
+class RankedSearches:
+    """The ranked ids of the most recent `size` searches, least recently used
+    dropped first."""
+
+    def __init__(self, size=32):
+        self.size = size
+        self._ids = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        with self._lock:
+            ids = self._ids.get(key)
+            if ids is not None:
+                self._ids.move_to_end(key)
+            return ids
+
+    def put(self, key, ids):
+        ids = array("q", ids)  # 8 bytes per match
+        with self._lock:
+            self._ids[key] = ids
+            self._ids.move_to_end(key)
+            while len(self._ids) > self.size:
+                self._ids.popitem(last=False)
+        return ids
+
+
+def init_search(app):
+    app.config.setdefault("SEARCH_SNAPSHOTS", 32)
+    searches = RankedSearches(app.config["SEARCH_SNAPSHOTS"])
+    app.extensions["ranked_searches"] = searches
+    return searches
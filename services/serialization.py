@@ -0,0 +1,114 @@
+"""
+Response encoding.
+
+FastJSONProvider is Flask's default JSON provider with two additions:
+
+- dumps()/loads() go through orjson when it is installed (JSON_BACKEND
+  "auto" or "orjson"), keeping Flask's sorted keys and its `default` for
+  dates, decimals and dataclasses. Anything orjson cannot encode, or any
+  call with formatting options (debug pretty-printing), falls back to the
+  stdlib encoder.
+- Responses honour `Accept: application/msgpack` or `application/cbor` when
+  msgpack / cbor2 are installed; otherwise JSON is sent as before.
+
+All three libraries are optional: pip install orjson msgpack cbor2.
+"""
+
+import logging
+
+from flask import has_request_context, request
+from flask.json.provider import DefaultJSONProvider
+
+try:
+    import orjson
+except ImportError:  # pragma: no cover - depends on the environment
+    orjson = None
+
+try:
+    import msgpack
+except ImportError:  # pragma: no cover
+    msgpack = None
+
+try:
+    import cbor2
+except ImportError:  # pragma: no cover
+    cbor2 = None
+
+logger = logging.getLogger(__name__)
+
+JSON_MIMETYPE = "application/json"
+MSGPACK_MIMETYPE = "application/msgpack"
+CBOR_MIMETYPE = "application/cbor"
+COMPACT_SEPARATORS = (",", ":")
+
+
+def available_mimetypes():
+    """Response formats this process can produce, JSON first."""
+    mimetypes = [JSON_MIMETYPE]
+    if msgpack is not None:
+        mimetypes += [MSGPACK_MIMETYPE, "application/x-msgpack"]
+    if cbor2 is not None:
+        mimetypes.append(CBOR_MIMETYPE)
+    return mimetypes
+
+
+class FastJSONProvider(DefaultJSONProvider):
+    def __init__(self, app):
+        super().__init__(app)
+        backend = app.config.get("JSON_BACKEND", "auto")
+        if backend not in ("auto", "orjson", "stdlib"):
+            raise ValueError(f"Unknown JSON_BACKEND: {backend}")
+        if backend == "orjson" and orjson is None:
+            logger.warning("JSON_BACKEND=orjson but orjson is not installed")
+        self.fast = orjson is not None and backend != "stdlib"
+        self._orjson_options = 0
+        if self.fast:
+            # Datetimes go through `default` so the output matches Flask's
+            self._orjson_options = orjson.OPT_PASSTHROUGH_DATETIME | (
+                orjson.OPT_SORT_KEYS if self.sort_keys else 0
+            )
+
+    def dumps(self, obj, **kwargs):
+        # response() asks for compact separators, which is orjson's only style
+        if self.fast and kwargs.keys() <= {"separators"}:
+            if kwargs.get("separators", COMPACT_SEPARATORS) != COMPACT_SEPARATORS:
+                return super().dumps(obj, **kwargs)
+            try:
+                return orjson.dumps(
+                    obj, default=self.default, option=self._orjson_options
+                ).decode()
+            except TypeError:
+                # Non-str keys, ints beyond 64 bits, ...
+                pass
+        return super().dumps(obj, **kwargs)
+
+    def loads(self, s, **kwargs):
+        if self.fast and not kwargs:
+            return orjson.loads(s)
+        return super().loads(s, **kwargs)
+
+    def pack(self, obj, mimetype):
+        """Encode `obj` as msgpack or CBOR."""
+        if mimetype == CBOR_MIMETYPE:
+            return cbor2.dumps(
+                obj, default=lambda encoder, value: encoder.encode(self.default(value))
+            )
+        return msgpack.packb(obj, default=self.default, use_bin_type=True)
+
+    def response(self, *args, **kwargs):
+        mimetype = JSON_MIMETYPE
+        if has_request_context():
+            mimetype = request.accept_mimetypes.best_match(
+                available_mimetypes(), default=JSON_MIMETYPE
+            )
+        if mimetype == JSON_MIMETYPE:
+            response = super().response(*args, **kwargs)
+        else:
+            if mimetype == "application/x-msgpack":
+                mimetype = MSGPACK_MIMETYPE
+            obj = self._prepare_response_obj(args, kwargs)
+            response = self._app.response_class(
+                self.pack(obj, mimetype), mimetype=mimetype
+            )
+        response.vary.add("Accept")
+        return response
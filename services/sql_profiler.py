@@ -0,0 +1,135 @@
+"""
+Optional slow-query profiler.
+
+When SLOW_QUERY_MS is set, every statement at or over the threshold is logged
+with its bound parameters, the route or scheduler job that issued it and its
+EXPLAIN QUERY PLAN, and kept in a fixed-size ring buffer that the internal
+/api/debug/slow-queries endpoint reads. Timings cover statement execution up
+to the first row; rows fetched afterwards are not included.
+"""
+
+import json
+import logging
+from collections import deque
+from datetime import datetime, timezone
+
+from flask import current_app, has_app_context, has_request_context, request
+
+from services import metrics
+
+logger = logging.getLogger(__name__)
+
+EXTENSION_KEY = "slow_queries"
+MAX_PARAMETER_SETS = 5
+EXPLAINABLE = ("SELECT", "WITH", "INSERT", "UPDATE", "DELETE", "REPLACE")
+
+
+class SlowQueryLog:
+    """Ring buffer of slow statements. deque appends are atomic, so
+    recording from request and scheduler threads needs no lock."""
+
+    def __init__(self, maxlen):
+        self.entries = deque(maxlen=maxlen)
+
+    def record(self, entry):
+        self.entries.append(entry)
+
+    def clear(self):
+        self.entries.clear()
+
+    def recent(self, limit=None):
+        entries = list(self.entries)[::-1]
+        return entries[:limit] if limit else entries
+
+    def statements(self):
+        """Entries grouped by statement text, slowest total first."""
+        grouped = {}
+        for entry in list(self.entries):
+            stats = grouped.setdefault(
+                entry["statement"],
+                {
+                    "statement": entry["statement"],
+                    "count": 0,
+                    "total_ms": 0.0,
+                    "max_ms": 0.0,
+                    "callers": set(),
+                },
+            )
+            stats["count"] += 1
+            stats["total_ms"] += entry["duration_ms"]
+            stats["max_ms"] = max(stats["max_ms"], entry["duration_ms"])
+            stats["callers"].add(entry["caller"])
+            stats["plan"] = entry["plan"]
+            stats["full_scan"] = entry["full_scan"]
+        result = sorted(grouped.values(), key=lambda s: s["total_ms"], reverse=True)
+        for stats in result:
+            stats["total_ms"] = round(stats["total_ms"], 2)
+            stats["mean_ms"] = round(stats["total_ms"] / stats["count"], 2)
+            stats["callers"] = sorted(stats["callers"])
+        return result
+
+
+def _caller():
+    if has_request_context():
+        rule = request.url_rule.rule if request.url_rule else request.path
+        return f"{request.method} {rule}"
+    job = metrics.current_job()
+    return f"job:{job}" if job else "unknown"
+
+
+def _explain(conn, statement, parameters):
+    """EXPLAIN QUERY PLAN on a fresh DBAPI cursor, bypassing engine events."""
+    if conn.dialect.name != "sqlite":
+        return []
+    if not statement.lstrip().upper().startswith(EXPLAINABLE):
+        return []
+    cursor = conn.connection.cursor()
+    try:
+        cursor.execute(f"EXPLAIN QUERY PLAN {statement}", parameters or ())
+        return [row[3] for row in cursor.fetchall()]
+    except Exception as e:
+        return [f"unavailable: {e}"]
+    finally:
+        cursor.close()
+
+
+def _is_full_scan(plan):
+    # SCAN walks a whole table or index (only a LIMIT stops it early), SEARCH
+    # seeks a range. FTS virtual-table lookups report SCAN but use the index.
+    return any(
+        line.startswith("SCAN ") and "VIRTUAL TABLE" not in line for line in plan
+    )
+
+
+def profile_statement(conn, statement, parameters, many, elapsed):
+    """Record the statement if profiling is on and it crossed the threshold."""
+    if not has_app_context():
+        return
+    threshold = current_app.config.get("SLOW_QUERY_MS")
+    duration_ms = elapsed * 1000
+    if threshold is None or duration_ms < threshold:
+        return
+    log = current_app.extensions.get(EXTENSION_KEY)
+    if log is None:
+        return
+
+    parameter_sets = list(parameters[:MAX_PARAMETER_SETS]) if many else [parameters]
+    plan = _explain(conn, statement, parameter_sets[0] if parameter_sets else None)
+    entry = {
+        "at": datetime.now(timezone.utc).isoformat(),
+        "duration_ms": round(duration_ms, 2),
+        "statement": " ".join(statement.split()),
+        "parameters": json.loads(json.dumps(parameter_sets, default=str)),
+        "executemany": many,
+        "caller": _caller(),
+        "plan": plan,
+        "full_scan": _is_full_scan(plan),
+    }
+    log.record(entry)
+    logger.warning("slow_query %s", json.dumps(entry))
+
+
+def init_sql_profiler(app):
+    app.config.setdefault("SLOW_QUERY_MS", None)
+    app.config.setdefault("SLOW_QUERY_BUFFER", 200)
+    app.extensions[EXTENSION_KEY] = SlowQueryLog(app.config["SLOW_QUERY_BUFFER"])
@@ -0,0 +1,195 @@
+"""
+Fingerprinted static assets.
+
+AssetManifest maps every JS/CSS/image file under static/ to a content-hashed
+name (components/config.js -> components/config.1a2b3c4d5e.js). The hashed
+URLs are served with a one-year immutable Cache-Control; the files are not
+copied, the static view maps the hashed name back to the source file.
+
+The HTML pages are rewritten on the fly: /static/... references in src/href
+attributes point at hashed URLs and an import map sends the modules' own
+relative imports (./config.js) to the same hashed URLs, so a repeat page
+load needs no JS request at all. Pages are served with no-cache and an ETag,
+so a deploy is picked up on the next revalidation.
+
+The manifest is rebuilt from file mtimes on page requests (cheap stats), and
+written to static/asset-manifest.json for inspection by
+`python -m services.static_assets`.
+"""
+
+import hashlib
+import json
+import logging
+import os
+import re
+import sys
+import threading
+
+from flask import abort, request
+from werkzeug.security import safe_join
+
+from services import compression
+
+logger = logging.getLogger(__name__)
+
+HASHED_EXTENSIONS = (".js", ".css", ".png", ".svg", ".ico", ".webmanifest")
+MANIFEST_NAME = "asset-manifest.json"
+IMMUTABLE_MAX_AGE = 31536000
+HASH_LENGTH = 10
+
+STATIC_REF_RE = re.compile(r'((?:src|href)=")/static/([^"?#]+)(?:\?[^"#]*)?"')
+
+
+def _hashed_name(path, digest):
+    stem, ext = os.path.splitext(path)
+    return f"{stem}.{digest[:HASH_LENGTH]}{ext}"
+
+
+class AssetManifest:
+    def __init__(self, static_dir):
+        self.static_dir = static_dir
+        self.assets = {}  # relative path -> hashed relative path
+        self.sources = {}  # hashed relative path -> relative path
+        self._mtimes = {}
+        self._pages = {}  # page -> (mtime, manifest version, rendered)
+        self.version = 0
+        self._lock = threading.Lock()
+
+    def _scan(self):
+        for root, _, files in os.walk(self.static_dir):
+            for name in files:
+                if name.endswith(HASHED_EXTENSIONS):
+                    path = os.path.join(root, name)
+                    relative = os.path.relpath(path, self.static_dir)
+                    yield relative.replace(os.sep, "/"), path
+
+    def refresh(self):
+        """Re-hash files whose mtime changed. Returns True if anything did."""
+        current = {}
+        changed = False
+        for relative, path in self._scan():
+            mtime = os.stat(path).st_mtime
+            current[relative] = mtime
+            if self._mtimes.get(relative) == mtime:
+                continue
+            with open(path, "rb") as f:
+                digest = hashlib.sha256(f.read()).hexdigest()
+            with self._lock:
+                hashed = _hashed_name(relative, digest)
+                self.assets[relative] = hashed
+                self.sources[hashed] = relative
+            changed = True
+        removed = set(self._mtimes) - set(current)
+        with self._lock:
+            for relative in removed:
+                self.assets.pop(relative, None)
+            self._mtimes = current
+            if changed or removed:
+                self.version += 1
+        return changed or bool(removed)
+
+    def url(self, relative):
+        return f"/static/{self.assets.get(relative, relative)}"
+
+    def import_map(self):
+        return {
+            "imports": {
+                f"/static/{relative}": f"/static/{hashed}"
+                for relative, hashed in sorted(self.assets.items())
+                if relative.endswith(".js")
+            }
+        }
+
+    def rewrite_html(self, html):
+        def replace(match):
+            attr, relative = match.groups()
+            if relative not in self.assets:
+                return match.group(0)
+            return f'{attr}{self.url(relative)}"'
+
+        html = STATIC_REF_RE.sub(replace, html)
+        import_map = json.dumps(self.import_map(), indent=2)
+        tag = f'<script type="importmap">\n{import_map}\n</script>\n'
+        # Must precede the first module script
+        return html.replace("</head>", f"{tag}</head>", 1)
+
+    def render_page(self, filename):
+        """Rewritten page body plus its precompressed variants and ETag, or
+        None when `filename` is not a file inside the static folder."""
+        path = safe_join(self.static_dir, filename)
+        if path is None or not os.path.isfile(path):
+            return None
+        mtime = os.stat(path).st_mtime
+        cached = self._pages.get(filename)
+        if cached and cached[0] == mtime and cached[1] == self.version:
+            return cached[2]
+        with open(path, encoding="utf-8") as f:
+            body = self.rewrite_html(f.read()).encode("utf-8")
+        rendered = {
+            "etag": hashlib.sha256(body).hexdigest()[:16],
+            "identity": body,
+        }
+        for encoding in compression.supported_encodings():
+            rendered[encoding] = compression.encode(body, encoding, static=True)
+        self._pages[filename] = (mtime, self.version, rendered)
+        return rendered
+
+    def write(self):
+        path = os.path.join(self.static_dir, MANIFEST_NAME)
+        with open(path, "w") as f:
+            json.dump(self.assets, f, indent=2, sort_keys=True)
+        return path
+
+
+def serve_page(app, filename):
+    """Serve a static HTML page with hashed asset references."""
+    manifest = app.extensions["asset_manifest"]
+    manifest.refresh()
+    rendered = manifest.render_page(filename)
+    if rendered is None:
+        abort(404)
+    encoding = compression.negotiate_encoding(
+        [e for e in compression.supported_encodings() if e in rendered]
+    )
+    response = app.response_class(
+        rendered[encoding or "identity"], mimetype="text/html"
+    )
+    if encoding:
+        response.headers["Content-Encoding"] = encoding
+    response.vary.add("Accept-Encoding")
+    response.set_etag(f"{rendered['etag']}-{encoding or 'identity'}")
+    response.cache_control.no_cache = True
+    return response.make_conditional(request)
+
+
+def init_static_assets(app):
+    manifest = AssetManifest(app.static_folder)
+    manifest.refresh()
+    app.extensions["asset_manifest"] = manifest
+    try:
+        manifest.write()
+    except OSError as e:
+        logger.warning(f"Could not write {MANIFEST_NAME}: {e}")
+
+    def static(filename):
+        if filename.endswith(".html"):
+            return serve_page(app, filename)
+        source = manifest.sources.get(filename)
+        if source is None:
+            return compression.send_static_precompressed(
+                app.static_folder, filename, max_age=0
+            )
+        response = compression.send_static_precompressed(
+            app.static_folder, source, max_age=IMMUTABLE_MAX_AGE
+        )
+        response.cache_control.immutable = True
+        return response
+
+    app.view_functions["static"] = static
+
+
+if __name__ == "__main__":
+    static_dir = sys.argv[1] if len(sys.argv) > 1 else "static"
+    manifest = AssetManifest(static_dir)
+    manifest.refresh()
+    print(f"Wrote {len(manifest.assets)} assets to {manifest.write()}")
@@ -1,6 +1,6 @@
 import { CONFIG, CategoryHelper, CurrencyHelper , Utils} from './config.js';
-import { ApiService, ErrorHandler } from './api-service.js';
-import { BaseComponent, EventManager } from './event-manager.js';
+import { ErrorHandler, ExpenseStore } from './api-service.js';
+import { BaseComponent } from './event-manager.js';
 
 class AddExpenseForm extends BaseComponent {
     constructor() {
@@ -205,14 +205,7 @@ class AddExpenseForm extends BaseComponent {
         try {
             let result;
             if (this.editMode) {
-                const response = await fetch(`/api/expenses/${this.editExpenseId}`, {
-                    method: 'PUT',
-                    headers: { 'Content-Type': 'application/json' },
-                    body: JSON.stringify(data)
-                });
-
-                if (!response.ok) throw new Error('Failed to update expense');
-                result = await response.json();
+                result = await ExpenseStore.updateExpense(this.editExpenseId, data);
 
                 window.showToast('Expense updated successfully', 'success');
 
@@ -220,7 +213,7 @@ class AddExpenseForm extends BaseComponent {
                     window.location.href = '/expenses';
                 }, 1000);
             } else {
-                result = await ApiService.createExpense(data);
+                result = await ExpenseStore.createExpense(data);
 
                 if (!result || !result.id) {
                     throw new Error('Invalid response from server');
@@ -229,12 +222,6 @@ class AddExpenseForm extends BaseComponent {
                 this.showSuccess(result);
             }
 
-            try {
-                EventManager.emitExpenseAdded(result);
-            } catch (e) {
-                console.warn('Could not emit expense added event:', e);
-            }
-
         } catch (error) {
             console.error('Add/Edit expense error:', error);
             ErrorHandler.handle(error, 'AddExpenseForm.handleSubmit');
@@ -249,11 +236,7 @@ class AddExpenseForm extends BaseComponent {
         }
 
         try {
-            const response = await fetch(`/api/expenses/${this.editExpenseId}`, {
-                method: 'DELETE'
-            });
-
-            if (!response.ok) throw new Error('Failed to delete expense');
+            await ExpenseStore.deleteExpense(this.editExpenseId);
 
             window.showToast('Expense deleted successfully', 'success');
 
@@ -1,8 +1,24 @@
 import { CONFIG } from './config.js';
+import { EventManager } from './event-manager.js';
 
 // Centralized API service for all HTTP requests
 export class ApiService {
+    // GETs in flight, keyed by URL: concurrent identical requests share one fetch
+    static inflight = new Map();
+
     static async request(url, options = {}) {
+        const method = (options.method || 'GET').toUpperCase();
+        if (method !== 'GET') {
+            return this.send(url, options);
+        }
+        if (!this.inflight.has(url)) {
+            const pending = this.send(url, options).finally(() => this.inflight.delete(url));
+            this.inflight.set(url, pending);
+        }
+        return this.inflight.get(url);
+    }
+
+    static async send(url, options = {}) {
         const defaultOptions = {
             headers: {
                 'Content-Type': 'application/json',
@@ -38,6 +54,25 @@ export class ApiService {
         return await this.request(url);
     }
 
+    static async searchExpenses(query, filters = {}) {
+        const params = new URLSearchParams({ q: query });
+        Object.entries(filters).forEach(([key, value]) => {
+            if (value) params.set(key, value);
+        });
+        return await this.request(`${CONFIG.API.ENDPOINTS.EXPENSES_SEARCH}?${params}`);
+    }
+
+    // filters: { from, to, category: [], source: [], min_amount, max_amount,
+    //           merchant, sort, limit, cursor }
+    static async queryExpenses(filters = {}) {
+        const params = new URLSearchParams();
+        Object.entries(filters).forEach(([key, value]) => {
+            if (Array.isArray(value)) value.forEach(v => params.append(key, v));
+            else if (value !== undefined && value !== null && value !== '') params.set(key, value);
+        });
+        return await this.request(`${CONFIG.API.ENDPOINTS.EXPENSES_QUERY}?${params}`);
+    }
+
     static async createExpense(expenseData) {
         return await this.request(CONFIG.API.ENDPOINTS.EXPENSES, {
             method: 'POST',
@@ -60,6 +95,11 @@ export class ApiService {
         });
     }
 
+    static async getRecurringForecast(months = 3) {
+        const url = `${CONFIG.API.ENDPOINTS.RECURRING_FORECAST}?months=${months}`;
+        return await this.request(url);
+    }
+
     static async getTrends() {
         return await this.request(CONFIG.API.ENDPOINTS.TRENDS);
     }
@@ -68,6 +108,187 @@ export class ApiService {
     static async getMonths() {
         return await this.request(CONFIG.API.ENDPOINTS.MONTHS);
     }
+
+    // Background jobs: POST returns 202 with the queued job; poll until it settles.
+    // A failed attempt that will be retried rejects too, with the job's error.
+    static async runJob(url, { interval = 1000 } = {}) {
+        let job = await this.request(url, { method: 'POST' });
+        while (job.status === 'queued' || job.status === 'running') {
+            if (job.error) throw new Error(`${job.error} (will retry)`);
+            await new Promise(resolve => setTimeout(resolve, interval));
+            job = await this.request(`${CONFIG.API.ENDPOINTS.JOBS}/${job.id}`);
+        }
+        if (job.status === 'failed') throw new Error(job.error || 'Job failed');
+        return job.result;
+    }
+}
+
+// Shared month cache for /api/expenses. Every component asks the store, so a
+// page load fetches each month once; results are shared and must be treated
+// as read-only. Mutations go through the store, which emits the usual
+// expense events. Expense events, local or pushed by /api/events, patch the
+// cached months in place; MONTH_INVALIDATED then tells subscribers to re-read
+// those months from the store, which usually needs no request at all.
+export class ExpenseStore {
+    static MAX_AGE_MS = 60 * 1000;
+    static months = new Map();      // 'year-month' -> { data, fetchedAt }
+    static generations = new Map(); // 'year-month' -> bumped on every change
+
+    static key(month, year) {
+        return `${year}-${Number(month)}`;
+    }
+
+    // Month of a stored (naive ISO) date, as the server filters it
+    static keyOfDate(date) {
+        const [year, month] = date.slice(0, 7).split('-');
+        return this.key(month, year);
+    }
+
+    static async getMonth(month, year) {
+        LiveUpdates.connect();
+        const key = this.key(month, year);
+        const cached = this.months.get(key);
+        if (cached && Date.now() - cached.fetchedAt < this.MAX_AGE_MS) {
+            return cached.data;
+        }
+        const generation = this.generations.get(key) || 0;
+        const data = await ApiService.getExpenses(month, year);
+        // Don't cache a response that raced with a change
+        if ((this.generations.get(key) || 0) === generation) {
+            this.months.set(key, { data, fetchedAt: Date.now() });
+        }
+        return data;
+    }
+
+    static async getMonthExpenses(month, year) {
+        const { expenses } = await this.getMonth(month, year);
+        return expenses;
+    }
+
+    static bump(key) {
+        this.generations.set(key, (this.generations.get(key) || 0) + 1);
+    }
+
+    static notify(keys) {
+        const months = keys
+            ? keys.map(key => {
+                const [year, month] = key.split('-').map(Number);
+                return { month, year };
+            })
+            : null;
+        EventManager.emitMonthInvalidated(months);
+    }
+
+    static invalidate() {
+        new Set([...this.months.keys(), ...this.generations.keys()]).forEach(key => this.bump(key));
+        this.months.clear();
+        this.notify(null);
+    }
+
+    // Replace the cached month payload; months that aren't cached are only
+    // bumped, so a fetch already in flight isn't cached with stale rows
+    static patchMonth(key, patch) {
+        this.bump(key);
+        const cached = this.months.get(key);
+        if (!cached) return;
+        const expenses = patch(cached.data.expenses);
+        this.months.set(key, {
+            data: { ...cached.data, expenses, total: expenses.length },
+            fetchedAt: cached.fetchedAt
+        });
+    }
+
+    // Upsert `expense`, or remove `expenseId` (from `date`'s month if known).
+    // Applying the same change twice is harmless: local mutations are echoed
+    // back by the event stream.
+    static applyChange({ expense = null, expenseId = null, date = null } = {}) {
+        const id = expense ? expense.id : expenseId;
+        if (id === null || id === undefined) {
+            // e.g. recurring expenses applied: unknown rows, reload everything
+            this.invalidate();
+            return;
+        }
+        const touched = new Set();
+        this.months.forEach(({ data }, key) => {
+            if (data.expenses.some(e => e.id == id)) touched.add(key);
+        });
+        const target = expense ? expense.date : date;
+        if (target) touched.add(this.keyOfDate(target));
+        if (touched.size === 0) {
+            // Not cached and month unknown: nobody is showing it
+            return;
+        }
+        touched.forEach(key => this.patchMonth(key, expenses => expenses.filter(e => e.id != id)));
+        if (expense) {
+            this.patchMonth(this.keyOfDate(expense.date), expenses => {
+                const index = expenses.findIndex(e => e.date <= expense.date);
+                const next = [...expenses];
+                next.splice(index === -1 ? next.length : index, 0, expense);
+                return next;
+            });
+        }
+        this.notify([...touched]);
+    }
+
+    // Does an invalidation event concern this month?
+    static affects(event, month, year) {
+        const months = event.detail.months;
+        return !months || months.some(m => m.month == month && m.year == year);
+    }
+
+    static async createExpense(expenseData) {
+        const expense = await ApiService.createExpense(expenseData);
+        EventManager.emitExpenseAdded(expense);
+        return expense;
+    }
+
+    static async updateExpense(expenseId, expenseData) {
+        const expense = await ApiService.updateExpense(expenseId, expenseData);
+        EventManager.emitExpenseUpdated(expense);
+        return expense;
+    }
+
+    static async deleteExpense(expenseId) {
+        await ApiService.deleteExpense(expenseId);
+        EventManager.emitExpenseDeleted(expenseId);
+    }
+}
+
+[
+    EventManager.EVENT_TYPES.EXPENSE_ADDED,
+    EventManager.EVENT_TYPES.EXPENSE_UPDATED,
+    EventManager.EVENT_TYPES.EXPENSE_DELETED
+].forEach(type => EventManager.on(type, ({ detail }) => ExpenseStore.applyChange(detail)));
+
+// Change stream from /api/events. Expense changes made anywhere (other tabs
+// and devices, bank sync, the recurring job) patch the store as they happen;
+// after a reconnect or a `resync` the store is dropped, since events may
+// have been missed.
+export class LiveUpdates {
+    static source = null;
+    static opened = false;
+
+    static connect() {
+        if (this.source || typeof EventSource === 'undefined') return;
+        const source = new EventSource(CONFIG.API.ENDPOINTS.EVENTS);
+        const on = (type, handler) => source.addEventListener(type, (event) => handler(JSON.parse(event.data)));
+
+        on('expense.created', expense => ExpenseStore.applyChange({ expense }));
+        on('expense.updated', expense => ExpenseStore.applyChange({ expense }));
+        on('expense.deleted', ({ id, date }) => ExpenseStore.applyChange({ expenseId: id, date }));
+        on('sync.completed', result => EventManager.emitSyncCompleted(result));
+        on('resync', () => ExpenseStore.invalidate());
+
+        source.addEventListener('open', () => {
+            if (this.opened) ExpenseStore.invalidate();
+            this.opened = true;
+        });
+        source.addEventListener('error', () => {
+            // CLOSED means the server refused (e.g. 503); don't retry this page
+            if (source.readyState === EventSource.CLOSED) console.warn('Live updates unavailable');
+        });
+        this.source = source;
+    }
 }
 
 // Error handling utility
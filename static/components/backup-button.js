@@ -1,4 +1,6 @@
 import { BaseComponent, EventManager } from './event-manager.js';
+import { ApiService } from './api-service.js';
+import { CONFIG } from './config.js';
 class BackupButton extends BaseComponent {
     connectedCallback() {
         this.render();
@@ -241,15 +243,10 @@ class BackupButton extends BaseComponent {
         if (!confirm('Create a backup of all data to CSV on the server?')) return;
         this.setLoading(true);
         try {
-            const res = await fetch('/api/backup', { method: 'POST' });
-            const data = await res.json();
-            if (data.success) {
-                window.showToast('Backup created successfully!', 'success');
-            } else {
-                window.showToast('Backup failed: ' + (data.error || 'Unknown error'), 'error');
-            }
+            await ApiService.runJob(CONFIG.API.ENDPOINTS.BACKUP);
+            window.showToast('Backup created successfully!', 'success');
         } catch (e) {
-            window.showToast('Backup failed: ' + e, 'error');
+            window.showToast('Backup failed: ' + e.message, 'error');
         } finally {
             this.setLoading(false);
         }
@@ -1,5 +1,6 @@
 import { CONFIG, CategoryHelper, CurrencyHelper , Utils} from './config.js';
 import { EventManager , BaseComponent} from './event-manager.js';
+import { ExpenseStore } from './api-service.js';
 
 class CategoryChart extends BaseComponent {
     constructor() {
@@ -41,8 +42,10 @@ class CategoryChart extends BaseComponent {
             }
         });
 
-        document.addEventListener('expenseadded', () => {
-            if (this.isInitialized) this.updateChart();
+        document.addEventListener(EventManager.EVENT_TYPES.MONTH_INVALIDATED, (e) => {
+            if (this.isInitialized && ExpenseStore.affects(e, this.currentMonth, this.currentYear)) {
+                this.updateChart();
+            }
         });
 
         document.addEventListener('datechange', (e) => {
@@ -72,10 +75,7 @@ class CategoryChart extends BaseComponent {
         if (!this.isInitialized) return;
 
         try {
-            const response = await fetch(`/api/expenses?month=${this.currentMonth}&year=${this.currentYear}`);
-            if (!response.ok) throw new Error('Failed to fetch expenses');
-
-            const { expenses } = await response.json();
+            const expenses = await ExpenseStore.getMonthExpenses(this.currentMonth, this.currentYear);
 
             const filteredExpenses = this.currentWeek === 'all' ? expenses : expenses.filter(expense => {
                 const date = new Date(expense.date);
@@ -5,15 +5,23 @@ export const CONFIG = {
         BASE_URL: '/api',
         ENDPOINTS: {
             EXPENSES: '/api/expenses',
+            EXPENSES_SEARCH: '/api/expenses/search',
+            EXPENSES_QUERY: '/api/expenses/query',
             MONTHS: '/api/months',
             TRENDS: '/api/trends',
             RECURRING: '/api/recurring',
             RECURRING_APPLY: '/api/recurring/apply',
-            RECURRING_PENDING: '/api/recurring/pending'
+            RECURRING_PENDING: '/api/recurring/pending',
+            RECURRING_FORECAST: '/api/recurring/forecast',
+            EVENTS: '/api/events',
+            JOBS: '/api/jobs',
+            BACKUP: '/api/backup',
+            CATEGORIES: '/api/categories'
         }
     },
 
-    // Expense categories with modern colors and labels
+    // Expense categories with modern colors and labels. These are the
+    // defaults; loadCategories() below replaces them with the server's list.
     CATEGORIES: {
         super: {
             label: 'Super',
@@ -108,6 +116,25 @@ export const CONFIG = {
     }
 };
 
+// Categories live in the database and can change without a deploy. Every
+// module imports CONFIG, so resolving them here, before any module runs,
+// means the rest of the app reads CONFIG.CATEGORIES synchronously as before.
+// The browser revalidates the response with its ETag.
+async function loadCategories() {
+    try {
+        const response = await fetch(CONFIG.API.ENDPOINTS.CATEGORIES);
+        if (!response.ok) return;
+        const categories = await response.json();
+        const entries = Object.entries(categories)
+            .sort(([, a], [, b]) => a.position - b.position);
+        if (entries.length) CONFIG.CATEGORIES = Object.fromEntries(entries);
+    } catch (error) {
+        console.warn('Using default categories:', error);
+    }
+}
+
+await loadCategories();
+
 // Helper functions for configuration
 export class CategoryHelper {
     static getAllCategories() {
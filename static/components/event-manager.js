@@ -4,6 +4,8 @@ export class EventManager {
         EXPENSE_ADDED: 'expenseadded',
         EXPENSE_UPDATED: 'expenseupdated',
         EXPENSE_DELETED: 'expensedeleted',
+        MONTH_INVALIDATED: 'monthinvalidated',
+        SYNC_COMPLETED: 'synccompleted',
         DATE_CHANGED: 'datechange',
         THEME_CHANGED: 'themechange'
     };
@@ -39,6 +41,16 @@ export class EventManager {
         this.emit(this.EVENT_TYPES.EXPENSE_DELETED, { expenseId });
     }
 
+    // months: [{ month, year }], or null when every cached month was dropped
+    static emitMonthInvalidated(months) {
+        this.emit(this.EVENT_TYPES.MONTH_INVALIDATED, { months });
+    }
+
+    // result: bank sync counts (fetched, added, unclassified, duplicate)
+    static emitSyncCompleted(result) {
+        this.emit(this.EVENT_TYPES.SYNC_COMPLETED, result);
+    }
+
     static emitDateChanged(month, year, week) {
         this.emit(this.EVENT_TYPES.DATE_CHANGED, { month, year, week });
     }
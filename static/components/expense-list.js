@@ -1,5 +1,6 @@
 import { BaseComponent, EventManager } from './event-manager.js';
 import { CONFIG, CategoryHelper, CurrencyHelper , Utils} from './config.js';
+import { ExpenseStore } from './api-service.js';
 
 class ExpenseList extends BaseComponent {
     constructor() {
@@ -309,21 +310,19 @@ class ExpenseList extends BaseComponent {
             }
         });
 
-        document.addEventListener('expenseadded', () => {
-            this.loadExpenses();
+        document.addEventListener(EventManager.EVENT_TYPES.MONTH_INVALIDATED, (e) => {
+            if (ExpenseStore.affects(e, this.currentMonth, this.currentYear)) this.loadExpenses();
         });
     }
 
     async loadExpenses(page = this.page) {
         try {
-            this.page = page;
-            const response = await fetch(`/api/expenses?month=${this.currentMonth}&year=${this.currentYear}&page=${this.page}&per_page=${this.perPage}`);
-            if (!response.ok) throw new Error('Failed to fetch expenses');
-            const data = await response.json();
-            this.expenses = data.expenses;
-            this.total = data.total;
-            this.page = data.page;
-            this.perPage = data.per_page;
+            // Page through the shared month payload instead of fetching per page
+            const expenses = await ExpenseStore.getMonthExpenses(this.currentMonth, this.currentYear);
+            this.total = expenses.length;
+            this.page = Math.min(Math.max(page, 1), Math.max(Math.ceil(this.total / this.perPage), 1));
+            const start = (this.page - 1) * this.perPage;
+            this.expenses = expenses.slice(start, start + this.perPage);
             this.renderExpenses();
             this.renderPagination();
         } catch (error) {
@@ -472,14 +471,9 @@ class ExpenseList extends BaseComponent {
         if (!description) { window.showToast('Please enter a description', 'error'); return; }
 
         try {
-            const response = await fetch(`/api/expenses/${expenseId}`, {
-                method: 'PUT',
-                headers: { 'Content-Type': 'application/json' },
-                body: JSON.stringify({ amount, category, description })
-            });
-            if (!response.ok) throw new Error('Failed to update expense');
+            // The store's invalidation reloads this list
+            await ExpenseStore.updateExpense(expenseId, { amount, category, description });
             window.showToast('Expense updated successfully', 'success');
-            this.loadExpenses();
         } catch (error) {
             console.error('Error updating expense:', error);
             window.showToast('Failed to update expense', 'error');
@@ -503,10 +497,8 @@ class ExpenseList extends BaseComponent {
     async deleteExpense(expenseId) {
         if (!confirm('Are you sure you want to delete this expense?')) return;
         try {
-            const response = await fetch(`/api/expenses/${expenseId}`, { method: 'DELETE' });
-            if (!response.ok) throw new Error('Failed to delete expense');
+            await ExpenseStore.deleteExpense(expenseId);
             window.showToast('Expense deleted successfully', 'success');
-            this.loadExpenses();
         } catch (error) {
             console.error('Error deleting expense:', error);
             window.showToast('Failed to delete expense', 'error');
@@ -1,5 +1,6 @@
 import { BaseComponent, EventManager } from './event-manager.js';
 import { CONFIG, CategoryHelper, CurrencyHelper, DateHelper , Utils} from './config.js';
+import { ExpenseStore } from './api-service.js';
 
 class LatestExpenses extends BaseComponent {
     constructor() {
@@ -16,6 +17,8 @@ class LatestExpenses extends BaseComponent {
         this.selectedYear = new Date().getFullYear();
         this.selectedWeek = 'all';
         this.useDateNavigation = false;
+        this.loadedMonths = [];
+        this.deleting = false;
     }
 
     connectedCallback() {
@@ -37,6 +40,14 @@ class LatestExpenses extends BaseComponent {
                 this.loadAllExpenses();
             }
         });
+
+        document.addEventListener(EventManager.EVENT_TYPES.MONTH_INVALIDATED, (e) => {
+            // confirmDelete reloads once its animation is done
+            if (this.deleting) return;
+            if (this.loadedMonths.some(({ month, year }) => ExpenseStore.affects(e, month, year))) {
+                this.loadAllExpenses();
+            }
+        });
     }
 
     render() {
@@ -307,12 +318,10 @@ class LatestExpenses extends BaseComponent {
                 }
             }
 
-            const allExpensesPromises = monthsToFetch.map(async ({ year, month }) => {
-                const response = await fetch(`/api/expenses?month=${month}&year=${year}`);
-                if (!response.ok) return [];
-                const { expenses } = await response.json();
-                return expenses;
-            });
+            this.loadedMonths = monthsToFetch;
+            const allExpensesPromises = monthsToFetch.map(({ year, month }) =>
+                ExpenseStore.getMonthExpenses(month, year).catch(() => [])
+            );
 
             const expensesArrays = await Promise.all(allExpensesPromises);
             this.allExpenses = expensesArrays.flat().sort((a, b) => new Date(b.date) - new Date(a.date));
@@ -566,8 +575,8 @@ class LatestExpenses extends BaseComponent {
         const confirmed = confirm(`Delete "${Utils.escapeHTML(expense.description)}" (${CurrencyHelper.format(expense.amount)})?`);
         if (confirmed) {
             try {
-                const response = await fetch(`/api/expenses/${expense.id}`, { method: 'DELETE' });
-                if (!response.ok) throw new Error('Failed to delete');
+                this.deleting = true;
+                await ExpenseStore.deleteExpense(expense.id);
 
                 container.style.transition = 'all 0.3s ease';
                 container.style.transform = 'translateX(-100%)';
@@ -581,10 +590,12 @@ class LatestExpenses extends BaseComponent {
                 }, 300);
 
                 setTimeout(() => {
+                    this.deleting = false;
                     this.loadAllExpenses();
                     if (window.showToast) window.showToast('Expense deleted', 'success');
                 }, 500);
             } catch (error) {
+                this.deleting = false;
                 if (window.showToast) window.showToast('Failed to delete expense', 'error');
                 const expenseItem = container.querySelector('.expense-item');
                 expenseItem.classList.remove('swiped');
@@ -6,6 +6,7 @@ class RecurringList extends BaseComponent {
     constructor() {
         super();
         this.recurringExpenses = [];
+        this.forecast = null;
     }
 
     connectedCallback() {
@@ -22,10 +23,14 @@ class RecurringList extends BaseComponent {
 
     async loadRecurringExpenses() {
         try {
-            const response = await fetch(CONFIG.API.ENDPOINTS.RECURRING);
+            const [response, forecast] = await Promise.all([
+                fetch(CONFIG.API.ENDPOINTS.RECURRING),
+                ApiService.getRecurringForecast(3).catch(() => null)
+            ]);
             if (!response.ok) throw new Error('Failed to load recurring expenses');
             const data = await response.json();
             this.recurringExpenses = data.recurring_expenses || [];
+            this.forecast = forecast;
             this.render();
         } catch (error) {
             console.error('Error loading recurring expenses:', error);
@@ -87,9 +92,7 @@ class RecurringList extends BaseComponent {
 
     async applyNow() {
         try {
-            const response = await fetch(CONFIG.API.ENDPOINTS.RECURRING_APPLY, { method: 'POST' });
-            if (!response.ok) throw new Error('Failed to apply recurring expenses');
-            const data = await response.json();
+            const data = await ApiService.runJob(CONFIG.API.ENDPOINTS.RECURRING_APPLY);
             window.showToast(`Applied ${data.applied} recurring expense(s)`, 'success');
             EventManager.emit('expenseadded');
         } catch (error) {
@@ -160,6 +163,28 @@ class RecurringList extends BaseComponent {
                     align-items: center;
                     gap: 0.25rem;
                 }
+                .recurring-forecast {
+                    display: flex;
+                    gap: 0.5rem;
+                    margin-top: 0.75rem;
+                }
+                .recurring-forecast-month {
+                    flex: 1;
+                    background: var(--surface-container-highest);
+                    border-radius: 0.5rem;
+                    padding: 0.375rem 0.5rem;
+                    text-align: center;
+                }
+                .recurring-forecast-label {
+                    display: block;
+                    font-size: 0.6875rem;
+                    color: var(--outline);
+                }
+                .recurring-forecast-total {
+                    font-size: 0.8125rem;
+                    font-weight: 700;
+                    color: var(--on-surface);
+                }
                 .recurring-empty {
                     text-align: center;
                     padding: 3rem 1rem;
@@ -322,6 +347,7 @@ class RecurringList extends BaseComponent {
                     <span class="material-symbols-outlined" style="font-size: 0.875rem;">info</span>
                     Expenses are automatically applied daily at midnight
                 </div>
+                ${this.renderForecast()}
             </div>
 
             ${this.recurringExpenses.length === 0 ? `
@@ -336,6 +362,20 @@ class RecurringList extends BaseComponent {
         this.attachEventListeners();
     }
 
+    renderForecast() {
+        if (!this.forecast || !this.forecast.months || !this.recurringExpenses.some(r => r.is_active)) return '';
+        return `
+            <div class="recurring-forecast">
+                ${this.forecast.months.map(m => `
+                    <div class="recurring-forecast-month">
+                        <span class="recurring-forecast-label">${m.label}</span>
+                        <span class="recurring-forecast-total tabular-nums">${CurrencyHelper.format(m.total)}</span>
+                    </div>
+                `).join('')}
+            </div>
+        `;
+    }
+
     renderRecurringItem(recurring) {
         const categoryData = CategoryHelper.getCategoryData(recurring.category);
         const isActive = recurring.is_active;
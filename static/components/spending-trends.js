@@ -1,6 +1,6 @@
 import { BaseComponent, EventManager } from './event-manager.js';
 import { CONFIG, CategoryHelper, CurrencyHelper } from './config.js';
-import { ApiService } from './api-service.js';
+import { ApiService, LiveUpdates } from './api-service.js';
 
 class SpendingTrends extends BaseComponent {
     constructor() {
@@ -27,6 +27,13 @@ class SpendingTrends extends BaseComponent {
             this.updateToggle();
             this.computeTrends();
         });
+
+        // Trends span many months; reload once a burst of changes settles
+        LiveUpdates.connect();
+        document.addEventListener(EventManager.EVENT_TYPES.MONTH_INVALIDATED, () => {
+            clearTimeout(this.reloadTimer);
+            this.reloadTimer = setTimeout(() => this.loadData({ quiet: true }), 1000);
+        });
     }
 
     updateToggle() {
@@ -41,11 +48,11 @@ class SpendingTrends extends BaseComponent {
         }
     }
 
-    async loadData() {
+    async loadData({ quiet = false } = {}) {
         try {
             // Display loading state initially
             const chartContainer = this.querySelector('.trends-chart');
-            if (chartContainer) {
+            if (chartContainer && !quiet) {
                 chartContainer.innerHTML = '<div class="text-center py-5"><div class="spinner-border" role="status"></div></div>';
             }
 
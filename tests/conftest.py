@@ -1,24 +1,32 @@
+import asyncio
 import pytest
 import tempfile
 import os
 from datetime import datetime
+from http import HTTPStatus
 import sys
-from app import app, db, Expense
+
+# The app built on `from app import app` reads these: a separate, migrated
+# test database, no schedules, and jobs run only when a test calls
+# job_queue.run_pending()
+os.environ["DATABASE_URL"] = "sqlite:///" + os.path.join(
+    tempfile.mkdtemp(), "test_expenses.db"
+)
+os.environ.setdefault("MIGRATE_ON_START", "1")
+os.environ.setdefault("SCHEDULER", "0")
+os.environ.setdefault("JOB_WORKERS", "0")
+
+from app import app, db, Expense  # noqa: E402
+from flask.testing import FlaskClient  # noqa: E402
+from services.asgi import create_asgi_app  # noqa: E402
 
 sys.path.insert(0, os.path.abspath(os.path.dirname(__file__)))
 
 
 @pytest.fixture(scope="session")
 def app_instance():
-    """Create a Flask app instance for testing with a separate test database."""
-    # Create a temporary directory for the test database
-    temp_dir = tempfile.mkdtemp()
-    test_db_path = os.path.join(temp_dir, "test_expenses.db")
-
+    """The Flask app under test, bound to the temporary test database."""
     app.config["TESTING"] = True
-    db_uri = "sqlite:///" + test_db_path
-    app.config["SQLALCHEMY_DATABASE_URI"] = db_uri
-    app.config["SQLALCHEMY_TRACK_MODIFICATIONS"] = False
     return app
 
 
@@ -40,6 +48,78 @@ def client(app_instance):
             yield client
 
 
+class AsgiBridge:
+    """The app as a WSGI callable that goes through the ASGI adapter: each
+    request is turned into an ASGI scope and run on an event loop. Every
+    other attribute is the Flask app's, so FlaskClient can drive it."""
+
+    def __init__(self, app):
+        self.app = app
+        self.asgi_app = create_asgi_app(app)
+
+    def __getattr__(self, name):
+        return getattr(self.app, name)
+
+    def __call__(self, environ, start_response):
+        headers = [
+            (key[5:].replace("_", "-").lower().encode("latin-1"), value.encode())
+            for key, value in environ.items()
+            if key.startswith("HTTP_")
+        ]
+        for key in ("CONTENT_TYPE", "CONTENT_LENGTH"):
+            if environ.get(key):
+                name = key.replace("_", "-").lower().encode("latin-1")
+                headers.append((name, environ[key].encode("latin-1")))
+        scope = {
+            "type": "http",
+            "asgi": {"version": "3.0"},
+            "http_version": "1.1",
+            "method": environ["REQUEST_METHOD"],
+            "scheme": environ["wsgi.url_scheme"],
+            "path": environ["PATH_INFO"].encode("latin-1").decode("utf-8"),
+            "query_string": environ["QUERY_STRING"].encode("latin-1"),
+            "root_path": environ.get("SCRIPT_NAME", ""),
+            "headers": headers,
+            "client": (environ.get("REMOTE_ADDR", ""), 0),
+            "server": (environ["SERVER_NAME"], int(environ["SERVER_PORT"])),
+        }
+        body = environ["wsgi.input"].read()
+        sent = []
+
+        async def receive():
+            if not sent:
+                sent.append(None)
+                return {"type": "http.request", "body": body, "more_body": False}
+            return {"type": "http.disconnect"}
+
+        messages = []
+
+        async def send(message):
+            messages.append(message)
+
+        asyncio.run(self.asgi_app(scope, receive, send))
+        start, *chunks = messages
+        status = HTTPStatus(start["status"])
+        start_response(
+            f"{status.value} {status.phrase}",
+            [(k.decode("latin-1"), v.decode("latin-1")) for k, v in start["headers"]],
+        )
+        return [b"".join(chunk.get("body", b"") for chunk in chunks)]
+
+
+@pytest.fixture(scope="session")
+def asgi_bridge(app_instance):
+    return AsgiBridge(app_instance)
+
+
+@pytest.fixture
+def asgi_client(app_instance, asgi_bridge):
+    """A test client whose requests are served through the ASGI adapter."""
+    with FlaskClient(asgi_bridge, app_instance.response_class) as client:
+        with app_instance.app_context():
+            yield client
+
+
 @pytest.fixture
 def test_expenses(_db):
     """Create test expenses."""
@@ -0,0 +1,109 @@
+from datetime import date, datetime
+
+import pytest
+from app import Expense
+from services.analytics import default_range, percentile, summarise
+
+
+@pytest.fixture(autouse=True)
+def clean_db(_db):
+    _db.session.query(Expense).delete()
+    _db.session.commit()
+
+
+def _row(day, category, amount):
+    return day.toordinal(), category, amount
+
+
+def test_percentile_interpolates_like_numpy():
+    values = [1, 2, 3, 4]
+    assert percentile(values, 50) == 2.5
+    assert percentile(values, 90) == pytest.approx(3.7)
+    assert percentile([5], 90) == 5
+    assert percentile([], 50) is None
+
+
+def test_default_range_is_twelve_months():
+    assert default_range(date(2024, 3, 15)) == (date(2023, 4, 1), date(2024, 3, 15))
+    assert default_range(date(2024, 12, 31)) == (date(2024, 1, 1), date(2024, 12, 31))
+
+
+def test_month_totals_percentiles_and_yoy():
+    rows = [
+        _row(date(2023, 2, 10), "super", 50),
+        _row(date(2024, 2, 1), "super", 10),
+        _row(date(2024, 2, 20), "super", 30),
+        _row(date(2024, 2, 29), "food_drink", 20),
+    ]
+    result = summarise(rows, date(2024, 1, 1), date(2024, 2, 29))
+    january, february = result["months"]
+
+    assert january == {
+        "month": "2024-01",
+        "total": 0,
+        "count": 0,
+        "percentiles": {"p50": None, "p75": None, "p90": None},
+        "categories": {},
+        "previous_year": 0,
+        "yoy_change": 0,
+        "yoy_percent": None,
+    }
+    assert february["total"] == 60
+    assert february["count"] == 3
+    assert february["percentiles"]["p50"] == 20
+    assert february["categories"] == {"food_drink": 20, "super": 40}
+    assert february["previous_year"] == 50
+    assert february["yoy_change"] == 10
+    assert february["yoy_percent"] == 20
+
+
+def test_rolling_averages():
+    rows = [_row(date(2024, 3, d), "super", 3) for d in range(1, 31)]
+    rows.append(_row(date(2024, 1, 1), "super", 90))
+    result = summarise(rows, date(2024, 3, 1), date(2024, 3, 30))
+    super_ = result["categories"]["super"]
+    assert super_["total"] == 90
+    assert super_["avg_30"] == 3
+    # 90 days back from 30 March reaches 1 January
+    assert super_["avg_90"] == 2
+    assert super_["rolling_30"] == [3]
+
+
+def test_projection_uses_trailing_daily_rate():
+    rows = [_row(date(2024, 4, d), "super", 9) for d in range(1, 11)]
+    result = summarise(rows, date(2024, 4, 1), date(2024, 4, 10))
+    projection = result["projection"]
+    assert projection["spent"] == 90
+    assert projection["days_elapsed"] == 10 and projection["days_in_month"] == 30
+    # 90 spent over the last 90 days is 1/day, for 20 more days
+    assert projection["projected"] == 110
+    assert projection["categories"] == {"super": 110}
+
+
+def test_endpoint(client, _db):
+    for day, amount in [(datetime(2023, 5, 3), 40), (datetime(2024, 5, 3, 18), 60)]:
+        _db.session.add(
+            Expense(amount=amount, category="super", description="x", date=day)
+        )
+    _db.session.commit()
+
+    response = client.get("/api/analytics?from=2024-05-01&to=2024-05-31")
+    assert response.status_code == 200
+    data = response.get_json()
+    (may,) = data["months"]
+    assert may["total"] == 60 and may["previous_year"] == 40
+    assert data["categories"]["super"]["total"] == 60
+
+
+def test_endpoint_defaults_to_last_twelve_months(client):
+    data = client.get("/api/analytics").get_json()
+    assert len(data["months"]) == 12
+    assert data["to"] == date.today().isoformat()
+
+
+@pytest.mark.parametrize(
+    "query",
+    ["from=nope", "from=2024-02-01&to=2024-01-01", "from=1990-01-01&to=2024-01-01"],
+)
+def test_endpoint_rejects_bad_ranges(client, query):
+    assert client.get(f"/api/analytics?{query}").status_code == 400
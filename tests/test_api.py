@@ -1,6 +1,9 @@
+import base64
 import pytest
 from datetime import datetime
+from sqlalchemy import event
 from app import Expense, db
+from services.database import read_engine
 
 
 @pytest.fixture(autouse=True)
@@ -9,6 +12,14 @@ def clean_db(_db):
     _db.session.commit()
 
 
+@pytest.fixture(params=["wsgi", "asgi"])
+def client(request, client):
+    """Every test here runs against the WSGI app and through the ASGI adapter."""
+    if request.param == "asgi":
+        return request.getfixturevalue("asgi_client")
+    return client
+
+
 def test_add_expense(client, sample_expense):
     """Test adding a new expense"""
     response = client.post("/api/expenses", json=sample_expense)
@@ -247,3 +258,248 @@ def test_trends_top_expenses_sorted_by_amount(client):
     amounts = [e["amount"] for e in top]
     assert amounts == sorted(amounts, reverse=True)
     assert top[0]["amount"] == 80.0
+
+
+def _add_search_fixtures():
+    rows = [
+        ("Amazon order", "AMAZON EU", "personal", datetime(2025, 4, 10)),
+        ("Amazon Prime", "AMAZON PRIME", "recurrent", datetime(2025, 5, 2)),
+        ("Groceries", "MERCADONA", "super", datetime(2025, 4, 11)),
+        ("Café con leche", None, "food_drink", datetime(2025, 4, 12)),
+    ]
+    for description, merchant, category, date in rows:
+        db.session.add(
+            Expense(
+                amount=10.0,
+                category=category,
+                description=description,
+                merchant=merchant,
+                date=date,
+            )
+        )
+    db.session.commit()
+
+
+def test_search_expenses(client):
+    """Search matches description and merchant, with date and category filters."""
+    _add_search_fixtures()
+
+    data = client.get("/api/expenses/search?q=amaz").get_json()
+    assert {e["description"] for e in data["expenses"]} == {
+        "Amazon order",
+        "Amazon Prime",
+    }
+
+    data = client.get("/api/expenses/search?q=mercadona").get_json()
+    assert [e["description"] for e in data["expenses"]] == ["Groceries"]
+
+    # Accents are folded so "cafe" finds "Café"
+    data = client.get("/api/expenses/search?q=cafe").get_json()
+    assert len(data["expenses"]) == 1
+
+    url = "/api/expenses/search?q=amazon&from=2025-04-01&to=2025-04-30"
+    data = client.get(url).get_json()
+    assert [e["description"] for e in data["expenses"]] == ["Amazon order"]
+
+    data = client.get("/api/expenses/search?q=amazon&category=recurrent").get_json()
+    assert [e["description"] for e in data["expenses"]] == ["Amazon Prime"]
+
+
+def test_search_tracks_updates_and_deletes(client):
+    """The index follows edits and deletions made through the API."""
+    _add_search_fixtures()
+    expense = Expense.query.filter_by(description="Groceries").first()
+
+    client.put(
+        f"/api/expenses/{expense.id}",
+        json={"amount": 10.0, "category": "super", "description": "Weekly shop"},
+    )
+    data = client.get("/api/expenses/search?q=weekly").get_json()
+    assert [e["id"] for e in data["expenses"]] == [expense.id]
+
+    client.delete(f"/api/expenses/{expense.id}")
+    data = client.get("/api/expenses/search?q=weekly").get_json()
+    assert data["expenses"] == []
+
+
+def test_search_keyset_pagination(client):
+    """Following next_cursor walks every match exactly once."""
+    for i in range(5):
+        db.session.add(
+            Expense(amount=1.0 + i, category="super", description=f"Lidl run {i}")
+        )
+    db.session.commit()
+
+    seen = []
+    url = "/api/expenses/search?q=lidl&limit=2"
+    while url:
+        data = client.get(url).get_json()
+        seen.extend(e["id"] for e in data["expenses"])
+        cursor = data["next_cursor"]
+        url = f"/api/expenses/search?q=lidl&limit=2&cursor={cursor}" if cursor else None
+    assert len(seen) == 5
+    assert len(set(seen)) == 5
+
+
+def _walk_search(client, url, first=None):
+    data = first or client.get(url).get_json()
+    seen = [e["description"] for e in data["expenses"]]
+    while data["next_cursor"]:
+        data = client.get(f"{url}&cursor={data['next_cursor']}").get_json()
+        seen.extend(e["description"] for e in data["expenses"])
+    return seen
+
+
+def test_search_pages_keep_rank_order_as_rows_are_added(client, app_instance):
+    """Pages follow one global rank order; a match added mid-walk, however
+    well it ranks, makes nothing repeat or go missing."""
+    words = ["Lidl", "shop", "run", "big", "week"]
+    # Shorter descriptions rank higher; inserted worst first so ids disagree
+    ranked = [" ".join(words[:n]) for n in range(1, 6)]
+    for description in reversed(ranked):
+        db.session.add(Expense(amount=1.0, category="super", description=description))
+    db.session.commit()
+
+    url = "/api/expenses/search?q=lidl&limit=2"
+    first = client.get(url).get_json()
+    db.session.add(Expense(amount=1.0, category="super", description="Lidl"))
+    db.session.commit()
+    assert _walk_search(client, url, first) == ranked
+
+    # Ranked again under the same snapshot when the kept order is gone
+    first = client.get(url).get_json()
+    app_instance.extensions["ranked_searches"]._ids.clear()
+    assert _walk_search(client, url, first) == ["Lidl"] + ranked
+
+
+def test_search_validation(client):
+    assert client.get("/api/expenses/search").status_code == 400
+    assert client.get("/api/expenses/search?q=x&cursor=bogus").status_code == 400
+    bad_cursor = base64.urlsafe_b64encode(b'["2025-01-01", 3, 0]').decode()
+    url = f"/api/expenses/search?q=x&cursor={bad_cursor}"
+    assert client.get(url).status_code == 400
+    assert client.get("/api/expenses/search?q=x&from=nope").status_code == 400
+
+
+def _add_query_fixtures():
+    rows = [
+        (12.5, "super", "manual", None, datetime(2025, 3, 3)),
+        (80.0, "super", "bank_sync", "MERCADONA VALENCIA", datetime(2025, 3, 9)),
+        (45.0, "transport", "bank_sync", "RENFE", datetime(2025, 3, 15)),
+        (9.99, "recurrent", "recurring", None, datetime(2025, 3, 20)),
+        (30.0, "food_drink", "manual", None, datetime(2025, 4, 2)),
+    ]
+    for amount, category, source, merchant, date in rows:
+        db.session.add(
+            Expense(
+                amount=amount,
+                category=category,
+                description=f"{category} {amount}",
+                source=source,
+                merchant=merchant,
+                date=date,
+            )
+        )
+    db.session.commit()
+
+
+def test_query_expenses_filters(client):
+    """Each filter narrows the result set."""
+    _add_query_fixtures()
+
+    def amounts(url):
+        response = client.get(url)
+        assert response.status_code == 200
+        return sorted(e["amount"] for e in response.get_json()["expenses"])
+
+    base = "/api/expenses/query?from=2025-03-01&to=2025-03-31"
+    assert amounts(base) == [9.99, 12.5, 45.0, 80.0]
+    assert amounts(base + "&category=super&category=transport") == [12.5, 45.0, 80.0]
+    assert amounts(base + "&category=super,transport&min_amount=40") == [45.0, 80.0]
+    assert amounts(base + "&max_amount=12.5") == [9.99, 12.5]
+    assert amounts(base + "&source=bank_sync") == [45.0, 80.0]
+    assert amounts(base + "&source=recurring") == [9.99]
+    assert amounts("/api/expenses/query?merchant=mercadona") == [80.0]
+
+
+def test_query_expenses_sort_and_cursor(client):
+    """Cursor pages follow the requested sort order without gaps."""
+    _add_query_fixtures()
+
+    collected = []
+    url = "/api/expenses/query?sort=amount&limit=2"
+    while url:
+        data = client.get(url).get_json()
+        collected.extend(e["amount"] for e in data["expenses"])
+        cursor = data["next_cursor"]
+        url = (
+            f"/api/expenses/query?sort=amount&limit=2&cursor={cursor}"
+            if cursor
+            else None
+        )
+    assert collected == [9.99, 12.5, 30.0, 45.0, 80.0]
+
+    data = client.get("/api/expenses/query?limit=2").get_json()
+    assert [e["date"][:10] for e in data["expenses"]] == ["2025-04-02", "2025-03-20"]
+    data = client.get(
+        f"/api/expenses/query?limit=2&cursor={data['next_cursor']}"
+    ).get_json()
+    assert [e["date"][:10] for e in data["expenses"]] == ["2025-03-15", "2025-03-09"]
+
+
+def test_query_expenses_validation(client):
+    assert client.get("/api/expenses/query?source=cash").status_code == 400
+    assert client.get("/api/expenses/query?sort=category").status_code == 400
+    assert client.get("/api/expenses/query?min_amount=abc").status_code == 400
+
+
+@pytest.fixture
+def query_plans(app_instance, client):
+    """Collect EXPLAIN QUERY PLAN output for every expense SELECT a request runs."""
+    statements = []
+    # GET requests read through the read-only engine
+    engine = read_engine(app_instance, db)
+
+    def capture(conn, cursor, statement, parameters, context, executemany):
+        if statement.lstrip().startswith("SELECT") and "FROM expense" in statement:
+            statements.append((statement, parameters))
+
+    event.listen(engine, "before_cursor_execute", capture)
+    yield statements
+    event.remove(engine, "before_cursor_execute", capture)
+
+
+def _plans(statements):
+    with db.engine.connect() as connection:
+        return [
+            " ".join(
+                row[3]
+                for row in connection.exec_driver_sql(
+                    "EXPLAIN QUERY PLAN " + statement, parameters
+                )
+            )
+            for statement, parameters in statements
+        ]
+
+
+@pytest.mark.parametrize(
+    "url, index",
+    [
+        ("/api/expenses/query?from=2025-03-01&to=2025-03-31", "ix_expense_date"),
+        (
+            "/api/expenses/query?from=2025-03-01&category=super",
+            "ix_expense_category_date",
+        ),
+        ("/api/expenses/query?source=bank_sync", "ix_expense_source_date"),
+        ("/api/expenses?month=3&year=2025", "ix_expense_date"),
+    ],
+)
+def test_query_shapes_use_indexes(client, query_plans, url, index):
+    """The planner picks the composite index built for each query shape."""
+    _add_query_fixtures()
+    query_plans.clear()
+
+    assert client.get(url).status_code == 200
+    plans = _plans(query_plans)
+    assert plans
+    assert all(f"USING INDEX {index}" in plan for plan in plans), plans
@@ -0,0 +1,102 @@
+import os
+import subprocess
+import sys
+
+import app as app_module
+import pytest
+from app import Expense, create_app, db
+
+
+@pytest.fixture
+def other_app(tmp_path):
+    other = create_app(
+        {
+            "SQLALCHEMY_DATABASE_URI": f"sqlite:///{tmp_path / 'other.db'}",
+            "MIGRATE_ON_START": True,
+            "SCHEDULER": False,
+            "JOB_WORKERS": 0,
+            "EXPENSE_CACHE": False,
+        }
+    )
+    yield other
+    with other.app_context():
+        db.engine.dispose()
+
+
+def test_apps_are_independent(other_app, _db, client):
+    assert "scheduler" not in other_app.extensions
+    for cache in ("forecast_cache", "ranked_searches"):
+        assert other_app.extensions[cache] is not app_module.app.extensions[cache]
+    other = other_app.test_client()
+    response = other.post(
+        "/api/expenses",
+        json={"amount": 3, "category": "super", "description": "Bread"},
+    )
+    assert response.status_code == 201
+    assert len(other.get("/api/expenses").get_json()["expenses"]) == 1
+    assert client.get("/api/expenses").get_json()["expenses"] == []
+    assert Expense.query.count() == 0
+
+
+def test_import_builds_no_app():
+    code = "import app, sys; print(app._app is None, 'apscheduler' in sys.modules)"
+    output = subprocess.run(
+        [sys.executable, "-c", code],
+        check=True,
+        capture_output=True,
+        text=True,
+    ).stdout
+    assert output.split() == ["True", "False"]
+
+
+def test_version_comes_from_the_version_file(tmp_path, monkeypatch):
+    version_file = tmp_path / "VERSION"
+    monkeypatch.setattr(app_module, "VERSION_FILE", str(version_file))
+    monkeypatch.setenv("APP_VERSION", "from-env")
+    app_module.app_version.cache_clear()
+    try:
+        assert app_module.app_version() == "from-env"
+        app_module.app_version.cache_clear()
+        version_file.write_text("abc1234\n")
+        assert app_module.app_version() == "abc1234"
+    finally:
+        app_module.app_version.cache_clear()
+
+
+def test_refuses_a_database_behind_its_migrations(tmp_path):
+    config = {
+        "SQLALCHEMY_DATABASE_URI": f"sqlite:///{tmp_path / 'behind.db'}",
+        "SCHEDULER": False,
+        "JOB_WORKERS": 0,
+        "EXPENSE_CACHE": False,
+        "MIGRATE_ON_START": False,
+    }
+    with pytest.raises(RuntimeError, match="migration"):
+        create_app(config)
+    migrated = create_app({**config, "MIGRATE_ON_START": True})
+    with migrated.app_context():
+        db.engine.dispose()
+
+
+def test_bank_sync_job_runs_under_python_app_py(tmp_path):
+    """`python app.py` runs the module as __main__: jobs must use its db, not
+    an `import app` copy that is registered on no app."""
+    code = f"""
+import runpy
+ns = runpy.run_path("app.py", run_name="__not_main__")
+app = ns["create_app"]({{
+    "SQLALCHEMY_DATABASE_URI": "sqlite:///{tmp_path / 'main.db'}",
+    "MIGRATE_ON_START": True, "SCHEDULER": False, "JOB_WORKERS": 0,
+    "EXPENSE_CACHE": False,
+}})
+with app.app_context():
+    print(ns["_bank_sync_job"](type("Job", (), {{"update": print}})())["status"])
+"""
+    output = subprocess.run(
+        [sys.executable, "-c", code],
+        check=True,
+        capture_output=True,
+        text=True,
+        cwd=os.path.dirname(os.path.dirname(os.path.abspath(__file__))),
+    ).stdout
+    assert output.split()[-1] == "skipped"
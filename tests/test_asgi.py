@@ -0,0 +1,203 @@
+import asyncio
+import contextlib
+import http.client
+import json
+import socket
+import threading
+import time
+
+import pytest
+from app import Expense, event_broker
+from services.asgi import AsgiAdapter, serve
+
+
+@pytest.fixture(autouse=True)
+def clean_db(_db):
+    _db.session.query(Expense).delete()
+    _db.session.commit()
+
+
+def _scope(method, path, query=b""):
+    return {
+        "type": "http",
+        "method": method,
+        "path": path,
+        "query_string": query,
+        "headers": [(b"host", b"testserver")],
+    }
+
+
+async def _get(adapter, path):
+    messages = []
+
+    async def receive():
+        return {"type": "http.request", "body": b""}
+
+    async def send(message):
+        messages.append(message)
+
+    await adapter(_scope("GET", path), receive, send)
+    return messages[0]["status"], b"".join(m.get("body", b"") for m in messages[1:])
+
+
+def test_open_streams_hold_no_thread(app_instance):
+    # One view thread: requests still get through while a stream is open
+    adapter = AsgiAdapter(app_instance, threads=1)
+    subscribers = len(event_broker)
+
+    async def scenario():
+        disconnect = asyncio.Event()
+        chunks = asyncio.Queue()
+
+        async def receive():
+            if not hasattr(receive, "sent"):
+                receive.sent = True
+                return {"type": "http.request", "body": b""}
+            await disconnect.wait()
+            return {"type": "http.disconnect"}
+
+        async def send(message):
+            await chunks.put(message)
+
+        stream = asyncio.ensure_future(
+            adapter(_scope("GET", "/api/events"), receive, send)
+        )
+        start = await chunks.get()
+        assert start["status"] == 200
+        assert (await chunks.get())["body"].startswith(b"retry:")
+
+        status, body = await _get(adapter, "/api/months")
+        assert (status, json.loads(body)) == (200, [])
+
+        # Published from another thread, as a job worker would
+        threading.Thread(
+            target=event_broker.publish, args=("sync.completed", {"added": 1})
+        ).start()
+        message = (await asyncio.wait_for(chunks.get(), 5))["body"].decode()
+        assert "event: sync.completed" in message
+
+        disconnect.set()
+        await asyncio.wait_for(stream, 5)
+
+    with app_instance.app_context():
+        asyncio.run(scenario())
+    assert len(event_broker) == subscribers
+    adapter.executor.shutdown()
+
+
+@pytest.fixture
+def server(app_instance):
+    """The built-in ASGI server on a free port, run on its own loop."""
+    loop = asyncio.new_event_loop()
+    ready = threading.Event()
+    address = []
+
+    def on_ready(bound):
+        address.extend(bound)
+        ready.set()
+
+    adapter = AsgiAdapter(app_instance, threads=2)
+    task = loop.create_task(serve(adapter, "127.0.0.1", 0, ready=on_ready))
+
+    def run():
+        with contextlib.suppress(asyncio.CancelledError):
+            loop.run_until_complete(task)
+
+    thread = threading.Thread(target=run)
+    thread.start()
+    assert ready.wait(5)
+    yield address[0], address[1]
+    loop.call_soon_threadsafe(task.cancel)
+    thread.join(5)
+    loop.close()
+
+
+def test_server_keeps_connections_alive(server):
+    connection = http.client.HTTPConnection(*server, timeout=5)
+    try:
+        connection.request(
+            "POST",
+            "/api/expenses",
+            body=json.dumps({"amount": 3, "category": "super", "description": "Tea"}),
+            headers={"Content-Type": "application/json"},
+        )
+        response = connection.getresponse()
+        assert response.status == 201
+        assert json.loads(response.read())["description"] == "Tea"
+        sock = connection.sock
+
+        connection.request("GET", "/api/expenses")
+        response = connection.getresponse()
+        body = json.loads(response.read())
+        assert [e["description"] for e in body["expenses"]] == ["Tea"]
+        assert connection.sock is sock
+
+        connection.request("GET", "/api/nope")
+        response = connection.getresponse()
+        assert response.status == 404
+        response.read()
+    finally:
+        connection.close()
+
+
+def test_server_streams_events(server):
+    subscribers = len(event_broker)
+    connection = http.client.HTTPConnection(*server, timeout=5)
+    try:
+        connection.request("GET", "/api/events")
+        response = connection.getresponse()
+        assert response.status == 200
+        assert response.getheader("Content-Type").startswith("text/event-stream")
+        assert response.fp.readline().startswith(b"retry:")
+        assert len(event_broker) == subscribers + 1
+    finally:
+        connection.close()
+        response.close()
+
+    # The server notices the client leaving without waiting for a heartbeat
+    deadline = time.monotonic() + 5
+    while len(event_broker) > subscribers and time.monotonic() < deadline:
+        time.sleep(0.01)
+    assert len(event_broker) == subscribers
+
+
+def _raw(address, request):
+    with socket.create_connection(address, timeout=5) as sock:
+        sock.sendall(request)
+        return sock.makefile("rb").read()
+
+
+@pytest.mark.parametrize(
+    "headers, status",
+    [
+        (b"Content-Length: 2\r\nContent-Length: 5\r\n", b"400"),
+        (b"Content-Length: 2\r\nTransfer-Encoding: chunked\r\n", b"400"),
+        (b"Transfer-Encoding: chunked\r\n", b"411"),
+        (b"Content-Length: 99999999999\r\n", b"413"),
+    ],
+)
+def test_server_refuses_ambiguous_or_large_bodies(server, headers, status):
+    response = _raw(server, b"POST /api/expenses HTTP/1.1\r\n" + headers + b"\r\n{}")
+    assert response.split(b" ", 2)[1] == status
+    assert b"Connection: close" in response
+
+
+def test_server_drops_idle_connections(app_instance):
+    adapter = AsgiAdapter(app_instance, threads=1)
+
+    async def scenario():
+        ready = asyncio.get_running_loop().create_future()
+        task = asyncio.ensure_future(
+            serve(adapter, "127.0.0.1", 0, ready.set_result, idle_timeout=0.2)
+        )
+        reader, writer = await asyncio.open_connection(*await ready)
+        writer.write(b"GET /api/months HTTP/1.1\r\nHost: x\r\n")  # never finished
+        closed = await asyncio.wait_for(reader.read(), 5)
+        writer.close()
+        task.cancel()
+        with contextlib.suppress(asyncio.CancelledError):
+            await task
+        return closed
+
+    with app_instance.app_context():
+        assert asyncio.run(scenario()) == b""
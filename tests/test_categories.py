@@ -0,0 +1,111 @@
+import sqlite3
+
+import pytest
+from app import Category, Expense, category_lookup, db, migrate_expense_category_ids
+from sqlalchemy import create_engine, inspect
+
+
+@pytest.fixture(autouse=True)
+def clean_db(_db):
+    _db.session.query(Expense).delete()
+    _db.session.commit()
+
+
+def test_listing_is_seeded_and_revalidated(client):
+    response = client.get("/api/categories")
+    assert response.status_code == 200
+    assert response.headers["Cache-Control"] == "no-cache"
+    categories = response.get_json()
+    assert categories["super"] == {
+        "label": "Super",
+        "color": "#3b82f6",
+        "icon": "shopping_cart",
+        "position": 0,
+    }
+    assert len(categories) == 14
+
+    cached = client.get(
+        "/api/categories", headers={"If-None-Match": response.headers["ETag"]}
+    )
+    assert cached.status_code == 304
+
+
+def test_put_creates_and_edits(client):
+    etag = client.get("/api/categories").headers["ETag"]
+
+    response = client.put(
+        "/api/categories/pets", json={"label": "Pets", "icon": "pets", "position": 3}
+    )
+    assert response.status_code == 201
+    assert response.get_json()["pets"]["label"] == "Pets"
+
+    response = client.put("/api/categories/pets", json={"color": "#123456"})
+    assert response.status_code == 200
+    assert response.get_json()["pets"] == {
+        "label": "Pets",
+        "color": "#123456",
+        "icon": "pets",
+        "position": 3,
+    }
+    assert client.get("/api/categories").headers["ETag"] != etag
+    assert client.put("/api/categories/pets", json={"label": " "}).status_code == 400
+    assert client.put("/api/categories/pets", json={"position": "1"}).status_code == 400
+
+
+def test_unknown_key_is_created_with_the_expense(client):
+    response = client.post(
+        "/api/expenses",
+        json={"amount": 5, "category": "gifts", "description": "Flowers"},
+    )
+    assert response.status_code == 201
+    assert response.get_json()["category"] == "gifts"
+    assert client.get("/api/categories").get_json()["gifts"]["label"] == "gifts"
+
+    expense = db.session.get(Expense, response.get_json()["id"])
+    assert expense.category_id == category_lookup.find("gifts")
+    assert db.session.query(Expense).filter(Expense.category == "gifts").count() == 1
+
+
+def test_rolled_back_category_is_forgotten(_db):
+    _db.session.add(Expense(amount=1, category="ephemeral", description="x"))
+    _db.session.flush()
+    assert category_lookup.find("ephemeral") is not None
+    _db.session.rollback()
+    assert category_lookup.find("ephemeral") is None
+    assert Category.query.filter_by(key="ephemeral").count() == 0
+
+
+def test_legacy_text_categories_are_migrated(_db, tmp_path):
+    path = tmp_path / "legacy.db"
+    with sqlite3.connect(path) as conn:
+        conn.execute(
+            "CREATE TABLE expense (id INTEGER PRIMARY KEY, amount FLOAT NOT NULL, "
+            "category VARCHAR(50) NOT NULL, description VARCHAR(200) NOT NULL, "
+            "date DATETIME)"
+        )
+        conn.execute("CREATE INDEX ix_expense_date ON expense (date)")
+        conn.executemany(
+            "INSERT INTO expense VALUES (?, ?, ?, ?, '2024-03-01 10:00:00.000000')",
+            [(4, 10.0, "super", "Mercadona"), (9, 2.5, "legacy", "Old key")],
+        )
+
+    engine = create_engine(f"sqlite:///{path}")
+    try:
+        db.metadata.create_all(engine)
+        with engine.begin() as connection:
+            assert migrate_expense_category_ids(connection)
+        with engine.begin() as connection:
+            assert not migrate_expense_category_ids(connection)
+            rows = connection.exec_driver_sql(
+                "SELECT expense.id, category.key, expense.source FROM expense "
+                "JOIN category ON category.id = expense.category_id ORDER BY expense.id"
+            ).all()
+            found = connection.exec_driver_sql(
+                "SELECT rowid FROM expense_fts WHERE expense_fts MATCH 'mercadona'"
+            ).all()
+        assert rows == [(4, "super", None), (9, "legacy", None)]
+        assert found == [(4,)]
+        indexes = {i["name"] for i in inspect(engine).get_indexes("expense")}
+        assert "ix_expense_category_date" in indexes
+    finally:
+        engine.dispose()
@@ -0,0 +1,122 @@
+import pytest
+from app import ChangeLog, Expense, MerchantMapping, db
+from sqlalchemy import text
+
+
+@pytest.fixture(autouse=True)
+def clean_db(_db):
+    _db.session.query(Expense).delete()
+    _db.session.query(ChangeLog).delete()
+    _db.session.commit()
+
+
+def _changes(client, **params):
+    response = client.get("/api/changes", query_string=params)
+    assert response.status_code == 200
+    return response.get_json()
+
+
+def _add_expense(client, description="Coffee"):
+    return client.post(
+        "/api/expenses",
+        json={"amount": 3, "category": "food_drink", "description": description},
+    ).get_json()
+
+
+def test_initial_sync_returns_rows(client):
+    first, second = _add_expense(client, "a"), _add_expense(client, "b")
+    result = _changes(client)
+    assert [c["data"] for c in result["changes"]] == [first, second]
+    assert {c["op"] for c in result["changes"]} == {"upsert"}
+    assert result["has_more"] is False
+
+
+def test_since_returns_only_later_changes(client):
+    expense = _add_expense(client)
+    cursor = _changes(client)["next"]
+    assert _changes(client, since=cursor)["changes"] == []
+
+    client.put(
+        f"/api/expenses/{expense['id']}",
+        json={"amount": 9, "category": "food_drink", "description": "Coffee"},
+    )
+    (change,) = _changes(client, since=cursor)["changes"]
+    assert change["op"] == "upsert"
+    assert change["data"]["amount"] == 9
+    assert change["seq"] > cursor
+
+
+def test_delete_leaves_a_tombstone(client):
+    expense = _add_expense(client)
+    cursor = _changes(client)["next"]
+    client.delete(f"/api/expenses/{expense['id']}")
+
+    (change,) = _changes(client, since=cursor)["changes"]
+    assert change == {
+        "seq": change["seq"],
+        "table": "expense",
+        "id": expense["id"],
+        "op": "delete",
+    }
+
+
+def test_only_latest_change_per_row_is_kept(client):
+    """Editing a row many times still costs one entry in the next sync."""
+    expense = _add_expense(client)
+    for amount in range(5):
+        client.put(
+            f"/api/expenses/{expense['id']}",
+            json={"amount": amount + 1, "category": "other", "description": "x"},
+        )
+    changes = _changes(client)["changes"]
+    assert len(changes) == 1
+    assert changes[0]["data"]["amount"] == 5
+    assert db.session.query(ChangeLog).count() == 1
+
+
+def test_paging(client):
+    for i in range(5):
+        _add_expense(client, str(i))
+    first = _changes(client, limit=3)
+    assert len(first["changes"]) == 3 and first["has_more"]
+    rest = _changes(client, since=first["next"], limit=3)
+    assert len(rest["changes"]) == 2 and not rest["has_more"]
+    seqs = [c["seq"] for c in first["changes"] + rest["changes"]]
+    assert seqs == sorted(seqs)
+
+
+def test_other_tables_and_raw_sql_are_logged(client, _db):
+    _db.session.add(
+        MerchantMapping(pattern="ACME", category="other", description="Acme")
+    )
+    _db.session.commit()
+    _db.session.execute(
+        text(
+            "INSERT INTO expense (amount, category_id, description, date, source) "
+            "VALUES (1, (SELECT id FROM category WHERE key = 'other'), 'raw', "
+            "'2024-01-01 00:00:00.000000', 'manual')"
+        )
+    )
+    _db.session.commit()
+
+    changes = _changes(client)["changes"]
+    assert [c["table"] for c in changes] == ["merchant_mapping", "expense"]
+    assert changes[0]["data"]["pattern"] == "ACME"
+    assert changes[1]["data"]["date"] == "2024-01-01T00:00:00"
+
+
+def test_seq_is_never_reused(client):
+    expense = _add_expense(client)
+    seq = _changes(client)["next"]
+    client.delete(f"/api/expenses/{expense['id']}")
+    deleted_seq = _changes(client)["next"]
+    assert deleted_seq > seq
+    _add_expense(client)
+    assert _changes(client)["next"] > deleted_seq
+
+
+@pytest.mark.parametrize(
+    "params", [{"since": "x"}, {"since": -1}, {"limit": 0}, {"limit": 10**6}]
+)
+def test_invalid_parameters(client, params):
+    assert client.get("/api/changes", query_string=params).status_code == 400
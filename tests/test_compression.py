@@ -0,0 +1,108 @@
+import gzip
+import os
+from datetime import datetime
+
+import pytest
+from app import Expense, app
+from services import compression
+
+
+@pytest.fixture(autouse=True)
+def clean_db(_db):
+    _db.session.query(Expense).delete()
+    _db.session.commit()
+
+
+@pytest.fixture
+def many_expenses(_db):
+    now = datetime.now().replace(day=15)
+    _db.session.add_all(
+        Expense(amount=i, category="other", description=f"Expense {i}", date=now)
+        for i in range(50)
+    )
+    _db.session.commit()
+
+
+def test_large_json_is_gzipped(client, many_expenses):
+    plain = client.get("/api/expenses")
+    assert "Content-Encoding" not in plain.headers
+
+    response = client.get("/api/expenses", headers={"Accept-Encoding": "gzip"})
+    assert response.headers["Content-Encoding"] == "gzip"
+    assert "Accept-Encoding" in response.headers["Vary"]
+    assert gzip.decompress(response.data) == plain.data
+
+
+def test_brotli_preferred_when_available(client, many_expenses):
+    brotli = pytest.importorskip("brotli")
+    response = client.get(
+        "/api/expenses", headers={"Accept-Encoding": "gzip, deflate, br"}
+    )
+    assert response.headers["Content-Encoding"] == "br"
+    assert brotli.decompress(response.data) == client.get("/api/expenses").data
+
+
+def test_small_json_left_alone(client, monkeypatch):
+    monkeypatch.setitem(app.config, "COMPRESS_MIN_BYTES", 10_000)
+    response = client.get("/api/categories", headers={"Accept-Encoding": "gzip"})
+    assert "Content-Encoding" not in response.headers
+    assert "Accept-Encoding" in response.headers["Vary"]
+
+
+def test_compressed_body_gets_its_own_etag(client, monkeypatch):
+    monkeypatch.setitem(app.config, "COMPRESS_MIN_BYTES", 0)
+    plain = client.get("/api/categories")
+    packed = client.get("/api/categories", headers={"Accept-Encoding": "gzip"})
+    assert packed.headers["Content-Encoding"] == "gzip"
+    assert packed.headers["ETag"] != plain.headers["ETag"]
+
+    revalidated = client.get(
+        "/api/categories",
+        headers={"Accept-Encoding": "gzip", "If-None-Match": packed.headers["ETag"]},
+    )
+    assert revalidated.status_code == 304
+    assert revalidated.data == b""
+
+
+def test_precompress_static(tmp_path):
+    (tmp_path / "big.js").write_text("export const x = 1;\n" * 200)
+    (tmp_path / "small.js").write_text("x")
+    (tmp_path / "icon.png").write_bytes(b"\x89PNG" * 500)
+
+    first = compression.precompress_static(str(tmp_path))
+    assert (tmp_path / "big.js.gz").exists()
+    assert not (tmp_path / "small.js.gz").exists()
+    assert not (tmp_path / "icon.png.gz").exists()
+    assert first == len(compression.supported_encodings())
+    # Up-to-date siblings are not rewritten
+    assert compression.precompress_static(str(tmp_path)) == 0
+
+
+def test_static_served_from_sibling(tmp_path):
+    source = tmp_path / "app.js"
+    source.write_text("console.log('hi');\n" * 200)
+    compression.precompress_static(str(tmp_path))
+
+    with app.test_request_context(headers={"Accept-Encoding": "gzip"}):
+        response = compression.send_static_precompressed(str(tmp_path), "app.js")
+        response.direct_passthrough = False
+        assert response.headers["Content-Encoding"] == "gzip"
+        assert response.mimetype == "text/javascript"
+        assert gzip.decompress(response.get_data()) == source.read_bytes()
+
+    # A sibling older than its source is stale and ignored
+    os.utime(source, (source.stat().st_mtime + 10,) * 2)
+    with app.test_request_context(headers={"Accept-Encoding": "gzip"}):
+        response = compression.send_static_precompressed(str(tmp_path), "app.js")
+        assert "Content-Encoding" not in response.headers
+
+
+def test_static_route_uses_precompressed(client):
+    response = client.get(
+        "/static/components/api-service.js", headers={"Accept-Encoding": "gzip"}
+    )
+    assert response.status_code == 200
+    assert response.headers["Content-Encoding"] == "gzip"
+    assert "Accept-Encoding" in response.headers["Vary"]
+    with open(os.path.join(app.static_folder, "components", "api-service.js")) as f:
+        assert gzip.decompress(response.data).decode() == f.read()
@@ -0,0 +1,127 @@
+import threading
+import time
+
+import pytest
+from app import AppToken, Expense, db
+from services import database
+from sqlalchemy import event
+from sqlalchemy.exc import OperationalError
+
+
+@pytest.fixture(autouse=True)
+def clean_db(_db):
+    _db.session.query(Expense).delete()
+    _db.session.query(AppToken).delete()
+    _db.session.commit()
+
+
+@pytest.fixture
+def statements_by_engine(app_instance):
+    """SQL statements run on the read-only and the main engine."""
+    seen = {"read": [], "main": []}
+    engines = {"read": database.read_engine(app_instance, db), "main": db.engine}
+
+    listeners = []
+    for role, engine in engines.items():
+
+        def capture(conn, cursor, statement, *args, role=role):
+            seen[role].append(statement.split()[0].upper())
+
+        event.listen(engine, "before_cursor_execute", capture)
+        listeners.append((engine, capture))
+    yield seen
+    for engine, capture in listeners:
+        event.remove(engine, "before_cursor_execute", capture)
+
+
+def test_safe_requests_read_on_the_read_engine(client, statements_by_engine):
+    response = client.post(
+        "/api/expenses",
+        json={"amount": 4, "category": "super", "description": "Milk"},
+    )
+    assert response.status_code == 201
+    assert "INSERT" in statements_by_engine["main"]
+    assert statements_by_engine["read"] == []
+
+    db.session.commit()
+    body = client.get("/api/expenses").get_json()
+    assert [e["description"] for e in body["expenses"]] == ["Milk"]
+    assert "SELECT" in statements_by_engine["read"]
+
+
+def test_read_engine_refuses_writes(app_instance):
+    engine = database.read_engine(app_instance, db)
+    assert engine is not db.engine
+    with engine.connect() as connection:
+        assert connection.exec_driver_sql("PRAGMA query_only").scalar() == 1
+        with pytest.raises(OperationalError, match="readonly"):
+            connection.exec_driver_sql("DELETE FROM expense")
+    with db.engine.connect() as connection:
+        assert connection.exec_driver_sql("PRAGMA journal_mode").scalar() == "wal"
+
+
+def _waited_seconds():
+    return sum(
+        value
+        for name, _, value in database.db_write_wait.samples()
+        if name.endswith("_sum")
+    )
+
+
+def test_writers_take_turns():
+    engine = db.engine
+    waits, waited = database.db_write_wait.count(), _waited_seconds()
+    first = engine.connect()
+    first.exec_driver_sql("INSERT INTO app_token (key, value) VALUES ('a', '1')")
+
+    def second_writer():
+        with engine.begin() as connection:
+            connection.exec_driver_sql(
+                "INSERT INTO app_token (key, value) VALUES ('b', '2')"
+            )
+
+    thread = threading.Thread(target=second_writer)
+    thread.start()
+    time.sleep(0.2)
+    assert thread.is_alive()  # queued behind the open write transaction
+    first.commit()
+    first.close()
+    thread.join(timeout=5)
+    assert not thread.is_alive()
+    # The second writer waited on the lock, not on SQLite's busy handler
+    assert database.db_write_wait.count() == waits + 2
+    assert _waited_seconds() - waited >= 0.15
+    assert AppToken.query.count() == 2
+
+
+def test_writer_gives_up_once_per_transaction(monkeypatch):
+    monkeypatch.setattr(database, "WRITE_LOCK_TIMEOUT", 0.1)
+    engine = db.engine
+    holder = engine.connect()
+    holder.exec_driver_sql("INSERT INTO app_token (key, value) VALUES ('a', '1')")
+    waits = database.db_write_wait.count()
+    outcome = []
+
+    def late_writer():
+        connection = engine.connect()
+        connection.exec_driver_sql("PRAGMA busy_timeout = 50")
+        for key in "bcd":
+            try:
+                connection.exec_driver_sql(
+                    f"INSERT INTO app_token (key, value) VALUES ('{key}', '2')"
+                )
+            except OperationalError:
+                pass  # SQLite's own lock, with the writer slot given up
+        outcome.append(connection.info.get("write_lock"))
+        connection.rollback()
+        outcome.append(connection.info.get("write_lock"))
+        connection.invalidate()  # not back into the pool with that busy timeout
+
+    thread = threading.Thread(target=late_writer)
+    thread.start()
+    thread.join(timeout=30)
+    holder.rollback()
+    holder.close()
+    assert outcome == [False, None]
+    # Only the first statement waited for the lock
+    assert database.db_write_wait.count() == waits + 1
@@ -0,0 +1,168 @@
+import asyncio
+import json
+import threading
+
+import pytest
+from app import Expense, app, event_broker
+from services.events import EventBroker, format_event
+
+
+@pytest.fixture(autouse=True)
+def clean_db(_db):
+    _db.session.query(Expense).delete()
+    _db.session.commit()
+
+
+@pytest.fixture
+def stream(client, monkeypatch):
+    """An open /api/events response and a reader returning its next event."""
+    monkeypatch.setitem(app.config, "SSE_HEARTBEAT_SECONDS", 0.05)
+    response = client.get("/api/events", buffered=False)
+    chunks = (chunk.decode() for chunk in response.response)
+    assert next(chunks).startswith("retry:")
+
+    def read():
+        for chunk in chunks:
+            if chunk.startswith(":"):
+                continue
+            fields = dict(line.split(": ", 1) for line in chunk.strip().split("\n"))
+            return fields["event"], json.loads(fields["data"])
+
+    yield response, read
+    response.close()
+
+
+def _parse(message):
+    return dict(line.split(": ", 1) for line in message.strip().split("\n"))
+
+
+def test_broker_fans_out_in_order():
+    broker = EventBroker()
+    first, second = broker.subscribe(), broker.subscribe()
+    broker.publish("expense.created", {"id": 1})
+    broker.publish("expense.deleted", {"id": 1})
+
+    for subscription in (first, second):
+        messages = [_parse(subscription.queue.get_nowait()) for _ in range(2)]
+        assert [m["id"] for m in messages] == ["1", "2"]
+        assert [m["event"] for m in messages] == ["expense.created", "expense.deleted"]
+
+
+def test_full_queue_collapses_to_resync():
+    """A client that falls behind gets one resync instead of a growing backlog."""
+    broker = EventBroker(queue_size=3)
+    slow = broker.subscribe()
+    for i in range(10):
+        broker.publish("expense.created", {"id": i})
+
+    messages = [_parse(slow.queue.get_nowait()) for _ in range(slow.queue.qsize())]
+    assert len(messages) <= 3
+    assert "resync" in [m["event"] for m in messages]
+
+
+def test_max_clients():
+    broker = EventBroker(max_clients=1)
+    subscription = broker.subscribe()
+    assert broker.subscribe() is None
+    broker.unsubscribe(subscription)
+    assert broker.subscribe() is not None
+
+
+def test_stream_sends_heartbeats():
+    broker = EventBroker()
+    stream = broker.stream(broker.subscribe(), heartbeat=0.01)
+    chunks = iter(stream)
+    assert next(chunks) == b"retry: 5000\n\n"
+    assert next(chunks) == b": keepalive\n\n"
+    stream.close()
+    assert len(broker) == 0
+
+
+def test_async_stream_wakes_on_publish():
+    broker = EventBroker()
+    stream = broker.stream(broker.subscribe(), heartbeat=0.01)
+
+    async def read():
+        chunks = aiter(stream)
+        received = [await anext(chunks), await anext(chunks)]
+        # Published from another thread while the stream waits on the loop
+        threading.Timer(0.05, broker.publish, ("sync.completed", {})).start()
+        while not (chunk := await anext(chunks)).startswith(b"id:"):
+            received.append(chunk)
+        return received, chunk
+
+    received, event = asyncio.run(read())
+    assert received[:2] == [b"retry: 5000\n\n", b": keepalive\n\n"]
+    assert _parse(event.decode())["event"] == "sync.completed"
+    stream.close()
+    assert len(broker) == 0
+
+
+def test_format_event():
+    assert format_event("sync.completed", {"added": 2}, 7) == (
+        'id: 7\nevent: sync.completed\ndata: {"added":2}\n\n'
+    )
+
+
+def test_events_endpoint_headers(stream):
+    response, _ = stream
+    assert response.status_code == 200
+    assert response.mimetype == "text/event-stream"
+    assert response.headers["X-Accel-Buffering"] == "no"
+    assert "Content-Encoding" not in response.headers
+
+
+def test_expense_changes_are_streamed(client, stream):
+    _, read = stream
+    created = client.post(
+        "/api/expenses", json={"amount": 12, "category": "other", "description": "a"}
+    ).get_json()
+    assert read() == ("expense.created", created)
+
+    client.put(
+        f"/api/expenses/{created['id']}",
+        json={"amount": 15, "category": "other", "description": "a"},
+    )
+    event_type, data = read()
+    assert event_type == "expense.updated"
+    assert data["id"] == created["id"] and data["amount"] == 15
+
+    client.delete(f"/api/expenses/{created['id']}")
+    assert read() == (
+        "expense.deleted",
+        {"id": created["id"], "date": created["date"]},
+    )
+
+
+def test_unchanged_expense_is_not_streamed(client, stream):
+    _, read = stream
+    body = {"amount": 12, "category": "other", "description": "a"}
+    created = client.post("/api/expenses", json=body).get_json()
+    read()
+    client.put(f"/api/expenses/{created['id']}", json=body)
+    event_broker.publish("sync.completed", {"added": 0})
+    assert read() == ("sync.completed", {"added": 0})
+
+
+def test_rolled_back_changes_are_not_streamed(_db, stream):
+    _, read = stream
+    _db.session.add(Expense(amount=1, category="other", description="x"))
+    _db.session.flush()
+    _db.session.rollback()
+    event_broker.publish("sync.completed", {"added": 0})
+    assert read() == ("sync.completed", {"added": 0})
+
+
+def test_closing_the_stream_unsubscribes(client):
+    before = len(event_broker)
+    response = client.get("/api/events", buffered=False)
+    assert len(event_broker) == before + 1
+    response.close()
+    assert len(event_broker) == before
+
+
+def test_too_many_clients(client, monkeypatch):
+    monkeypatch.setattr(event_broker, "max_clients", len(event_broker))
+    response = client.get("/api/events")
+    assert response.status_code == 503
+    assert response.headers["Retry-After"] == "30"
@@ -0,0 +1,125 @@
+import sqlite3
+from datetime import date, datetime
+
+import pytest
+from app import Expense, app, db, expense_cache
+from services import expense_cache as cache_module
+from sqlalchemy import func, select
+
+DAY = date(2024, 3, 15)
+
+
+@pytest.fixture(autouse=True)
+def clean_db(_db):
+    _db.session.query(Expense).delete()
+    _db.session.commit()
+
+
+def _add(client, amount, category="super", day=DAY):
+    return client.post(
+        "/api/expenses",
+        json={
+            "amount": amount,
+            "category": category,
+            "description": "x",
+            "date": day.isoformat(),
+        },
+    ).get_json()
+
+
+def _totals(first=DAY, last=DAY):
+    return expense_cache.category_totals(first.toordinal(), last.toordinal())
+
+
+def _sql_totals():
+    rows = db.session.execute(
+        select(Expense.category, func.sum(Expense.amount)).group_by(Expense.category)
+    )
+    return dict(rows.all())
+
+
+def test_writes_are_applied_incrementally(client):
+    _totals()
+    rebuilds, applied = expense_cache.rebuilds, expense_cache.applied
+
+    first = _add(client, 10)
+    second = _add(client, 5, "food_drink")
+    assert _totals() == {"super": 10, "food_drink": 5}
+
+    client.put(
+        f"/api/expenses/{first['id']}",
+        json={"amount": 7, "category": "xofa", "description": "x"},
+    )
+    client.delete(f"/api/expenses/{second['id']}")
+    assert _totals() == _sql_totals() == {"xofa": 7}
+    assert expense_cache.rebuilds == rebuilds
+    assert expense_cache.applied == applied + 4
+
+
+def test_range_is_inclusive_and_sorted(client):
+    for day in (date(2024, 3, 1), date(2024, 3, 31), date(2024, 2, 29), DAY):
+        _add(client, 1, day=day)
+    assert _totals(date(2024, 3, 1), date(2024, 3, 31)) == {"super": 3}
+    assert list(expense_cache.days) == sorted(expense_cache.days)
+    (row,) = expense_cache.rows(
+        date(2024, 2, 29).toordinal(), date(2024, 2, 29).toordinal()
+    )
+    assert row == (date(2024, 2, 29).toordinal(), "super", 1)
+
+
+def test_external_writer_is_detected(client):
+    _add(client, 10)
+    assert _totals() == {"super": 10}
+    with sqlite3.connect(db.engine.url.database) as conn:
+        conn.execute(
+            "INSERT INTO expense (amount, category_id, description, date, source) "
+            "VALUES (2.5, (SELECT id FROM category WHERE key = 'other'), 'raw', "
+            "'2024-03-15 12:00:00.000000', 'manual')"
+        )
+    assert _totals() == {"super": 10, "other": 2.5}
+
+
+def test_large_batches_and_schema_changes_rebuild(client, monkeypatch):
+    _totals()
+    rebuilds = expense_cache.rebuilds
+    monkeypatch.setattr(cache_module, "REBUILD_THRESHOLD", 2)
+    for _ in range(3):
+        _add(client, 1)
+    assert _totals() == {"super": 3}
+    assert expense_cache.rebuilds == rebuilds + 1
+
+    db.drop_all()
+    db.create_all()
+    assert _totals() == {}
+    assert expense_cache.rebuilds == rebuilds + 2
+
+
+@pytest.mark.parametrize("url", ["/api/trends", "/api/analytics"])
+def test_endpoints_match_sql(client, monkeypatch, url):
+    today = datetime.now().date()
+    for amount, category, day in [
+        (12.5, "super", today),
+        (3, "food_drink", today.replace(day=1)),
+        (40, "super", today.replace(year=today.year - 1, day=1)),
+    ]:
+        _add(client, amount, category, day)
+
+    cached = client.get(url).get_json()
+    monkeypatch.setitem(app.config, "EXPENSE_CACHE", False)
+    assert client.get(url).get_json() == cached
+
+
+def test_debug_endpoint_reports_footprint(client, monkeypatch):
+    monkeypatch.setenv("INTERNAL_API_KEY", "secret")
+    _add(client, 1)
+    _totals()
+    assert client.get("/api/debug/expense-cache").status_code == 401
+
+    response = client.get(
+        "/api/debug/expense-cache", headers={"X-Internal-Key": "secret"}
+    )
+    footprint = response.get_json()
+    assert footprint["rows"] == 1
+    assert footprint["columns"]["amounts"]["bytes"] == 8
+    assert footprint["bytes"] == sum(c["bytes"] for c in footprint["columns"].values())
+    assert footprint["allocated_bytes"] >= footprint["bytes"]
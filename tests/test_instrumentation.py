@@ -0,0 +1,120 @@
+import logging
+
+import pytest
+from app import Expense, app, category_lookup
+
+
+@pytest.fixture(autouse=True)
+def clean_db(_db):
+    _db.session.query(Expense).delete()
+    _db.session.commit()
+
+
+def _timings(response):
+    parts = {}
+    for metric in response.headers["Server-Timing"].split(", "):
+        name, *params = metric.split(";")
+        parts[name] = dict(p.split("=", 1) for p in params)
+    return parts
+
+
+def test_server_timing_header(client, test_expenses):
+    """API responses break the request down into db, serialize and json time."""
+    response = client.get("/api/expenses")
+    assert response.status_code == 200
+
+    timings = _timings(response)
+    assert set(timings) == {"db", "serialize", "json", "app", "total"}
+    assert timings["db"]["desc"] == '"1 queries"'
+    assert float(timings["total"]["dur"]) >= float(timings["db"]["dur"])
+
+
+def test_server_timing_counts_each_query(client, test_expenses):
+    response = client.get("/api/expenses?page=1&per_page=2")
+    # COUNT(*) for the total plus the page itself
+    assert _timings(response)["db"]["desc"] == '"2 queries"'
+
+
+def test_slow_request_log(client, caplog, monkeypatch):
+    """Requests over SLOW_REQUEST_MS produce one structured log line."""
+    monkeypatch.setitem(app.config, "SLOW_REQUEST_MS", 0)
+    with caplog.at_level(logging.WARNING, logger="services.instrumentation"):
+        client.get("/api/months")
+
+    lines = [r.getMessage() for r in caplog.records if "slow_request" in r.msg]
+    assert len(lines) == 1
+    assert '"path": "/api/months"' in lines[0]
+    assert '"queries": 1' in lines[0]
+
+
+@pytest.fixture
+def slow_queries(monkeypatch):
+    """Profile every statement and start from an empty buffer."""
+    monkeypatch.setitem(app.config, "SLOW_QUERY_MS", 0)
+    monkeypatch.delenv("INTERNAL_API_KEY", raising=False)
+    log = app.extensions["slow_queries"]
+    log.clear()
+    yield log
+    log.clear()
+
+
+def test_slow_query_profiler_disabled_by_default(client, test_expenses):
+    log = app.extensions["slow_queries"]
+    log.clear()
+    client.get("/api/expenses")
+    assert log.recent() == []
+
+
+def test_slow_query_captures_plan_and_route(
+    client, test_expenses, slow_queries, caplog
+):
+    with caplog.at_level(logging.WARNING, logger="services.sql_profiler"):
+        client.get("/api/months")
+
+    response = client.get("/api/debug/slow-queries")
+    assert response.status_code == 200
+    data = response.get_json()
+    assert data["threshold_ms"] == 0
+
+    entry = next(e for e in data["recent"] if "FROM expense" in e["statement"])
+    assert entry["caller"] == "GET /api/months"
+    assert entry["plan"]
+    # Grouping on extract() has to walk every row of ix_expense_date
+    assert entry["full_scan"] is True
+    assert any(s["full_scan"] for s in data["statements"])
+    assert any("slow_query" in r.msg for r in caplog.records)
+
+
+def test_slow_query_records_bound_parameters(client, test_expenses, slow_queries):
+    client.get("/api/expenses/query?category=Transport")
+    entry = next(
+        e
+        for e in slow_queries.recent()
+        if "FROM expense" in e["statement"] and "category" in e["statement"]
+    )
+    assert category_lookup.find("Transport") in entry["parameters"][0]
+    assert entry["full_scan"] is False
+
+
+def test_slow_query_endpoint_requires_internal_key(client, monkeypatch):
+    monkeypatch.setenv("INTERNAL_API_KEY", "secret")
+    assert client.get("/api/debug/slow-queries").status_code == 401
+    response = client.get(
+        "/api/debug/slow-queries", headers={"X-Internal-Key": "secret"}
+    )
+    assert response.status_code == 200
+
+
+def test_slow_query_endpoint_clear(client, test_expenses, slow_queries):
+    client.get("/api/expenses")
+    assert slow_queries.recent()
+    assert client.delete("/api/debug/slow-queries").status_code == 204
+    assert slow_queries.recent() == []
+
+
+def test_slow_query_attributed_to_job(client, slow_queries):
+    from app import apply_due_recurring_expenses
+
+    apply_due_recurring_expenses()
+    callers = {entry["caller"] for entry in slow_queries.recent()}
+    assert "job:apply_recurring" in callers
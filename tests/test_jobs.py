@@ -0,0 +1,266 @@
+import threading
+from datetime import timedelta
+
+import pytest
+from app import QueuedJob, app, job_queue
+from services import bank_sync, jobs, metrics
+from services.jobs import JobQueue, _utcnow
+from sqlalchemy import select, update
+
+
+@pytest.fixture(autouse=True)
+def clean_db(_db):
+    _db.session.query(QueuedJob).delete()
+    _db.session.commit()
+
+
+@pytest.fixture
+def queue(_db):
+    """A JobQueue on the app database with its own handlers."""
+    return JobQueue(app, _db, QueuedJob.__table__)
+
+
+def _make_ready(queue, job_id, **values):
+    with app.app_context():
+        with queue.db.engine.begin() as conn:
+            conn.execute(
+                update(queue.table)
+                .where(queue.table.c.id == job_id)
+                .values(run_at=_utcnow() - timedelta(seconds=1), **values)
+            )
+
+
+def test_job_runs_with_progress_and_result(queue):
+    def work(job):
+        job.update(pages=1)
+        job.update(inserted=job.payload["rows"])
+        return {"added": job.payload["rows"]}
+
+    queue.register("sync", work)
+    job, created = queue.enqueue("sync", payload={"rows": 3})
+    assert created and job["status"] == "queued"
+
+    assert queue.run_pending() == 1
+    job = queue.get(job["id"])
+    assert job["status"] == "succeeded"
+    assert job["progress"] == {"pages": 1, "inserted": 3}
+    assert job["result"] == {"added": 3}
+    assert job["attempts"] == 1
+
+
+def test_dedupe_key_returns_active_job(queue):
+    queue.register("sync", lambda job: None)
+    first, created = queue.enqueue("sync", dedupe_key="sync")
+    second, coalesced = queue.enqueue("sync", dedupe_key="sync")
+    assert created and not coalesced
+    assert second["id"] == first["id"]
+
+    queue.run_pending()
+    third, created = queue.enqueue("sync", dedupe_key="sync")
+    assert created and third["id"] != first["id"]
+
+
+def test_priority_order(queue):
+    ran = []
+    queue.register("low", lambda job: ran.append("low"), priority=0)
+    queue.register("high", lambda job: ran.append("high"), priority=10)
+    queue.enqueue("low")
+    queue.enqueue("high")
+    queue.run_pending()
+    assert ran == ["high", "low"]
+
+
+def test_failures_retry_with_backoff_then_fail(queue, monkeypatch):
+    monkeypatch.setitem(app.config, "JOB_RETRY_BACKOFF_SECONDS", 60)
+    queue.register("flaky", lambda job: 1 / 0, max_attempts=2)
+    job, _ = queue.enqueue("flaky")
+
+    assert queue.run_pending() == 1
+    retry = queue.get(job["id"])
+    assert retry["status"] == "queued"
+    assert "division by zero" in retry["error"]
+    # Not ready again until the backoff has passed
+    assert queue.run_pending() == 0
+
+    _make_ready(queue, job["id"])
+    queue.run_pending()
+    failed = queue.get(job["id"])
+    assert failed["status"] == "failed" and failed["attempts"] == 2
+
+
+def test_expired_lease_is_claimed_again(queue):
+    """A job whose worker died mid-run (e.g. a restart) is picked up again."""
+    queue.register("sync", lambda job: "done")
+    job, _ = queue.enqueue("sync")
+    assert queue.claim().id == job["id"]
+    # Still leased: nobody else gets it
+    assert queue.claim() is None
+
+    _make_ready(queue, job["id"], locked_until=_utcnow() - timedelta(seconds=1))
+    queue.run_pending()
+    job = queue.get(job["id"])
+    assert job["status"] == "succeeded" and job["attempts"] == 2
+
+
+def _locked_until(queue, job_id):
+    with app.app_context():
+        with queue.db.engine.connect() as conn:
+            return conn.execute(
+                select(queue.table.c.locked_until).where(queue.table.c.id == job_id)
+            ).scalar()
+
+
+def test_progress_renews_the_lease(queue, monkeypatch):
+    monkeypatch.setitem(app.config, "JOB_VISIBILITY_SECONDS", 60)
+    leases = []
+
+    def work(job):
+        job.update(pages=1)  # lease still fresh: no write
+        leases.append(job.locked_until)
+        job.locked_until = _utcnow() + timedelta(seconds=10)  # mostly used up
+        job.update(pages=2)
+        leases.append(job.locked_until)
+        leases.append(_locked_until(queue, job.id))
+
+    queue.register("sync", work)
+    queue.enqueue("sync")
+    queue.run_pending()
+    first, renewed, stored = leases
+    assert renewed > _utcnow() + timedelta(seconds=50)
+    assert renewed >= first and stored == renewed
+
+
+def test_late_attempt_does_not_overwrite_the_next(queue):
+    """A worker that outlived its lease cannot record over the new attempt."""
+    other = JobQueue(app, queue.db, queue.table)
+    other.register("sync", lambda job: "second")
+    reclaimed = []
+
+    def slow(job):
+        _make_ready(queue, job.id, locked_until=_utcnow() - timedelta(seconds=1))
+        reclaimed.append(other.claim())
+        raise RuntimeError("first attempt gave up")
+
+    queue.register("sync", slow)
+    job, _ = queue.enqueue("sync")
+    queue.run_pending()
+    assert reclaimed[0].attempts == 2
+    late = queue.get(job["id"])
+    assert late["status"] == "running" and late["error"] is None
+
+    other.execute(reclaimed[0])
+    done = queue.get(job["id"])
+    assert done["status"] == "succeeded" and done["result"] == "second"
+
+
+def test_claim_without_update_returning(queue, monkeypatch):
+    """SQLite before 3.35 (no RETURNING) claims with a conditional UPDATE."""
+    monkeypatch.setattr(jobs, "UPDATE_RETURNING", False)
+    ran = []
+    queue.register("low", lambda job: ran.append("low"), priority=0)
+    queue.register("high", lambda job: ran.append("high"), priority=10)
+    low, _ = queue.enqueue("low")
+    queue.enqueue("high")
+    row = queue.claim()
+    assert row.kind == "high" and row.attempts == 1 and row.locked_until
+    queue.execute(row)
+    assert queue.run_pending() == 1 and queue.claim() is None
+    assert ran == ["high", "low"]
+    assert queue.get(low["id"])["status"] == "succeeded"
+
+
+def test_expired_last_attempt_fails(queue):
+    """A job that keeps killing its worker stops at max_attempts."""
+    queue.register("crash", lambda job: None, max_attempts=2)
+    job, _ = queue.enqueue("crash")
+    for attempt in (1, 2):
+        assert queue.claim().attempts == attempt
+        _make_ready(queue, job["id"], locked_until=_utcnow() - timedelta(seconds=1))
+
+    assert queue.claim() is None
+    failed = queue.get(job["id"])
+    assert failed["status"] == "failed" and failed["attempts"] == 2
+    assert "lease expired" in failed["error"]
+
+
+def test_jobs_survive_a_new_queue(queue):
+    """Queued jobs are rows, not memory: a restarted process runs them."""
+    queue.register("sync", lambda job: None)
+    job, _ = queue.enqueue("sync")
+
+    restarted = JobQueue(app, queue.db, queue.table)
+    restarted.register("sync", lambda job: "ran after restart")
+    restarted.run_pending()
+    assert restarted.get(job["id"])["result"] == "ran after restart"
+
+
+def test_depth_and_latency_metrics(queue):
+    queue.register("sync", lambda job: None)
+    queue.enqueue("sync")
+    queue.enqueue("sync")
+    assert queue.depth() == {("sync", "queued"): 2}
+
+    wait = metrics.REGISTRY.get("pf_job_queue_wait_seconds")
+    before = wait.count("sync")
+    queue.run_pending()
+    assert queue.depth() == {}
+    assert wait.count("sync") == before + 2
+
+
+@pytest.fixture
+def slow_sync(monkeypatch):
+    """sync_transactions replaced by one that waits to be released."""
+    started, release = threading.Event(), threading.Event()
+
+    def fake_sync(db, models, progress=None):
+        progress(pages=2)
+        started.set()
+        release.wait(5)
+        progress(inserted=4)
+        return {"status": "ok", "added": 4}
+
+    monkeypatch.setattr(bank_sync, "sync_transactions", fake_sync)
+    yield started, release
+    release.set()
+
+
+def test_sync_endpoint_queues_job(client, slow_sync):
+    started, release = slow_sync
+    response = client.post("/api/bank/sync")
+    assert response.status_code == 202
+    job = response.get_json()
+    assert job["status"] == "queued"
+    assert response.headers["Location"] == f"/api/bank/sync/{job['id']}"
+
+    worker = threading.Thread(target=job_queue.run_pending)
+    worker.start()
+    started.wait(5)
+    # A second request joins the running sync
+    assert client.post("/api/bank/sync").get_json()["id"] == job["id"]
+    running = client.get(f"/api/bank/sync/{job['id']}").get_json()
+    assert running["status"] == "running"
+    assert running["progress"] == {"pages": 2}
+
+    release.set()
+    worker.join(5)
+    finished = client.get(f"/api/bank/sync/{job['id']}").get_json()
+    assert finished["status"] == "succeeded"
+    assert finished["progress"] == {"pages": 2, "inserted": 4}
+    assert finished["result"] == {"status": "ok", "added": 4}
+
+
+def test_sync_error_is_retried(client, monkeypatch):
+    monkeypatch.setattr(
+        bank_sync,
+        "sync_transactions",
+        lambda db, models, progress=None: {"status": "error", "error": "bank down"},
+    )
+    job_id = client.post("/api/bank/sync").get_json()["id"]
+    job_queue.run_pending()
+    job = client.get(f"/api/jobs/{job_id}").get_json()
+    assert job["status"] == "queued" and job["error"] == "bank down"
+
+
+def test_unknown_job(client):
+    assert client.get("/api/bank/sync/nope").status_code == 404
+    assert client.get("/api/jobs/nope").status_code == 404
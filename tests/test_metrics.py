@@ -0,0 +1,138 @@
+import json
+from datetime import datetime
+
+import app as app_module
+import pytest
+from app import AppToken, Expense, apply_due_recurring_expenses, db
+from services import enable_banking, metrics
+from services.bank_sync import sync_transactions
+
+
+@pytest.fixture(autouse=True)
+def clean_db(_db):
+    _db.session.query(Expense).delete()
+    _db.session.query(AppToken).delete()
+    _db.session.commit()
+
+
+def _scrape(client):
+    response = client.get("/metrics")
+    assert response.status_code == 200
+    assert response.headers["Content-Type"] == metrics.CONTENT_TYPE
+    samples = {}
+    for line in response.get_data(as_text=True).splitlines():
+        if line and not line.startswith("#"):
+            name, value = line.rsplit(" ", 1)
+            samples[name] = float(value)
+    return samples
+
+
+def test_registry_render_format():
+    registry = metrics.Registry()
+    counter = registry.register(metrics.Counter("t_total", "Test.", ("kind",)))
+    histogram = registry.register(
+        metrics.Histogram("t_seconds", "Test.", buckets=(0.1, 1.0))
+    )
+    counter.inc('a"b')
+    counter.inc('a"b', amount=2)
+    histogram.observe(0.05)
+    histogram.observe(0.5)
+
+    lines = registry.render().splitlines()
+    assert "# TYPE t_total counter" in lines
+    assert 't_total{kind="a\\"b"} 3' in lines
+    assert 't_seconds_bucket{le="0.1"} 1' in lines
+    assert 't_seconds_bucket{le="1.0"} 2' in lines
+    assert 't_seconds_bucket{le="+Inf"} 2' in lines
+    assert "t_seconds_count 2" in lines
+    assert "t_seconds_sum 0.55" in lines
+
+
+def test_requests_labelled_by_route(client, test_expenses):
+    """Requests are counted per URL rule and status, not per concrete path."""
+    labels = ("/api/expenses/<int:expense_id>", "DELETE", "204")
+    before = metrics.http_requests.value(*labels)
+    client.delete(f"/api/expenses/{test_expenses[0].id}")
+    client.delete(f"/api/expenses/{test_expenses[1].id}")
+
+    assert metrics.http_requests.value(*labels) == before + 2
+    assert metrics.http_request_duration.count(*labels) >= 2
+
+    samples = _scrape(client)
+    key = (
+        'pf_http_requests_total{route="/api/expenses/<int:expense_id>",'
+        'method="DELETE",status="204"}'
+    )
+    assert samples[key] == before + 2
+
+
+def test_query_histogram_and_db_size(client, test_expenses):
+    before = metrics.db_query_duration.count()
+    client.get("/api/expenses")
+    assert metrics.db_query_duration.count() > before
+
+    samples = _scrape(client)
+    assert samples['pf_db_file_bytes{file="main"}'] > 0
+    assert 'pf_db_file_bytes{file="wal"}' in samples
+
+
+def test_forecast_cache_hit_ratio(client):
+    hits = metrics.cache_requests.value("recurring_forecast", "hit")
+    client.get("/api/recurring/forecast?months=7")
+    client.get("/api/recurring/forecast?months=7")
+
+    assert metrics.cache_requests.value("recurring_forecast", "hit") == hits + 1
+    samples = _scrape(client)
+    assert 0 < samples['pf_cache_hit_ratio{cache="recurring_forecast"}'] <= 1
+
+
+def test_apply_recurring_job_metrics(client):
+    before = metrics.job_runs.value("apply_recurring", "ok")
+    apply_due_recurring_expenses()
+    assert metrics.job_runs.value("apply_recurring", "ok") == before + 1
+    assert metrics.job_duration.count("apply_recurring", "ok") >= 1
+
+
+def test_bank_sync_metrics(client, _db, monkeypatch):
+    """A sync run reports fetched, added, unclassified and duplicate counts."""
+    skipped = metrics.job_runs.value("bank_sync", "skipped")
+    sync_transactions(db, app_module)
+    assert metrics.job_runs.value("bank_sync", "skipped") == skipped + 1
+
+    _db.session.add(
+        AppToken(key="enable_banking", value=json.dumps({"last_sync_at": None}))
+    )
+    _db.session.add(
+        Expense(
+            amount=5.0,
+            category="other",
+            description="Seen",
+            date=datetime.now(),
+            external_id="txn-1",
+        )
+    )
+    _db.session.commit()
+    monkeypatch.setenv("ENABLE_BANKING_ACCOUNT_ID", "acc")
+    today = datetime.now().strftime("%Y-%m-%d")
+    monkeypatch.setattr(
+        enable_banking,
+        "get_transactions",
+        lambda account_id, date_from, on_page=None: [
+            {"external_id": f"txn-{i}", "amount": 10.0, "date": today, "merchant": "X"}
+            for i in range(1, 4)
+        ],
+    )
+    before = {
+        result: metrics.bank_sync_transactions.value(result)
+        for result in ("fetched", "added", "unclassified", "duplicate")
+    }
+    ok = metrics.job_runs.value("bank_sync", "ok")
+
+    sync_transactions(db, app_module)
+
+    assert metrics.job_runs.value("bank_sync", "ok") == ok + 1
+    deltas = {
+        result: metrics.bank_sync_transactions.value(result) - count
+        for result, count in before.items()
+    }
+    assert deltas == {"fetched": 3, "added": 2, "unclassified": 2, "duplicate": 1}
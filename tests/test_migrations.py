@@ -0,0 +1,115 @@
+import sqlite3
+
+import pytest
+from app import MIGRATIONS
+from services import migrations
+from sqlalchemy import Column, Index, Integer, MetaData, Table, create_engine, inspect
+
+
+@pytest.fixture
+def engine(tmp_path):
+    engine = create_engine(f"sqlite:///{tmp_path / 'migrate.db'}")
+    yield engine
+    engine.dispose()
+
+
+def _schema(engine):
+    """Tables, columns, indexes and triggers, ignoring how they were made."""
+    inspector = inspect(engine)
+    with engine.connect() as connection:
+        triggers = connection.exec_driver_sql(
+            "SELECT name FROM sqlite_master WHERE type = 'trigger'"
+        ).all()
+    return {
+        table: (
+            {c["name"] for c in inspector.get_columns(table)},
+            {i["name"] for i in inspector.get_indexes(table)},
+        )
+        for table in inspector.get_table_names()
+        if table != "schema_version" and not table.startswith("expense_fts")
+    }, {name for (name,) in triggers}
+
+
+def test_new_database_reaches_latest_version(engine):
+    assert migrations.upgrade(engine, MIGRATIONS) == [m.version for m in MIGRATIONS]
+    assert migrations.upgrade(engine, MIGRATIONS) == []
+    with engine.connect() as connection:
+        assert migrations.current_version(connection) == MIGRATIONS[-1].version
+        assert migrations.pending(connection, MIGRATIONS) == []
+        history = migrations.history(connection)
+    assert [row["name"] for row in history] == [m.name for m in MIGRATIONS]
+    assert all(row["duration_ms"] is not None for row in history)
+
+
+def test_oldest_schema_matches_a_new_database(engine, tmp_path):
+    # The shape of the first release: no bank fields, text categories
+    with sqlite3.connect(engine.url.database) as conn:
+        conn.execute(
+            "CREATE TABLE expense (id INTEGER PRIMARY KEY, amount FLOAT NOT NULL, "
+            "category VARCHAR(50) NOT NULL, description VARCHAR(200) NOT NULL, "
+            "date DATETIME)"
+        )
+        conn.execute(
+            "CREATE TABLE recurring_expense (id INTEGER PRIMARY KEY, "
+            "amount FLOAT NOT NULL, category VARCHAR(50) NOT NULL, "
+            "description VARCHAR(50) NOT NULL, frequency VARCHAR(20) NOT NULL, "
+            "day_of_month INTEGER, start_date DATETIME NOT NULL, end_date DATETIME, "
+            "is_active BOOLEAN, last_applied_date DATETIME, created_at DATETIME)"
+        )
+        conn.execute(
+            "INSERT INTO expense VALUES "
+            "(1, 9.5, 'super', 'Mercadona', '2024-03-01 10:00:00.000000')"
+        )
+    migrations.upgrade(engine, MIGRATIONS)
+
+    fresh = create_engine(f"sqlite:///{tmp_path / 'fresh.db'}")
+    try:
+        migrations.upgrade(fresh, MIGRATIONS)
+        assert _schema(engine) == _schema(fresh)
+    finally:
+        fresh.dispose()
+    with engine.connect() as connection:
+        row = connection.exec_driver_sql(
+            "SELECT e.amount, c.key, e.source FROM expense e "
+            "JOIN category c ON c.id = e.category_id"
+        ).one()
+        found = connection.exec_driver_sql(
+            "SELECT rowid FROM expense_fts WHERE expense_fts MATCH 'mercadona'"
+        ).all()
+    assert tuple(row) == (9.5, "super", "manual")
+    assert found == [(1,)]
+
+
+def test_failed_step_is_rolled_back(engine):
+    def broken(connection):
+        connection.exec_driver_sql("CREATE TABLE half_done (id INTEGER)")
+        raise RuntimeError("boom")
+
+    steps = [
+        migrations.Migration(1, "ok", lambda c: None),
+        migrations.Migration(2, "broken", broken),
+    ]
+    with pytest.raises(RuntimeError):
+        migrations.upgrade(engine, steps)
+    assert "half_done" not in inspect(engine).get_table_names()
+    with engine.connect() as connection:
+        assert migrations.current_version(connection) == 1
+
+
+def test_helpers_are_idempotent(engine):
+    table = Table("item", MetaData(), Column("id", Integer, primary_key=True))
+    with engine.begin() as connection:
+        connection.exec_driver_sql("CREATE TABLE item (name VARCHAR(20))")
+        connection.exec_driver_sql("INSERT INTO item VALUES ('a')")
+        assert migrations.add_column(connection, table, table.c.id)
+        assert not migrations.add_column(connection, table, table.c.id)
+        index = Index("ix_item_id", table.c.id)
+        assert migrations.create_index(connection, index)
+        assert not migrations.create_index(connection, index)
+    assert {i["name"] for i in inspect(engine).get_indexes("item")} == {"ix_item_id"}
+
+
+def test_versions_must_be_unique(engine):
+    steps = [migrations.Migration(1, "a", print), migrations.Migration(1, "b", print)]
+    with pytest.raises(ValueError):
+        migrations.upgrade(engine, steps)
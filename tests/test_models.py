@@ -56,3 +56,71 @@ def test_expense_validation(_db, clean_db):
     with pytest.raises(Exception):
         _db.session.commit()
     _db.session.rollback()
+
+
+@pytest.mark.parametrize(
+    "stored, expected",
+    [
+        ("2024-03-01 10:15:30.000000", "2024-03-01T10:15:30"),
+        ("2024-03-01 10:15:30.120000", "2024-03-01T10:15:30.120000"),
+        ("2024-03-01 10:15:30", "2024-03-01T10:15:30"),
+        ("2024-03-01", "2024-03-01T00:00:00"),
+        (None, None),
+    ],
+)
+def test_sqlite_iso_matches_isoformat(stored, expected):
+    from app import sqlite_iso
+
+    assert sqlite_iso(stored) == expected
+
+
+def test_read_dicts_match_to_dict(_db, clean_db):
+    """The Core read path returns exactly what to_dict() would."""
+    from sqlalchemy import select
+    from app import (
+        EXPENSE_ISO_KEYS,
+        EXPENSE_READ_COLUMNS,
+        MERCHANT_READ_COLUMNS,
+        RECURRING_ISO_KEYS,
+        RECURRING_READ_COLUMNS,
+        MerchantMapping,
+        RecurringExpense,
+        read_dicts,
+    )
+
+    _db.session.add_all(
+        [
+            Expense(
+                amount=1.5, category="a", description="x", date=datetime(2024, 3, 1)
+            ),
+            Expense(
+                amount=2.0,
+                category="b",
+                description="y",
+                date=datetime(2024, 3, 2, 8, 30, 0, 5),
+                source="bank_sync",
+                external_id="e1",
+                merchant="SHOP",
+            ),
+            RecurringExpense(
+                amount=9.99,
+                category="c",
+                description="Sub",
+                frequency="monthly",
+                day_of_month=5,
+                start_date=datetime(2024, 1, 1),
+                next_due_date=datetime(2024, 4, 5),
+            ),
+            MerchantMapping(pattern="SHOP", category="b", description="Shop"),
+        ]
+    )
+    _db.session.commit()
+
+    for model, columns, iso_keys in (
+        (Expense, EXPENSE_READ_COLUMNS, EXPENSE_ISO_KEYS),
+        (RecurringExpense, RECURRING_READ_COLUMNS, RECURRING_ISO_KEYS),
+        (MerchantMapping, MERCHANT_READ_COLUMNS, ()),
+    ):
+        expected = [obj.to_dict() for obj in model.query.order_by(model.id)]
+        rows = read_dicts(select(*columns).order_by(model.id), iso_keys)
+        assert rows == expected
@@ -1,12 +1,17 @@
 import pytest
 from datetime import datetime, timezone, timedelta
+import app as app_module
 from app import (
     app,
     db,
     RecurringExpense,
     Expense,
     apply_due_recurring_expenses,
+    compute_next_due_date,
+    due_recurring_query,
     is_due_today,
+    job_queue,
+    local_today,
 )
 
 
@@ -322,11 +327,13 @@ def test_manual_apply_endpoint(client):
         db.session.commit()
 
     response = client.post("/api/recurring/apply")
-    assert response.status_code == 200
+    assert response.status_code == 202
+    job_url = response.headers["Location"]
 
-    json_data = response.get_json()
-    assert json_data["success"] is True
-    assert json_data["applied"] == 1
+    job_queue.run_pending()
+    job = client.get(job_url).get_json()
+    assert job["status"] == "succeeded"
+    assert job["result"] == {"applied": 1}
 
 
 def test_never_applied_recurring_only_fires_on_correct_day(client):
@@ -358,9 +365,7 @@ def test_never_applied_recurring_only_fires_on_correct_day(client):
 def test_pending_recurring_endpoint(client):
     """Test the pending recurring expenses endpoint."""
     with app.app_context():
-        today = datetime.now(timezone.utc).replace(
-            hour=0, minute=0, second=0, microsecond=0
-        )
+        today = local_today()
 
         # Create a due recurring expense
         recurring = RecurringExpense(
@@ -382,3 +387,230 @@ def test_pending_recurring_endpoint(client):
     json_data = response.get_json()
     assert len(json_data["pending"]) == 1
     assert json_data["pending"][0]["description"] == "Test"
+
+
+def test_pending_preview_and_apply_agree_on_the_day(client, monkeypatch):
+    """Both use the local day, so a preview shortly before or after UTC
+    midnight lists exactly what the scheduled run will apply."""
+    day = datetime(2025, 6, 15)
+    monkeypatch.setattr(app_module, "local_today", lambda: day)
+    with app.app_context():
+        db.session.add(
+            RecurringExpense(
+                amount=9.0,
+                category="super",
+                description="Gym",
+                frequency="monthly",
+                day_of_month=15,
+                start_date=datetime(2025, 1, 15),
+                next_due_date=day,
+            )
+        )
+        db.session.commit()
+
+    pending = client.get("/api/recurring/pending").get_json()["pending"]
+    assert [r["description"] for r in pending] == ["Gym"]
+    with app.app_context():
+        assert apply_due_recurring_expenses() == 1
+    assert client.get("/api/recurring/pending").get_json()["pending"] == []
+
+
+def test_preview_and_apply_share_the_duplicate_check(client, monkeypatch):
+    """An expense entered by hand later that day counts as applied for both."""
+    day = datetime(2025, 6, 15)
+    monkeypatch.setattr(app_module, "local_today", lambda: day)
+    with app.app_context():
+        db.session.add(
+            RecurringExpense(
+                amount=9.0,
+                category="super",
+                description="Gym",
+                frequency="monthly",
+                day_of_month=15,
+                start_date=datetime(2025, 1, 15),
+                next_due_date=day,
+            )
+        )
+        db.session.add(
+            Expense(
+                amount=9.0,
+                category="super",
+                description="Gym",
+                date=day.replace(hour=18),
+            )
+        )
+        db.session.commit()
+
+    assert client.get("/api/recurring/pending").get_json()["pending"] == []
+    with app.app_context():
+        assert apply_due_recurring_expenses() == 0
+
+
+def test_create_sets_next_due_date(client):
+    """Creating via the API stores the first upcoming due date."""
+    today = datetime.now().replace(hour=0, minute=0, second=0, microsecond=0)
+    data = {
+        "amount": 20.0,
+        "category": "super",
+        "description": "Weekly box",
+        "frequency": "weekly",
+        "day_of_month": today.isoweekday(),
+        "start_date": (today - timedelta(days=14)).isoformat(),
+    }
+
+    response = client.post("/api/recurring", json=data)
+    assert response.status_code == 201
+    assert response.get_json()["next_due_date"].startswith(today.date().isoformat())
+
+
+def test_compute_next_due_date_monthly_skips_short_months():
+    """Day 31 is never due in a 30-day month, so the next date jumps ahead."""
+    recurring = RecurringExpense(
+        amount=10.0,
+        category="super",
+        description="Test",
+        frequency="monthly",
+        day_of_month=31,
+        start_date=datetime(2024, 1, 1),
+    )
+    assert compute_next_due_date(recurring, datetime(2024, 4, 1)) == datetime(
+        2024, 5, 31
+    )
+
+    recurring.end_date = datetime(2024, 5, 30)
+    assert compute_next_due_date(recurring, datetime(2024, 4, 1)) is None
+
+
+def test_apply_advances_next_due_date(client):
+    """After applying, the row is scheduled for next month and no longer scanned."""
+    with app.app_context():
+        today = datetime.now().replace(hour=0, minute=0, second=0, microsecond=0)
+        recurring = RecurringExpense(
+            amount=100.0,
+            category="super",
+            description="Monthly Rent",
+            frequency="monthly",
+            day_of_month=today.day,
+            start_date=today - timedelta(days=30),
+            is_active=True,
+        )
+        db.session.add(recurring)
+        db.session.commit()
+
+        assert apply_due_recurring_expenses() == 1
+        recurring = db.session.get(RecurringExpense, recurring.id)
+        assert recurring.next_due_date > today
+        assert due_recurring_query(today).count() == 0
+
+
+def test_future_next_due_date_is_not_scanned(client):
+    """Rows whose next_due_date is in the future are excluded from the scan."""
+    with app.app_context():
+        today = datetime.now().replace(hour=0, minute=0, second=0, microsecond=0)
+        recurring = RecurringExpense(
+            amount=100.0,
+            category="super",
+            description="Later",
+            frequency="monthly",
+            day_of_month=today.day,
+            start_date=today - timedelta(days=30),
+            is_active=True,
+            next_due_date=today + timedelta(days=3),
+        )
+        db.session.add(recurring)
+        db.session.commit()
+
+        assert apply_due_recurring_expenses() == 0
+
+    response = client.get("/api/recurring/pending")
+    assert response.get_json()["pending"] == []
+
+
+def test_forecast_endpoint(client):
+    """Forecast groups projected occurrences by month and category."""
+    with app.app_context():
+        today = datetime.now().replace(hour=0, minute=0, second=0, microsecond=0)
+        db.session.add_all(
+            [
+                RecurringExpense(
+                    amount=500.0,
+                    category="xofa",
+                    description="Rent",
+                    frequency="monthly",
+                    day_of_month=1,
+                    start_date=today - timedelta(days=60),
+                ),
+                RecurringExpense(
+                    amount=10.0,
+                    category="recurrent",
+                    description="Streaming",
+                    frequency="monthly",
+                    day_of_month=1,
+                    start_date=today - timedelta(days=60),
+                    is_active=False,
+                ),
+            ]
+        )
+        db.session.commit()
+
+    response = client.get("/api/recurring/forecast?months=3")
+    assert response.status_code == 200
+    data = response.get_json()
+    assert data["horizon_months"] == 3
+    assert len(data["months"]) == 3
+    # Day 1 of the current month has passed unless today is the 1st
+    expected = 3 if today.day == 1 else 2
+    assert data["categories"] == {"xofa": 500.0 * expected}
+    assert data["months"][-1]["categories"] == {"xofa": 500.0}
+
+
+def test_forecast_honours_end_date_and_invalidates_cache(client):
+    """Ending a recurrence removes later occurrences from a cached forecast."""
+    with app.app_context():
+        recurring = RecurringExpense(
+            amount=5.0,
+            category="super",
+            description="Weekly",
+            frequency="weekly",
+            day_of_month=1,
+            start_date=datetime.now() - timedelta(days=30),
+        )
+        db.session.add(recurring)
+        db.session.commit()
+        recurring_id = recurring.id
+
+    first = client.get("/api/recurring/forecast?months=2").get_json()
+    assert first["total"] > 0
+
+    end = datetime.now() - timedelta(days=1)
+    client.put(f"/api/recurring/{recurring_id}", json={"end_date": end.isoformat()})
+    second = client.get("/api/recurring/forecast?months=2").get_json()
+    assert second["total"] == 0
+
+
+def test_forecast_rejects_invalid_months(client):
+    assert client.get("/api/recurring/forecast?months=abc").status_code == 400
+    assert client.get("/api/recurring/forecast?months=0").status_code == 400
+
+
+def test_forecast_cache_sees_writes_outside_the_orm(client):
+    """Raw SQL (a script, another process) invalidates the forecast too."""
+    with app.app_context():
+        db.session.add(
+            RecurringExpense(
+                amount=5.0,
+                category="super",
+                description="Weekly",
+                frequency="weekly",
+                day_of_month=1,
+                start_date=datetime.now() - timedelta(days=30),
+            )
+        )
+        db.session.commit()
+
+    first = client.get("/api/recurring/forecast?months=2").get_json()
+    assert first["total"] > 0
+    with db.engine.begin() as connection:
+        connection.exec_driver_sql("UPDATE recurring_expense SET is_active = 0")
+    second = client.get("/api/recurring/forecast?months=2").get_json()
+    assert second["total"] == 0
@@ -0,0 +1,103 @@
+import json
+from datetime import datetime, timezone
+from decimal import Decimal
+
+import pytest
+from app import Expense, app
+from flask import Flask
+from services.serialization import FastJSONProvider
+
+
+@pytest.fixture(autouse=True)
+def clean_db(_db):
+    _db.session.query(Expense).delete()
+    _db.session.commit()
+
+
+def _provider(backend):
+    stub = Flask(__name__)
+    stub.config["JSON_BACKEND"] = backend
+    return FastJSONProvider(stub)
+
+
+@pytest.mark.parametrize(
+    "obj",
+    [
+        {"b": 1, "a": [1.5, None, True], "c": "café"},
+        {"when": datetime(2024, 3, 1, 10, 0, tzinfo=timezone.utc)},
+        {"amount": Decimal("12.30")},
+        {"big": 2**70},
+    ],
+)
+def test_fast_backend_matches_stdlib(obj):
+    """orjson output decodes to the same value as Flask's default encoder."""
+    pytest.importorskip("orjson")
+    fast, stdlib = _provider("auto"), _provider("stdlib")
+    assert fast.fast and not stdlib.fast
+    assert json.loads(fast.dumps(obj)) == json.loads(stdlib.dumps(obj))
+
+
+def test_responses_use_fast_backend(client):
+    """Flask's response() passes compact separators; orjson still handles it
+    (it writes UTF-8 where the stdlib encoder escapes to ASCII)."""
+    pytest.importorskip("orjson")
+    assert app.json.fast
+    client.post(
+        "/api/expenses", json={"amount": 3, "category": "other", "description": "café"}
+    )
+    assert "café".encode() in client.get("/api/expenses").data
+
+
+def test_formatting_options_use_stdlib():
+    provider = _provider("auto")
+    assert provider.dumps({"a": 1}, indent=2) == '{\n  "a": 1\n}'
+
+
+def test_unknown_backend_rejected():
+    with pytest.raises(ValueError):
+        _provider("simdjson")
+
+
+def test_json_is_default(client, test_expenses):
+    response = client.get("/api/expenses")
+    assert response.mimetype == "application/json"
+    assert "Accept" in response.headers["Vary"]
+    assert len(response.get_json()["expenses"]) == 3
+
+
+@pytest.mark.parametrize(
+    "accept, module, decode",
+    [
+        ("application/msgpack", "msgpack", lambda m, data: m.unpackb(data)),
+        ("application/x-msgpack", "msgpack", lambda m, data: m.unpackb(data)),
+        ("application/cbor", "cbor2", lambda m, data: m.loads(data)),
+    ],
+)
+def test_binary_formats_via_accept(client, test_expenses, accept, module, decode):
+    lib = pytest.importorskip(module)
+    expected = client.get("/api/expenses").get_json()
+
+    response = client.get("/api/expenses", headers={"Accept": accept})
+    assert response.status_code == 200
+    assert response.mimetype == accept.replace("x-", "")
+    assert decode(lib, response.data) == expected
+    assert len(response.data) < len(client.get("/api/expenses").data)
+
+
+def test_json_preferred_by_quality(client, test_expenses):
+    pytest.importorskip("msgpack")
+    response = client.get(
+        "/api/expenses",
+        headers={"Accept": "application/json, application/msgpack;q=0.5"},
+    )
+    assert response.mimetype == "application/json"
+
+
+def test_request_bodies_still_parse(client):
+    response = client.post(
+        "/api/expenses",
+        data=json.dumps({"amount": 3, "category": "other", "description": "x"}),
+        content_type="application/json",
+    )
+    assert response.status_code == 201
+    assert app.json.loads(b'{"a": [1, 2]}') == {"a": [1, 2]}
@@ -0,0 +1,108 @@
+import json
+import os
+import re
+
+import pytest
+from app import app
+from services.static_assets import AssetManifest
+
+PAGES = {
+    "/": "index.html",
+    "/add": "add-expense.html",
+    "/expenses": "expenses.html",
+    "/recurring": "recurring.html",
+    "/trends": "trends.html",
+}
+
+
+def _import_map(html):
+    match = re.search(r'<script type="importmap">(.*?)</script>', html, re.S)
+    return json.loads(match.group(1))["imports"]
+
+
+@pytest.mark.parametrize("path", PAGES)
+def test_pages_reference_hashed_assets(client, path):
+    response = client.get(path)
+    assert response.status_code == 200
+    assert response.headers["Cache-Control"] == "no-cache"
+    html = response.get_data(as_text=True)
+
+    refs = re.findall(r'(?:src|href)="(/static/[^"]+\.(?:js|css))"', html)
+    assert refs
+    for ref in refs:
+        assert re.search(r"\.[0-9a-f]{10}\.(js|css)$", ref), ref
+    # Relative module imports resolve through the import map
+    imports = _import_map(html)
+    assert re.search(r"\.[0-9a-f]{10}\.js$", imports["/static/components/config.js"])
+    assert html.index('type="importmap"') < html.index('type="module"')
+
+
+def test_page_revalidates_with_etag(client):
+    first = client.get("/expenses")
+    etag = first.headers["ETag"].strip('"')
+    again = client.get("/expenses", headers={"If-None-Match": etag})
+    assert again.status_code == 304
+
+
+def test_static_html_link_is_rewritten(client):
+    """index.html links /static/add-expense.html directly."""
+    html = client.get("/static/add-expense.html").get_data(as_text=True)
+    assert 'type="importmap"' in html
+
+
+def test_html_outside_static_is_not_served(client, tmp_path):
+    secret = tmp_path / "secret_probe.html"
+    secret.write_text("<html><head></head>secret</html>")
+    relative = os.path.relpath(secret, app.static_folder).replace("/", "%2f")
+    response = client.get(f"/static/{relative}")
+    assert response.status_code == 404
+    assert b"secret" not in response.data
+    assert client.get("/static/missing.html").status_code == 404
+
+
+def test_hashed_asset_is_immutable(client):
+    manifest = app.extensions["asset_manifest"]
+    url = manifest.url("components/config.js")
+    assert url != "/static/components/config.js"
+
+    response = client.get(url)
+    assert response.status_code == 200
+    cache_control = response.headers["Cache-Control"]
+    assert "immutable" in cache_control and "max-age=31536000" in cache_control
+    with open(os.path.join(app.static_folder, "components", "config.js"), "rb") as f:
+        assert response.data == f.read()
+
+
+def test_unhashed_asset_revalidates(client):
+    response = client.get("/static/components/config.js")
+    assert response.status_code == 200
+    assert "no-cache" in response.headers["Cache-Control"]
+    assert "immutable" not in response.headers["Cache-Control"]
+
+
+def test_manifest_tracks_content_changes(tmp_path):
+    asset = tmp_path / "app.js"
+    asset.write_text("console.log(1);")
+    (tmp_path / "page.html").write_text(
+        '<html><head></head><body><script type="module" '
+        'src="/static/app.js?v=1"></script></body></html>'
+    )
+    manifest = AssetManifest(str(tmp_path))
+    manifest.refresh()
+    first = manifest.assets["app.js"]
+    assert manifest.sources[first] == "app.js"
+    assert (
+        f'src="/static/{first}"'
+        in manifest.render_page("page.html")["identity"].decode()
+    )
+
+    asset.write_text("console.log(2);")
+    os.utime(asset, (asset.stat().st_mtime + 10,) * 2)
+    assert manifest.refresh()
+    second = manifest.assets["app.js"]
+    assert second != first
+    assert (
+        f'src="/static/{second}"'
+        in manifest.render_page("page.html")["identity"].decode()
+    )
+    assert not manifest.refresh()